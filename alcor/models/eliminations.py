@@ -11,10 +11,14 @@ from .base import Base
 
 class StarsCounter(Base):
     __tablename__ = 'stars_eliminations_counters'
+    # partitioned like stars, requires PostgreSQL 11 or later
+    __table_args__ = {'postgresql_partition_by': 'LIST (group_id)'}
 
     id = Column(Integer(),
-                primary_key=True)
+                primary_key=True,
+                autoincrement=True)
     group_id = Column(UUID(as_uuid=True),
+                      primary_key=True,
                       nullable=False)
     raw = Column(Integer(),
                  nullable=False)
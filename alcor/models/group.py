@@ -3,7 +3,8 @@ import uuid
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.schema import Column
 from sqlalchemy.sql.functions import func
-from sqlalchemy.sql.sqltypes import DateTime
+from sqlalchemy.sql.sqltypes import (String,
+                                     DateTime)
 
 from .base import Base
 
@@ -12,9 +13,15 @@ class Group(Base):
     __tablename__ = 'groups'
     id = Column(UUID(as_uuid=True),
                 primary_key=True)
+    # hash of simulation parameters, used to detect simulated grid points
+    fingerprint = Column(String(),
+                         nullable=True,
+                         index=True)
     updated_timestamp = Column(DateTime(),
                                server_default=func.now())
 
     def __init__(self,
-                 id: uuid.UUID):
+                 id: uuid.UUID,
+                 fingerprint: str = None):
         self.id = id
+        self.fingerprint = fingerprint
@@ -2,7 +2,8 @@ import enum
 import uuid
 
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.schema import Column
+from sqlalchemy.schema import (Column,
+                               Index)
 from sqlalchemy.sql.functions import func
 from sqlalchemy.sql.sqltypes import (BigInteger,
                                      Integer,
@@ -51,10 +52,21 @@ class GalacticDiskType(enum.IntEnum):
 
 class Star(Base):
     __tablename__ = 'stars'
+    # each group's stars are stored in a separate list partition
+    # (unlike hash ones, which are shared by several groups),
+    # so they can be scanned and dropped without touching others;
+    # primary keys and indexes of partitioned tables
+    # require PostgreSQL 11 or later
+    __table_args__ = (Index('ix_stars_group_id_sample_key',
+                            'group_id', 'sample_key'),
+                      {'postgresql_partition_by': 'LIST (group_id)'})
 
     id = Column(BigInteger(),
-                primary_key=True)
+                primary_key=True,
+                autoincrement=True)
+    # partitioned table's primary key should contain partitioning column
     group_id = Column(UUID(as_uuid=True),
+                      primary_key=True,
                       nullable=False)
     mass = Column(Float(),
                   nullable=True)
@@ -111,6 +123,11 @@ class Star(Base):
                            nullable=True)
     galactic_disk_type = Column(Enum(GalacticDiskType),
                                 nullable=True)
+    # uniformly distributed key assigned at insertion,
+    # random subset of stars is a range of keys
+    sample_key = Column(Float(),
+                        server_default=func.random(),
+                        nullable=False)
     updated_timestamp = Column(DateTime(),
                                server_default=func.now())
 
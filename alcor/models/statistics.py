@@ -0,0 +1,72 @@
+import uuid
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.dialects.postgresql import (ARRAY,
+                                            UUID)
+from sqlalchemy.schema import Column
+from sqlalchemy.sql.functions import func
+from sqlalchemy.sql.sqltypes import (Integer,
+                                     Float,
+                                     String,
+                                     DateTime)
+
+from .base import Base
+
+
+class GroupStatistics(Base):
+    __tablename__ = 'groups_statistics'
+
+    group_id = Column(UUID(as_uuid=True),
+                      primary_key=True)
+    filtration_method = Column(String(),
+                               primary_key=True)
+    stars_count = Column(Integer(),
+                         nullable=False)
+    # statistics are missing if stars have no columns they need
+    luminosity_function_counts = Column(ARRAY(Integer()),
+                                        nullable=True)
+    # sums of velocities powers by bolometric magnitude bins
+    # with shape (velocities, orders, bins)
+    velocities_power_sums = Column(ARRAY(Float(),
+                                         dimensions=3),
+                                   nullable=True)
+    lepine_velocities_power_sums = Column(ARRAY(Float(),
+                                                dimensions=3),
+                                          nullable=True)
+    # in order of galactic disk types values
+    galactic_disk_types_counts = Column(ARRAY(Integer()),
+                                        nullable=True)
+    # indexed by spectral types
+    spectral_types_counts = Column(ARRAY(Integer()),
+                                   nullable=True)
+    updated_timestamp = Column(DateTime(),
+                               server_default=func.now())
+
+    def __init__(self,
+                 *,
+                 group_id: uuid.UUID,
+                 filtration_method: str,
+                 stars_count: int,
+                 luminosity_function_counts: Optional[np.ndarray] = None,
+                 velocities_power_sums: Optional[np.ndarray] = None,
+                 lepine_velocities_power_sums: Optional[np.ndarray] = None,
+                 galactic_disk_types_counts: Optional[np.ndarray] = None,
+                 spectral_types_counts: Optional[np.ndarray] = None):
+        self.group_id = group_id
+        self.filtration_method = filtration_method
+        self.stars_count = stars_count
+        # converting to Python scalars, so database driver can adapt them
+        self.luminosity_function_counts = to_list(
+                luminosity_function_counts)
+        self.velocities_power_sums = to_list(velocities_power_sums)
+        self.lepine_velocities_power_sums = to_list(
+                lepine_velocities_power_sums)
+        self.galactic_disk_types_counts = to_list(galactic_disk_types_counts)
+        self.spectral_types_counts = to_list(spectral_types_counts)
+
+
+def to_list(values: Optional[np.ndarray]) -> Optional[list]:
+    if values is None:
+        return None
+    return np.asarray(values).tolist()
@@ -0,0 +1,145 @@
+from typing import (Callable,
+                    Tuple)
+
+import numpy as np
+
+
+def bins_counts(bins_indexes: np.ndarray,
+                *,
+                bins_count: int) -> np.ndarray:
+    bins_indexes = np.asarray(bins_indexes)
+    return np.bincount(bins_indexes[in_range_mask(bins_indexes,
+                                                  bins_count=bins_count)],
+                       minlength=bins_count)
+
+
+def power_sums(bins_indexes: np.ndarray,
+               *,
+               values: np.ndarray,
+               bins_count: int,
+               max_order: int = 2) -> np.ndarray:
+    # sums of values powers for each column and bin
+    # with shape (max_order + 1, columns, bins_count),
+    # zero order ones are counts;
+    # they are additive, so can be summed up over chunks of stars
+    bins_indexes = np.asarray(bins_indexes)
+    values = np.atleast_2d(np.asarray(values,
+                                      dtype=np.float64))
+    columns_count = values.shape[0]
+    mask = in_range_mask(bins_indexes,
+                         bins_count=bins_count)
+    values = values[:, mask]
+    # all columns are binned at once
+    # by giving each of them separate range of indexes
+    indexes = (bins_indexes[mask]
+               + bins_count * np.arange(columns_count)[:, np.newaxis])
+    indexes = indexes.ravel()
+    counts = np.bincount(bins_indexes[mask],
+                         minlength=bins_count)
+    result = [np.tile(counts.astype(np.float64), (columns_count, 1))]
+    for order in range(1, max_order + 1):
+        result.append(np.bincount(indexes,
+                                  weights=(values ** order).ravel(),
+                                  minlength=bins_count * columns_count)
+                      .reshape(columns_count, bins_count))
+    return np.stack(result)
+
+
+def histogram2d(x: np.ndarray,
+                y: np.ndarray,
+                *,
+                x_limits: Tuple[float, float],
+                y_limits: Tuple[float, float],
+                bins_count: int) -> np.ndarray:
+    # unlike numpy one edges are fixed and equal bins are assumed,
+    # so indexes are computed directly instead of searching among edges
+    # and histograms can be summed up over chunks of stars
+    x_indexes = uniform_bins_indexes(x,
+                                     limits=x_limits,
+                                     bins_count=bins_count)
+    y_indexes = uniform_bins_indexes(y,
+                                     limits=y_limits,
+                                     bins_count=bins_count)
+    mask = (in_range_mask(x_indexes,
+                          bins_count=bins_count)
+            & in_range_mask(y_indexes,
+                            bins_count=bins_count))
+    return (np.bincount(x_indexes[mask] * bins_count + y_indexes[mask],
+                        minlength=bins_count * bins_count)
+            .reshape(bins_count, bins_count))
+
+
+def uniform_bins_indexes(values: np.ndarray,
+                         *,
+                         limits: Tuple[float, float],
+                         bins_count: int) -> np.ndarray:
+    start, stop = limits
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, -1,
+                     dtype=np.int64)
+    # comparisons with NaN fail, so such values stay out of range
+    with np.errstate(invalid='ignore'):
+        in_range = (values >= start) & (values <= stop)
+    values = values[in_range]
+    # like in numpy histograms the last bin includes upper limit
+    indexes = np.minimum(((values - start)
+                          * (bins_count / (stop - start))).astype(np.int64),
+                         bins_count - 1)
+    # positions are rounded, so values on edges are placed
+    # by comparing with the same edges as numpy histograms have
+    edges = np.linspace(start, stop,
+                        num=bins_count + 1)
+    indexes -= values < edges[indexes]
+    indexes += (values >= edges[indexes + 1]) & (indexes < bins_count - 1)
+    result[in_range] = indexes
+    return result
+
+
+def in_range_mask(bins_indexes: np.ndarray,
+                  *,
+                  bins_count: int) -> np.ndarray:
+    return (bins_indexes >= 0) & (bins_indexes < bins_count)
+
+
+def counts(sums: np.ndarray) -> np.ndarray:
+    return sums[0]
+
+
+def means(sums: np.ndarray) -> np.ndarray:
+    # empty bins have no mean
+    with np.errstate(divide='ignore',
+                     invalid='ignore'):
+        return sums[1] / sums[0]
+
+
+def variances(sums: np.ndarray,
+              *,
+              ddof: int = 1) -> np.ndarray:
+    values_counts = counts(sums)
+    with np.errstate(divide='ignore',
+                     invalid='ignore'):
+        result = ((sums[2] - sums[1] ** 2 / values_counts)
+                  / (values_counts - ddof))
+        # rounding errors can make variances of equal values negative
+        result = np.where(result < 0., 0., result)
+    # like pandas, bins with not enough values have none
+    result[values_counts <= ddof] = np.nan
+    return result
+
+
+def standard_deviations(sums: np.ndarray,
+                        *,
+                        ddof: int = 1) -> np.ndarray:
+    return np.sqrt(variances(sums,
+                             ddof=ddof))
+
+
+def bolometric_indexer(*,
+                       min_magnitude: float,
+                       stars_bin_size: float) -> Callable[[np.ndarray],
+                                                          np.ndarray]:
+    def bolometric_index(magnitudes: np.ndarray) -> np.ndarray:
+        magnitude_amplitudes = magnitudes - min_magnitude
+        return np.floor(magnitude_amplitudes / stars_bin_size).astype(np.int32)
+
+    return bolometric_index
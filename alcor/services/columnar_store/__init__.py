@@ -0,0 +1,8 @@
+from .service import (group_dir,
+                      read_columns_names,
+                      read_columns_versions,
+                      read_group,
+                      read_group_chunks,
+                      remove_group,
+                      write_group,
+                      write_group_columns)
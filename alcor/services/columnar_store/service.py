@@ -0,0 +1,344 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import ExitStack
+from typing import (Any,
+                    Iterable,
+                    Iterator,
+                    Optional,
+                    Dict,
+                    List,
+                    Tuple)
+
+import numpy as np
+import pandas as pd
+
+from alcor.utils import galactic_disk_types_categorical
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILE_NAME = 'metadata.json'
+COLUMNS_FILES_EXTENSION = '.bin'
+TEMPORARY_DIRS_EXTENSION = '.tmp'
+DEFAULT_SAMPLE_SEED = 0
+
+
+def group_dir(group_id: uuid.UUID,
+              *,
+              directory: str) -> str:
+    return os.path.join(directory, group_id.hex)
+
+
+def remove_group(group_id: uuid.UUID,
+                 *,
+                 directory: str) -> None:
+    shutil.rmtree(group_dir(group_id,
+                            directory=directory),
+                  ignore_errors=True)
+
+
+def column_file_path(group_directory: str,
+                     *,
+                     column_name: str) -> str:
+    return os.path.join(group_directory,
+                        column_name + COLUMNS_FILES_EXTENSION)
+
+
+def write_group(columns_chunks: Iterable[Dict[str, np.ndarray]],
+                *,
+                group_id: uuid.UUID,
+                directory: str,
+                columns_versions: Optional[Dict[str, Any]] = None) -> int:
+    destination_dir = group_dir(group_id,
+                                directory=directory)
+    # group becomes visible to readers only when it is completely written
+    temporary_dir = destination_dir + TEMPORARY_DIRS_EXTENSION
+    os.makedirs(temporary_dir)
+    try:
+        metadata = write_columns(columns_chunks,
+                                 directory=temporary_dir)
+        metadata['columns_versions'] = written_columns_versions(
+                columns_versions or {},
+                columns_dtypes=metadata['columns'])
+        write_metadata(metadata,
+                       group_directory=temporary_dir)
+        os.rename(temporary_dir, destination_dir)
+    except Exception:
+        shutil.rmtree(temporary_dir)
+        raise
+    return metadata['stars_count']
+
+
+def write_group_columns(columns_chunks: Iterable[Dict[str, np.ndarray]],
+                        *,
+                        group_id: uuid.UUID,
+                        directory: str,
+                        columns_versions: Dict[str, Any]) -> None:
+    # adds new columns to existing group or replaces them
+    group_directory = group_dir(group_id,
+                                directory=directory)
+    metadata = read_metadata(group_directory)
+    temporary_dir = tempfile.mkdtemp(suffix=TEMPORARY_DIRS_EXTENSION,
+                                     dir=group_directory)
+    try:
+        columns_metadata = write_columns(columns_chunks,
+                                         directory=temporary_dir)
+        if columns_metadata['stars_count'] != metadata['stars_count']:
+            err_msg = ('Group "{group_id}" has {stars_count} stars, '
+                       'but columns have {columns_stars_count} values.'
+                       .format(group_id=group_id,
+                               stars_count=metadata['stars_count'],
+                               columns_stars_count=(
+                                   columns_metadata['stars_count'])))
+            raise ValueError(err_msg)
+        # mapped files are kept by readers until they are closed,
+        # and metadata is replaced last,
+        # so interrupted rewriting leaves replaced columns outdated
+        for column_name in columns_metadata['columns']:
+            os.replace(column_file_path(temporary_dir,
+                                        column_name=column_name),
+                       column_file_path(group_directory,
+                                        column_name=column_name))
+    finally:
+        shutil.rmtree(temporary_dir)
+    metadata['columns'].update(columns_metadata['columns'])
+    metadata['columns_versions'] = {
+        **metadata.get('columns_versions', {}),
+        **written_columns_versions(
+                columns_versions,
+                columns_dtypes=columns_metadata['columns'])}
+    write_metadata(metadata,
+                   group_directory=group_directory)
+
+
+def written_columns_versions(columns_versions: Dict[str, Any],
+                             *,
+                             columns_dtypes: Dict[str, str]
+                             ) -> Dict[str, Any]:
+    # there are no files for columns of groups without stars
+    return {column_name: version
+            for column_name, version in columns_versions.items()
+            if column_name in columns_dtypes}
+
+
+def write_columns(columns_chunks: Iterable[Dict[str, np.ndarray]],
+                  *,
+                  directory: str) -> Dict[str, Any]:
+    stars_count = 0
+    columns_dtypes = None
+    with ExitStack() as stack:
+        files = {}
+        for columns in columns_chunks:
+            if columns_dtypes is None:
+                columns_dtypes = {column_name: column.dtype.str
+                                  for column_name, column in columns.items()}
+                files = {column_name: stack.enter_context(
+                        open(column_file_path(directory,
+                                              column_name=column_name),
+                             'wb'))
+                         for column_name in columns}
+            for column_name, column in columns.items():
+                # plain arrays without headers can be appended by chunks
+                column.tofile(files[column_name])
+            stars_count += len(next(iter(columns.values()), []))
+    return dict(stars_count=stars_count,
+                columns=columns_dtypes or {})
+
+
+def write_metadata(metadata: Dict[str, Any],
+                   *,
+                   group_directory: str) -> None:
+    metadata_file_path = os.path.join(group_directory, METADATA_FILE_NAME)
+    # metadata is replaced at once,
+    # so readers never get partially written one
+    temporary_file_path = metadata_file_path + TEMPORARY_DIRS_EXTENSION
+    with open(temporary_file_path, 'w') as metadata_file:
+        json.dump(metadata, metadata_file,
+                  indent=2,
+                  sort_keys=True)
+    os.replace(temporary_file_path, metadata_file_path)
+
+
+def read_metadata(group_directory: str) -> Dict[str, Any]:
+    with open(os.path.join(group_directory,
+                           METADATA_FILE_NAME)) as metadata_file:
+        return json.load(metadata_file)
+
+
+def read_columns_names(group_id: uuid.UUID,
+                       *,
+                       directory: str) -> List[str]:
+    return list(read_metadata(group_dir(group_id,
+                                        directory=directory))['columns'])
+
+
+def read_columns_versions(group_id: uuid.UUID,
+                          *,
+                          directory: str) -> Dict[str, Any]:
+    # groups written before versioning have no versioned columns
+    return read_metadata(group_dir(group_id,
+                                   directory=directory)
+                         ).get('columns_versions', {})
+
+
+def read_group(group_id: uuid.UUID,
+               *,
+               directory: str,
+               columns_names: List[str],
+               desired_stars_count: Optional[int] = None,
+               sample_seed: Optional[int] = None) -> pd.DataFrame:
+    columns, indices = group_columns(group_id,
+                                     directory=directory,
+                                     columns_names=columns_names,
+                                     desired_stars_count=desired_stars_count,
+                                     sample_seed=sample_seed)
+    return columns_frame(columns,
+                         indices=indices,
+                         columns_names=columns_names)
+
+
+def read_group_chunks(group_id: uuid.UUID,
+                      *,
+                      directory: str,
+                      columns_names: List[str],
+                      chunk_size: int,
+                      desired_stars_count: Optional[int] = None,
+                      sample_seed: Optional[int] = None
+                      ) -> Iterator[pd.DataFrame]:
+    columns, indices = group_columns(group_id,
+                                     directory=directory,
+                                     columns_names=columns_names,
+                                     desired_stars_count=desired_stars_count,
+                                     sample_seed=sample_seed)
+    if indices is None:
+        stars_count = len(next(iter(columns.values()), []))
+        indices = np.arange(stars_count)
+    # only current chunk of mapped columns is loaded in memory
+    for start in range(0, indices.size, chunk_size):
+        yield columns_frame(columns,
+                            indices=indices[start:start + chunk_size],
+                            columns_names=columns_names)
+
+
+def group_columns(group_id: uuid.UUID,
+                  *,
+                  directory: str,
+                  columns_names: List[str],
+                  desired_stars_count: Optional[int],
+                  sample_seed: Optional[int]
+                  ) -> Tuple[Dict[str, np.ndarray], Optional[np.ndarray]]:
+    group_directory = group_dir(group_id,
+                                directory=directory)
+    metadata = read_metadata(group_directory)
+    stars_count = metadata['stars_count']
+    columns_dtypes = metadata['columns']
+
+    missing_columns_names = [column_name
+                             for column_name in columns_names
+                             if column_name not in columns_dtypes]
+    if missing_columns_names:
+        err_msg = ('Group "{group_id}" has no columns: "{columns_names}".'
+                   .format(group_id=group_id,
+                           columns_names='", "'.join(missing_columns_names)))
+        raise ValueError(err_msg)
+
+    if desired_stars_count and desired_stars_count < stars_count:
+        # the same subset is taken if seed is not given,
+        # like one ordered by sample keys in the database
+        indices = sample_indices(
+                stars_count,
+                size=desired_stars_count,
+                seed=(DEFAULT_SAMPLE_SEED
+                      if sample_seed is None
+                      else sample_seed))
+    else:
+        indices = None
+
+    columns = {}
+    for column_name in columns_names:
+        dtype = np.dtype(columns_dtypes[column_name])
+        if stars_count:
+            # only pages of requested columns are touched
+            columns[column_name] = np.memmap(
+                    column_file_path(group_directory,
+                                     column_name=column_name),
+                    dtype=dtype,
+                    mode='r',
+                    shape=(stars_count,))
+        else:
+            # empty files can't be mapped
+            columns[column_name] = np.empty(0,
+                                            dtype=dtype)
+    return columns, indices
+
+
+def sample_indices(stars_count: int,
+                   *,
+                   size: int,
+                   seed: int) -> np.ndarray:
+    # sorted indices keep reading pages sequentially
+    random_state = np.random.RandomState(seed)
+    if size > stars_count // 2:
+        # excluded stars are fewer, so they are drawn instead
+        mask = np.ones(stars_count,
+                       dtype=np.bool_)
+        mask[unique_random_indices(stars_count,
+                                   size=stars_count - size,
+                                   random_state=random_state)] = False
+        return np.flatnonzero(mask)
+    return unique_random_indices(stars_count,
+                                 size=size,
+                                 random_state=random_state)
+
+
+def unique_random_indices(stars_count: int,
+                          *,
+                          size: int,
+                          random_state: np.random.RandomState
+                          ) -> np.ndarray:
+    # unlike sampling without replacement
+    # doesn't permute all indices, so it takes O(size) time and memory;
+    # random indices are drawn with replacement and duplicates rejected,
+    # more indices are drawn than expected to be rejected,
+    # so it usually takes one round
+    result = np.empty(0,
+                      dtype=np.int64)
+    while result.size < size:
+        missing_count = size - result.size
+        # on average gives missing count of new distinct indices
+        draws_count = -stars_count * np.log1p(
+                -missing_count / (stars_count - result.size))
+        candidates = np.unique(random_state.randint(
+                stars_count,
+                size=int(draws_count * 1.05) + 16))
+        if result.size:
+            candidates = candidates[~np.isin(candidates, result,
+                                             assume_unique=True)]
+        if candidates.size > missing_count:
+            # any subset of distinct random indices is random as well
+            candidates = np.sort(random_state.choice(candidates,
+                                                     size=missing_count,
+                                                     replace=False))
+        result = (np.union1d(result, candidates)
+                  if result.size
+                  else candidates)
+    return result
+
+
+def columns_frame(columns: Dict[str, np.ndarray],
+                  *,
+                  indices: Optional[np.ndarray],
+                  columns_names: List[str]) -> pd.DataFrame:
+    result = {}
+    for column_name in columns_names:
+        column = columns[column_name]
+        if indices is not None:
+            column = column[indices]
+        if column_name == 'galactic_disk_type':
+            column = galactic_disk_types_categorical(column)
+        result[column_name] = column
+    return pd.DataFrame(result,
+                        columns=columns_names)
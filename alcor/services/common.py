@@ -1,4 +1,8 @@
 import logging
+import os
+from typing import (Any,
+                    Dict,
+                    Optional)
 
 from alcor.models import Group
 
@@ -10,13 +14,40 @@ PECULIAR_SOLAR_VELOCITY_U = -11
 PECULIAR_SOLAR_VELOCITY_V = 12
 PECULIAR_SOLAR_VELOCITY_W = 7
 
+# Distance from the Sun to the Galactic center in kpc
+SOLAR_GALACTOCENTRIC_DISTANCE = 8.5
+
 FILTRATION_METHODS = ['raw', 'full', 'restricted']
 
+STARS_LOADERS = ['orm', 'copy']
+
+STARS_STORAGES = ['database', 'files']
+
 
 def group_output_file_name(group: Group,
                            *,
-                           extension='.res',
-                           file_name_length: int = 5) -> str:
-    group_id_str = str(group.id)
-    base_name = group_id_str[:file_name_length]
+                           extension='.res') -> str:
+    # whole identifier is used to avoid collisions
+    # between simultaneously running simulations
+    base_name = group.id.hex
     return ''.join([base_name, extension])
+
+
+def stars_storage_dir(settings: Dict[str, Any]) -> Optional[str]:
+    storage_settings = settings.get('storage', {})
+    storage = storage_settings.get('type', 'database')
+    if storage not in STARS_STORAGES:
+        err_msg = ('Unknown stars storage: "{storage}".'
+                   .format(storage=storage))
+        raise ValueError(err_msg)
+    if storage == 'database':
+        return None
+    return os.path.abspath(storage_settings['path'])
+
+
+def is_compact_stars_storage(settings: Dict[str, Any]) -> bool:
+    return settings.get('storage', {}).get('compact', False)
+
+
+def stores_derived_columns(settings: Dict[str, Any]) -> bool:
+    return settings.get('storage', {}).get('derived_columns', False)
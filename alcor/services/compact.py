@@ -0,0 +1,111 @@
+import logging
+from typing import (Dict,
+                    List)
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.engine import Connectable
+from sqlalchemy.sql.sqltypes import Float
+
+from alcor.models import Star
+from alcor.utils import galactic_disk_types_categorical
+
+logger = logging.getLogger(__name__)
+
+COMPACT_FLOAT_DTYPE = np.float32
+COMPACT_INTEGER_DTYPE = np.int8
+# sample keys stay in double precision to be distinct in large groups
+FLOAT_COLUMNS_NAMES = [column.name
+                       for column in Star.__table__.columns
+                       if isinstance(column.type, Float)
+                       and column is not Star.__table__.c.sample_key]
+# types are named like in information schema
+COMPACT_COLUMNS_SQL_TYPES = {
+    **dict.fromkeys(FLOAT_COLUMNS_NAMES, 'real'),
+    'spectral_type': 'smallint'}
+FULL_COLUMNS_SQL_TYPES = {
+    **dict.fromkeys(FLOAT_COLUMNS_NAMES, 'double precision'),
+    'spectral_type': 'integer'}
+
+
+def set_stars_table_precision(connectable: Connectable,
+                              *,
+                              compact: bool) -> List[str]:
+    # table is altered only if its types differ from requested ones,
+    # since even altering to the same type takes exclusive lock
+    sql_types = (COMPACT_COLUMNS_SQL_TYPES
+                 if compact
+                 else FULL_COLUMNS_SQL_TYPES)
+    columns_types = stars_table_columns_types(connectable)
+    altered_columns_names = sorted(
+            column_name
+            for column_name, sql_type in sql_types.items()
+            if columns_types[column_name] != sql_type)
+    if not altered_columns_names:
+        return []
+
+    # stored values are not converted implicitly,
+    # because conversion to single precision loses them
+    has_stars = connectable.execute(
+            'SELECT EXISTS (SELECT 1 FROM {table})'
+            .format(table=Star.__tablename__)).scalar()
+    if has_stars:
+        err_msg = ('Stars are stored in columns "{columns_names}" '
+                   'of other precision than requested one, '
+                   'so "compact" storage setting should be turned {state}.'
+                   .format(columns_names='", "'.join(altered_columns_names),
+                           state='off' if compact else 'on'))
+        raise ValueError(err_msg)
+
+    alterations = ', '.join(
+            'ALTER COLUMN {column} TYPE {sql_type}'
+            .format(column=column_name,
+                    sql_type=sql_types[column_name])
+            for column_name in altered_columns_names)
+    connectable.execute('ALTER TABLE {table} {alterations}'
+                        .format(table=Star.__tablename__,
+                                alterations=alterations))
+    return altered_columns_names
+
+
+def stars_table_columns_types(connectable: Connectable) -> Dict[str, str]:
+    rows = connectable.execute(
+            'SELECT column_name, data_type '
+            'FROM information_schema.columns '
+            'WHERE table_schema = current_schema() '
+            'AND table_name = %(table)s',
+            dict(table=Star.__tablename__))
+    return {column_name: data_type
+            for column_name, data_type in rows}
+
+
+def compact_stars_columns(columns: Dict[str, np.ndarray]
+                          ) -> Dict[str, np.ndarray]:
+    result = columns.copy()
+    for column_name, column in columns.items():
+        if column.dtype.kind == 'f':
+            result[column_name] = column.astype(COMPACT_FLOAT_DTYPE,
+                                                copy=False)
+    return result
+
+
+def compact_stars_frame(stars: pd.DataFrame) -> pd.DataFrame:
+    columns = {}
+    for column_name, column in stars.items():
+        if column_name == 'galactic_disk_type':
+            if not pd.api.types.is_categorical_dtype(column):
+                column = galactic_disk_types_categorical(
+                        column.values.astype(np.int8))
+        # unlike simulated columns derived ones are kept
+        # in precision they have been computed in
+        elif column_name in COMPACT_COLUMNS_SQL_TYPES:
+            if column.dtype.kind == 'f':
+                column = column.astype(COMPACT_FLOAT_DTYPE,
+                                       copy=False)
+            elif column.dtype.kind in 'iu':
+                column = column.astype(COMPACT_INTEGER_DTYPE,
+                                       copy=False)
+        columns[column_name] = column
+    return pd.DataFrame(columns,
+                        index=stars.index,
+                        columns=stars.columns)
@@ -1,3 +1,7 @@
 from .service import (fetch_all,
                       fetch_group_by_id,
+                      fetch_groups_fingerprints,
                       fetch_last_groups)
+from .partitions import (create_group_partition,
+                         delete_group)
+from .schema import add_missing_columns
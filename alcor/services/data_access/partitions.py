@@ -0,0 +1,82 @@
+import uuid
+
+from sqlalchemy.orm.session import Session
+
+from alcor.models import (Group,
+                          Star)
+from alcor.models.base import Base
+from alcor.models.eliminations import StarsCounter
+from alcor.models.simulation import Parameter
+from alcor.models.statistics import GroupStatistics
+
+GROUPS_PARTITIONED_MODELS = [Star, StarsCounter]
+
+
+def group_partition_name(model: Base,
+                         *,
+                         group_id: uuid.UUID) -> str:
+    return '{table}_{group_id}'.format(table=model.__tablename__,
+                                       group_id=group_id.hex)
+
+
+def is_partitioned(model: Base,
+                   *,
+                   session: Session) -> bool:
+    # tables created before partitioning was introduced are plain ones
+    query = ('SELECT EXISTS (SELECT 1 FROM pg_partitioned_table '
+             'WHERE partrelid = to_regclass(:table_name))')
+    return session.execute(query,
+                           dict(table_name=model.__tablename__)).scalar()
+
+
+def create_group_partition(model: Base,
+                           *,
+                           group_id: uuid.UUID,
+                           session: Session) -> None:
+    if not is_partitioned(model,
+                          session=session):
+        return
+    # identifiers and partition bounds can't be passed as parameters,
+    # values are safe since they come from UUID
+    session.execute('CREATE TABLE IF NOT EXISTS {partition} '
+                    'PARTITION OF {table} '
+                    'FOR VALUES IN (\'{group_id}\')'
+                    .format(partition=group_partition_name(
+                                    model,
+                                    group_id=group_id),
+                            table=model.__tablename__,
+                            group_id=group_id))
+
+
+def drop_group_partition(model: Base,
+                         *,
+                         group_id: uuid.UUID,
+                         session: Session) -> None:
+    if is_partitioned(model,
+                      session=session):
+        session.execute('DROP TABLE IF EXISTS {partition}'
+                        .format(partition=group_partition_name(
+                                model,
+                                group_id=group_id)))
+    else:
+        (session.query(model)
+         .filter(model.group_id == group_id)
+         .delete(synchronize_session=False))
+
+
+def delete_group(group_id: uuid.UUID,
+                 *,
+                 session: Session) -> None:
+    for model in GROUPS_PARTITIONED_MODELS:
+        drop_group_partition(model,
+                             group_id=group_id,
+                             session=session)
+    (session.query(Parameter)
+     .filter(Parameter.group_id == group_id)
+     .delete(synchronize_session=False))
+    (session.query(GroupStatistics)
+     .filter(GroupStatistics.group_id == group_id)
+     .delete(synchronize_session=False))
+    (session.query(Group)
+     .filter(Group.id == group_id)
+     .delete(synchronize_session=False))
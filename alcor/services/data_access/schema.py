@@ -0,0 +1,37 @@
+from typing import List
+
+from sqlalchemy.engine import Connectable
+from sqlalchemy.schema import (Column,
+                               CreateColumn)
+
+from alcor.models import (Group,
+                          Star)
+
+# columns which have been added to existing tables,
+# in order of their introduction
+ADDED_COLUMNS = [Group.__table__.c.fingerprint,
+                 Star.__table__.c.sample_key]
+
+
+def add_missing_columns(connectable: Connectable,
+                        *,
+                        columns: List[Column] = ADDED_COLUMNS) -> None:
+    # existing tables are skipped on schema creation,
+    # so columns which they lack are added along with their indexes
+    dialect = connectable.dialect
+    for column in columns:
+        connectable.execute('ALTER TABLE {table} '
+                            'ADD COLUMN IF NOT EXISTS {column}'
+                            .format(table=column.table.name,
+                                    column=CreateColumn(column).compile(
+                                            dialect=dialect)))
+    indexes = {index
+               for column in columns
+               for index in column.table.indexes
+               if column.name in index.columns}
+    for index in sorted(indexes,
+                        key=lambda index: index.name):
+        exists = connectable.execute('SELECT to_regclass(%(name)s)',
+                                     dict(name=index.name)).scalar()
+        if exists is None:
+            index.create(bind=connectable)
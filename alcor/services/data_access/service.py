@@ -1,5 +1,6 @@
 import uuid
-from typing import List
+from typing import (Set,
+                    List)
 
 from sqlalchemy.orm.session import Session
 
@@ -29,3 +30,10 @@ def fetch_group_by_id(group_id: uuid.UUID,
     query = (session.query(Group)
              .filter(Group.id == group_id))
     return query.one()
+
+
+def fetch_groups_fingerprints(*,
+                              session: Session) -> Set[str]:
+    query = (session.query(Group.fingerprint)
+             .filter(Group.fingerprint.isnot(None)))
+    return {fingerprint for fingerprint, in query}
@@ -0,0 +1,297 @@
+from collections import OrderedDict
+from math import radians
+from typing import (Callable,
+                    Container,
+                    Dict,
+                    Iterable,
+                    List,
+                    NamedTuple,
+                    Tuple)
+
+import numpy as np
+import pandas as pd
+
+from . import binned_statistics
+
+DerivedColumns = NamedTuple('DerivedColumns',
+                            [('names', Tuple[str, ...]),
+                             ('dependencies', Tuple[str, ...]),
+                             ('function', Callable),
+                             ('version', int)])
+
+SOLAR_ABSOLUTE_BOLOMETRIC_MAGNITUDE = 4.75
+# bins of luminosity function and velocities vs magnitude plots
+MIN_BOLOMETRIC_MAGNITUDE = 6.
+BOLOMETRIC_MAGNITUDE_BIN_SIZE = 0.5
+DEC_GPOLE = radians(27.128336)
+RA_GPOLE = radians(192.859508)
+AUX_ANGLE = radians(122.932)
+
+# derived columns by their names,
+# columns computed together share the same entry
+REGISTRY = {}
+
+# flags of coordinates with the highest absolute value
+X_AXIS = 1
+Y_AXIS = 2
+Z_AXIS = 4
+
+# columns which are expensive to compute on every plotting,
+# so they can be stored along with simulated ones
+PERSISTED_COLUMNS_NAMES = ['bolometric_magnitude_bin_index',
+                           'v_apparent_magnitude',
+                           'g_apparent_magnitude',
+                           'z_apparent_magnitude',
+                           'reduced_proper_motion',
+                           'dominant_axes']
+
+
+def register(*names: str,
+             dependencies: Iterable[str],
+             function: Callable,
+             version: int = 1) -> None:
+    # version should be increased on every change of function,
+    # so stored values become outdated
+    derived_columns = DerivedColumns(names=names,
+                                     dependencies=tuple(dependencies),
+                                     function=function,
+                                     version=version)
+    for name in names:
+        if name in REGISTRY:
+            err_msg = ('Derived column "{name}" is already registered.'
+                       .format(name=name))
+            raise ValueError(err_msg)
+        REGISTRY[name] = derived_columns
+
+
+def column(stars: pd.DataFrame,
+           name: str) -> pd.Series:
+    # derived values are stored in the frame itself,
+    # so they are computed at most once per frame
+    # and frames of filtered stars keep them
+    if name not in stars.columns:
+        derive(stars, REGISTRY[name])
+    return stars[name]
+
+
+def derive(stars: pd.DataFrame,
+           derived_columns: DerivedColumns) -> None:
+    values = derived_columns.function(*[
+        column(stars, dependency)
+        for dependency in derived_columns.dependencies])
+    if len(derived_columns.names) == 1:
+        values = [values]
+    for name, name_values in zip(derived_columns.names, values):
+        # unlike item assignment doesn't warn
+        # about frames of filtered stars being copies
+        stars.insert(len(stars.columns), name, name_values)
+
+
+def base_columns(names: Iterable[str],
+                 *,
+                 stored: Container[str] = ()) -> List[str]:
+    # stored columns required to compute given ones,
+    # in order of their first appearance
+    result = OrderedDict()
+    for name in names:
+        if name in stored or name not in REGISTRY:
+            result[name] = None
+            continue
+        result.update(OrderedDict.fromkeys(
+                base_columns(REGISTRY[name].dependencies,
+                             stored=stored)))
+    return list(result)
+
+
+def versions(name: str) -> Dict[str, int]:
+    # stored values are outdated
+    # if function of any derived column they depend on has changed
+    result = {name: REGISTRY[name].version}
+    for dependency in REGISTRY[name].dependencies:
+        if dependency in REGISTRY:
+            result.update(versions(dependency))
+    return result
+
+
+def persisted_columns_names(columns_names: Iterable[str]) -> List[str]:
+    columns_names = set(columns_names)
+    return [name
+            for name in PERSISTED_COLUMNS_NAMES
+            if columns_names.issuperset(base_columns([name]))]
+
+
+def up_to_date_columns_names(columns_versions: Dict[str, Dict[str, int]]
+                             ) -> List[str]:
+    return [name
+            for name, name_versions in columns_versions.items()
+            if name in REGISTRY and name_versions == versions(name)]
+
+
+def derived_columns_values(columns: Dict[str, np.ndarray],
+                           *,
+                           columns_names: List[str]
+                           ) -> Dict[str, np.ndarray]:
+    stars = pd.DataFrame({name: columns[name]
+                          for name in base_columns(columns_names)})
+    return {name: column(stars, name).values
+            for name in columns_names}
+
+
+def float64(values: pd.Series) -> pd.Series:
+    # compact stars are stored in single precision,
+    # but criteria are computed in double one to keep the same results
+    return values.astype(np.float64,
+                         copy=False)
+
+
+def bolometric_magnitude(luminosities: pd.Series) -> pd.Series:
+    # More info at
+    # https://en.wikipedia.org/wiki/Absolute_magnitude#Bolometric_magnitude
+    return 2.5 * float64(luminosities) + SOLAR_ABSOLUTE_BOLOMETRIC_MAGNITUDE
+
+
+def bolometric_magnitude_bin_index(bolometric_magnitudes: pd.Series
+                                   ) -> pd.Series:
+    bolometric_index = binned_statistics.bolometric_indexer(
+            min_magnitude=MIN_BOLOMETRIC_MAGNITUDE,
+            stars_bin_size=BOLOMETRIC_MAGNITUDE_BIN_SIZE)
+    return bolometric_index(bolometric_magnitudes)
+
+
+def parallax(distances_kpc: pd.Series) -> pd.Series:
+    distances_in_pc = float64(distances_kpc) * 1e3
+    return 1 / distances_in_pc
+
+
+def apparent_magnitude(abs_magnitudes: pd.Series,
+                       distances_kpc: pd.Series) -> pd.Series:
+    # More info at (2nd formula, + 3.0 because the distance is in kpc):
+    # https://en.wikipedia.org/wiki/Absolute_magnitude#Apparent_magnitude
+    return (float64(abs_magnitudes) - 5.
+            + 5. * (np.log10(float64(distances_kpc)) + 3.))
+
+
+# Transformation from UBVRI to ugriz. More info at:
+# Jordi, Grebel & Ammon, 2006, A&A, 460; equations 1-8 and Table 3
+def g_ugriz_abs_magnitude(b_abs_magnitudes: pd.Series,
+                          v_abs_magnitudes: pd.Series) -> pd.Series:
+    v_abs_magnitudes = float64(v_abs_magnitudes)
+    return (v_abs_magnitudes - 0.124
+            + 0.63 * (float64(b_abs_magnitudes) - v_abs_magnitudes))
+
+
+def z_ugriz_abs_magnitude(g_ugriz_abs_magnitudes: pd.Series,
+                          v_abs_magnitudes: pd.Series,
+                          r_abs_magnitudes: pd.Series,
+                          i_abs_magnitudes: pd.Series) -> pd.Series:
+    r_abs_magnitudes = float64(r_abs_magnitudes)
+    return (g_ugriz_abs_magnitudes
+            - 1.646 * (float64(v_abs_magnitudes) - r_abs_magnitudes)
+            - 1.584 * (r_abs_magnitudes - float64(i_abs_magnitudes))
+            + 0.525)
+
+
+def reduced_proper_motion(g_apparent_magnitudes: pd.Series,
+                          proper_motions: pd.Series) -> pd.Series:
+    # TODO: find out the meaning and check if the last 5 is correct
+    return (g_apparent_magnitudes
+            + 5. * np.log10(float64(proper_motions)) + 5.)
+
+
+def dominant_axes(x_coordinates: pd.Series,
+                  y_coordinates: pd.Series,
+                  z_coordinates: pd.Series) -> pd.Series:
+    # unlike reduction of stacked series doesn't convert them to objects
+    highest_coordinates = np.maximum(np.maximum(np.abs(x_coordinates.values),
+                                                np.abs(y_coordinates.values)),
+                                     np.abs(z_coordinates.values))
+    # like coordinates comparison
+    # flags are not set for negative highest coordinate
+    # and several flags are set for equal ones
+    return ((highest_coordinates == x_coordinates) * X_AXIS
+            + (highest_coordinates == y_coordinates) * Y_AXIS
+            + (highest_coordinates == z_coordinates) * Z_AXIS
+            ).astype(np.int8)
+
+
+def to_cartesian_from_equatorial(right_ascensions: pd.Series,
+                                 declinations: pd.Series,
+                                 distances: pd.Series) -> Tuple[pd.Series,
+                                                                pd.Series,
+                                                                pd.Series]:
+    latitudes = (np.arcsin(np.cos(declinations) * np.cos(DEC_GPOLE)
+                           * np.cos(right_ascensions - RA_GPOLE)
+                           + np.sin(declinations) * np.sin(DEC_GPOLE)))
+    x = np.sin(declinations) - np.sin(latitudes) * np.sin(DEC_GPOLE)
+    y = (np.cos(declinations)
+         * np.sin(right_ascensions - RA_GPOLE) * np.cos(DEC_GPOLE))
+    longitudes = np.arctan(x / y) + AUX_ANGLE - np.pi / 2.
+    longitudes[((x > 0.) & (y < 0.)) | ((x <= 0.) & (y <= 0.))] += np.pi
+
+    x_coordinates = distances * np.cos(latitudes) * np.cos(longitudes)
+    y_coordinates = distances * np.cos(latitudes) * np.sin(longitudes)
+    z_coordinates = distances * np.sin(latitudes)
+    return x_coordinates, y_coordinates, z_coordinates
+
+
+def ugriz_gr(v_abs_magnitudes: pd.Series,
+             r_abs_magnitudes: pd.Series) -> pd.Series:
+    return 1.646 * (v_abs_magnitudes - r_abs_magnitudes) - 0.139
+
+
+def ugriz_ri(r_abs_magnitudes: pd.Series,
+             i_abs_magnitudes: pd.Series) -> pd.Series:
+    return 1.007 * (r_abs_magnitudes - i_abs_magnitudes) - 0.236
+
+
+def ugriz_iz(r_abs_magnitudes: pd.Series,
+             i_abs_magnitudes: pd.Series) -> pd.Series:
+    return 0.577 * (r_abs_magnitudes - i_abs_magnitudes) - 0.15
+
+
+register('bolometric_magnitude',
+         dependencies=['luminosity'],
+         function=bolometric_magnitude)
+register('bolometric_magnitude_bin_index',
+         dependencies=['bolometric_magnitude'],
+         function=bolometric_magnitude_bin_index)
+register('parallax',
+         dependencies=['distance'],
+         function=parallax)
+register('v_apparent_magnitude',
+         dependencies=['v_abs_magnitude', 'distance'],
+         function=apparent_magnitude)
+register('g_ugriz_abs_magnitude',
+         dependencies=['b_abs_magnitude', 'v_abs_magnitude'],
+         function=g_ugriz_abs_magnitude)
+register('z_ugriz_abs_magnitude',
+         dependencies=['g_ugriz_abs_magnitude', 'v_abs_magnitude',
+                       'r_abs_magnitude', 'i_abs_magnitude'],
+         function=z_ugriz_abs_magnitude)
+register('g_apparent_magnitude',
+         dependencies=['g_ugriz_abs_magnitude', 'distance'],
+         function=apparent_magnitude)
+register('z_apparent_magnitude',
+         dependencies=['z_ugriz_abs_magnitude', 'distance'],
+         function=apparent_magnitude)
+register('reduced_proper_motion',
+         dependencies=['g_apparent_magnitude', 'proper_motion'],
+         function=reduced_proper_motion)
+register('ugriz_gr',
+         dependencies=['v_abs_magnitude', 'r_abs_magnitude'],
+         function=ugriz_gr)
+register('ugriz_ri',
+         dependencies=['r_abs_magnitude', 'i_abs_magnitude'],
+         function=ugriz_ri)
+register('ugriz_iz',
+         dependencies=['r_abs_magnitude', 'i_abs_magnitude'],
+         function=ugriz_iz)
+register('galactic_x_coordinate',
+         'galactic_y_coordinate',
+         'galactic_z_coordinate',
+         dependencies=['right_ascension', 'declination', 'distance'],
+         function=to_cartesian_from_equatorial)
+register('dominant_axes',
+         dependencies=['galactic_x_coordinate', 'galactic_y_coordinate',
+                       'galactic_z_coordinate'],
+         function=dominant_axes)
@@ -0,0 +1,136 @@
+from collections import Counter
+from functools import partial
+from typing import (Callable,
+                    Dict,
+                    List,
+                    Tuple)
+
+import numpy as np
+import pandas as pd
+
+from . import derived_columns
+
+MIN_PARALLAX = 0.025
+MIN_DECLINATION = 0.
+MAX_VELOCITY = 500.
+MIN_PROPER_MOTION = 0.04
+MAX_V_APPARENT_MAGNITUDE = 19.
+
+
+def by_parallax(stars: pd.DataFrame,
+                *,
+                min_parallax: float) -> pd.Series:
+    parallaxes = derived_columns.column(stars, 'parallax')
+    return parallaxes > min_parallax
+
+
+def by_declination(stars: pd.DataFrame,
+                   *,
+                   min_declination: float) -> pd.Series:
+    return stars['declination'] > min_declination
+
+
+def by_velocity(stars: pd.DataFrame,
+                *,
+                max_velocity: float) -> pd.Series:
+    return (np.power(derived_columns.float64(stars['u_velocity']), 2)
+            + np.power(derived_columns.float64(stars['v_velocity']), 2)
+            + np.power(derived_columns.float64(stars['w_velocity']), 2)
+            < max_velocity ** 2)
+
+
+def by_proper_motion(stars: pd.DataFrame,
+                     *,
+                     min_proper_motion: float) -> pd.Series:
+    return stars['proper_motion'] > min_proper_motion
+
+
+# TODO: find out what is going on here
+def by_reduced_proper_motion(stars: pd.DataFrame) -> pd.Series:
+    g_apparent_magnitudes = derived_columns.column(stars,
+                                                   'g_apparent_magnitude')
+    z_apparent_magnitudes = derived_columns.column(stars,
+                                                   'z_apparent_magnitude')
+    hrms = derived_columns.column(stars, 'reduced_proper_motion')
+    return (((g_apparent_magnitudes - z_apparent_magnitudes > -0.33)
+             | (hrms > 14.))
+            & (hrms > 15.17 + 3.559 * (g_apparent_magnitudes
+                                       - z_apparent_magnitudes)))
+
+
+def by_apparent_magnitude(stars: pd.DataFrame,
+                          *,
+                          max_v_apparent_magnitude: float) -> pd.Series:
+    v_apparent_magnitudes = derived_columns.column(stars,
+                                                   'v_apparent_magnitude')
+    return v_apparent_magnitudes <= max_v_apparent_magnitude
+
+
+def stars_filtration_functions(*,
+                               method: str,
+                               min_parallax: float = MIN_PARALLAX,
+                               min_declination: float = MIN_DECLINATION,
+                               max_velocity: float = MAX_VELOCITY,
+                               min_proper_motion: float = MIN_PROPER_MOTION,
+                               max_v_apparent_magnitude: float =
+                               MAX_V_APPARENT_MAGNITUDE
+                               ) -> Dict[str, Callable]:
+    result = {}
+    # TODO: fix geometry of a simulated region so that we don't need to use
+    # the 'full' filtration method
+    if method != 'raw':
+        result['by_parallax'] = partial(by_parallax,
+                                        min_parallax=min_parallax)
+        result['by_declination'] = partial(by_declination,
+                                           min_declination=min_declination)
+        result['by_velocity'] = partial(by_velocity,
+                                        max_velocity=max_velocity)
+
+    if method == 'restricted':
+        result['by_proper_motion'] = partial(
+                by_proper_motion,
+                min_proper_motion=min_proper_motion)
+        result['by_reduced_proper_motion'] = by_reduced_proper_motion
+        result['by_apparent_magnitude'] = partial(
+                by_apparent_magnitude,
+                max_v_apparent_magnitude=max_v_apparent_magnitude)
+
+    return result
+
+
+def filtration_columns_names(method: str) -> List[str]:
+    result = []
+    if method != 'raw':
+        result += ['parallax',
+                   'declination',
+                   'u_velocity',
+                   'v_velocity',
+                   'w_velocity']
+    if method == 'restricted':
+        result += ['proper_motion',
+                   'g_apparent_magnitude',
+                   'z_apparent_magnitude',
+                   'reduced_proper_motion',
+                   'v_apparent_magnitude']
+    return result
+
+
+def stars_filtration_mask(stars: pd.DataFrame,
+                          *,
+                          filtration_functions: Dict[str, Callable]
+                          ) -> Tuple[Counter, np.ndarray]:
+    eliminations_counter = Counter(raw=stars.shape[0])
+    mask = np.ones(stars.shape[0],
+                   dtype=np.bool_)
+    stars_count = stars.shape[0]
+    # criteria are evaluated for every star, so undefined values
+    # can appear for stars which would be eliminated by previous ones
+    with np.errstate(divide='ignore',
+                     invalid='ignore'):
+        for criterion, filtration_function in filtration_functions.items():
+            mask &= np.asarray(filtration_function(stars))
+            remaining_stars_count = np.count_nonzero(mask)
+            eliminations_counter[criterion] = (stars_count
+                                               - remaining_stars_count)
+            stars_count = remaining_stars_count
+    return eliminations_counter, mask
@@ -1 +1,4 @@
-from .service import draw
+from .service import (draw,
+                      draw_groups,
+                      group_output_dir,
+                      update_derived_columns)
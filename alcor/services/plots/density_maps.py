@@ -0,0 +1,92 @@
+from typing import (List,
+                    Optional,
+                    Tuple)
+
+from matplotlib.axes import Axes
+from matplotlib.colors import to_rgb
+import numpy as np
+
+from alcor.services import binned_statistics
+
+
+def draw(subplot: Axes,
+         *,
+         x: np.ndarray,
+         y: np.ndarray,
+         color: str,
+         xlim: Optional[Tuple[float, float]] = None,
+         ylim: Optional[Tuple[float, float]] = None,
+         bins_count: int = 512) -> None:
+    draw_categories(subplot,
+                    xs=[x],
+                    ys=[y],
+                    colors=[color],
+                    xlim=xlim,
+                    ylim=ylim,
+                    bins_count=bins_count)
+
+
+def draw_categories(subplot: Axes,
+                    *,
+                    xs: List[np.ndarray],
+                    ys: List[np.ndarray],
+                    colors: List[str],
+                    xlim: Optional[Tuple[float, float]] = None,
+                    ylim: Optional[Tuple[float, float]] = None,
+                    bins_count: int = 512,
+                    min_opacity: float = 0.25) -> None:
+    # points are aggregated into image of fixed resolution,
+    # so drawing time and file size don't depend on points count
+    xs = [np.asarray(x, dtype=np.float64) for x in xs]
+    ys = [np.asarray(y, dtype=np.float64) for y in ys]
+    if xlim is None:
+        xlim = finite_range(xs)
+    if ylim is None:
+        ylim = finite_range(ys)
+    if xlim is None or ylim is None:
+        return
+
+    # rows of image correspond to y values
+    counts = np.stack([binned_statistics.histogram2d(x, y,
+                                                     x_limits=xlim,
+                                                     y_limits=ylim,
+                                                     bins_count=bins_count).T
+                       for x, y in zip(xs, ys)])
+    total_counts = counts.sum(axis=0)
+    max_count = total_counts.max()
+    if not max_count:
+        return
+
+    # each pixel is colored by mix of its categories colors
+    colors_rgb = np.array([to_rgb(color) for color in colors])
+    with np.errstate(divide='ignore',
+                     invalid='ignore'):
+        pixels_rgb = (np.tensordot(counts, colors_rgb,
+                                   axes=(0, 0))
+                      / total_counts[..., np.newaxis])
+    # logarithmic scale keeps single points visible near dense regions
+    opacities = np.where(total_counts > 0,
+                         min_opacity
+                         + (1. - min_opacity) * np.log1p(total_counts)
+                         / np.log1p(max_count),
+                         0.)
+    image = np.dstack([np.nan_to_num(pixels_rgb), opacities])
+
+    extent = [xlim[0], xlim[1],
+              ylim[0], ylim[1]]
+    subplot.imshow(X=image,
+                   extent=extent,
+                   origin='lower',
+                   interpolation='nearest',
+                   aspect='auto')
+
+
+def finite_range(values: List[np.ndarray]) -> Optional[Tuple[float, float]]:
+    values = np.concatenate(values)
+    values = values[np.isfinite(values)]
+    if not values.size:
+        return None
+    start, stop = values.min(), values.max()
+    if start == stop:
+        return start - 0.5, stop + 0.5
+    return start, stop
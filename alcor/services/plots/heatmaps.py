@@ -1,26 +1,37 @@
 import logging
-from typing import (Tuple,
-                    List)
-
-import matplotlib
-
-# More info at
-#  http://matplotlib.org/faq/usage_faq.html#what-is-a-backend for details
-# TODO: use this: https://stackoverflow.com/a/37605654/7851470
-matplotlib.use('Agg')
+from functools import partial
+from typing import (Dict,
+                    List,
+                    NamedTuple,
+                    Optional,
+                    Tuple)
 
 from matplotlib import cm
-from matplotlib import pyplot as plt
 from matplotlib.colors import Colormap
 import numpy as np
 import pandas as pd
 
 from alcor.services.common import (PECULIAR_SOLAR_VELOCITY_U,
                                    PECULIAR_SOLAR_VELOCITY_V,
-                                   PECULIAR_SOLAR_VELOCITY_W)
+                                   PECULIAR_SOLAR_VELOCITY_W,
+                                   SOLAR_GALACTOCENTRIC_DISTANCE)
+from alcor.services import (binned_statistics,
+                            derived_columns)
+from . import output
+from .utils import new_figure
 
 logger = logging.getLogger(__name__)
 
+# histograms of streamed stars can't be fitted to their velocities,
+# so they have fixed range wide enough for halo stars
+VELOCITIES_LIMITS = (-500., 500.)
+VELOCITIES_BINS_COUNT = 150
+COORDINATES_BINS_COUNT = 150
+
+VelocitiesCube = NamedTuple('VelocitiesCube',
+                            [('counts', np.ndarray),
+                             ('edges', np.ndarray)])
+
 
 def plot(stars: pd.DataFrame,
          *,
@@ -28,63 +39,222 @@ def plot(stars: pd.DataFrame,
          uv_filename: str = 'heatmap_uv.ps',
          uw_filename: str = 'heatmap_uw.ps',
          vw_filename: str = 'heatmap_vw.ps',
+         cube_filename: Optional[str] = None,
+         xy_filename: str = 'heatmap_xy.ps',
+         rz_filename: str = 'heatmap_rz.ps',
+         dpi: Optional[float] = None,
+         limits: Tuple[float, float] = VELOCITIES_LIMITS,
+         bins_count: int = VELOCITIES_BINS_COUNT,
+         radius: Optional[float] = None,
          u_label: str = '$U(km/s)$',
          v_label: str = '$V(km/s)$',
          w_label: str = '$W(km/s)$') -> None:
-    # TODO: add coordinates
+    if axes == 'coordinates':
+        if radius is None:
+            raise ValueError('Coordinates heatmaps need radius '
+                             'of simulated sphere.')
+        plot_coordinates_histograms(
+                coordinates_histograms(stars,
+                                       radius=radius),
+                radius=radius,
+                xy_filename=xy_filename,
+                rz_filename=rz_filename,
+                dpi=dpi)
+        return
     if axes != 'velocities':
         return
 
-    # TODO: add choosing frame: relative to Sun/LSR. Now it's rel. to LSR
-    stars['u_velocity'] += PECULIAR_SOLAR_VELOCITY_U
-    stars['v_velocity'] += PECULIAR_SOLAR_VELOCITY_V
-    stars['w_velocity'] += PECULIAR_SOLAR_VELOCITY_W
+    cube = velocities_cube(stars,
+                           limits=limits,
+                           bins_count=bins_count)
+    if cube_filename is not None:
+        save_cube(cube, cube_filename)
+
+    plot_cube(cube,
+              uv_filename=uv_filename,
+              uw_filename=uw_filename,
+              vw_filename=vw_filename,
+              dpi=dpi,
+              u_label=u_label,
+              v_label=v_label,
+              w_label=w_label)
 
+
+def plot_cube(cube: VelocitiesCube,
+              *,
+              uv_filename: str = 'heatmap_uv.ps',
+              uw_filename: str = 'heatmap_uw.ps',
+              vw_filename: str = 'heatmap_vw.ps',
+              dpi: Optional[float] = None,
+              u_label: str = '$U(km/s)$',
+              v_label: str = '$V(km/s)$',
+              w_label: str = '$W(km/s)$') -> None:
+    histograms = cube_projections(cube)
     # TODO: add option of plotting 3 heatmaps in one fig. at the same time
-    draw_plot(xlabel=u_label,
-              ylabel=v_label,
-              xdata=stars['u_velocity'],
-              ydata=stars['v_velocity'],
-              filename=uv_filename)
-    draw_plot(xlabel=u_label,
-              ylabel=w_label,
-              xdata=stars['u_velocity'],
-              ydata=stars['w_velocity'],
-              filename=uw_filename)
-    draw_plot(xlabel=v_label,
-              ylabel=w_label,
-              xdata=stars['v_velocity'],
-              ydata=stars['w_velocity'],
-              filename=vw_filename)
-
-
-def draw_plot(*,
-              xlabel: str,
-              ylabel: str,
-              xdata: List[float],
-              ydata: List[float],
-              filename: str,
-              figure_size: Tuple[float, float] = (8, 8),
-              ratio: float = 10 / 13,
-              spacing: float = 0.25,
-              figure_grid_height_ratios: List[float] = None,
-              bins_count: int = 150,
-              vmin: float = 0.01) -> None:
+    draw_heatmap(xlabel=u_label,
+                 ylabel=v_label,
+                 heatmap=histograms['uv'],
+                 xedges=cube.edges,
+                 yedges=cube.edges,
+                 filename=uv_filename,
+                 dpi=dpi)
+    draw_heatmap(xlabel=u_label,
+                 ylabel=w_label,
+                 heatmap=histograms['uw'],
+                 xedges=cube.edges,
+                 yedges=cube.edges,
+                 filename=uw_filename,
+                 dpi=dpi)
+    draw_heatmap(xlabel=v_label,
+                 ylabel=w_label,
+                 heatmap=histograms['vw'],
+                 xedges=cube.edges,
+                 yedges=cube.edges,
+                 filename=vw_filename,
+                 dpi=dpi)
+
+
+def plot_coordinates_histograms(histograms: Dict[str, np.ndarray],
+                                *,
+                                radius: float,
+                                xy_filename: str = 'heatmap_xy.ps',
+                                rz_filename: str = 'heatmap_rz.ps',
+                                dpi: Optional[float] = None,
+                                x_label: str = '$X(kpc)$',
+                                y_label: str = '$Y(kpc)$',
+                                r_label: str = '$R(kpc)$',
+                                z_label: str = '$Z(kpc)$') -> None:
+    bins_count = histograms['xy'].shape[0]
+    edges = np.linspace(-radius, radius,
+                        num=bins_count + 1)
+    draw_heatmap(xlabel=x_label,
+                 ylabel=y_label,
+                 heatmap=histograms['xy'],
+                 xedges=edges,
+                 yedges=edges,
+                 filename=xy_filename,
+                 dpi=dpi)
+    draw_heatmap(xlabel=r_label,
+                 ylabel=z_label,
+                 heatmap=histograms['rz'],
+                 xedges=edges + SOLAR_GALACTOCENTRIC_DISTANCE,
+                 yedges=edges,
+                 filename=rz_filename,
+                 dpi=dpi)
+
+
+def coordinates_histograms(stars: pd.DataFrame,
+                           *,
+                           radius: float,
+                           bins_count: int = COORDINATES_BINS_COUNT
+                           ) -> Dict[str, np.ndarray]:
+    # edges are fixed by radius of simulated sphere,
+    # so histograms can be summed up over chunks of stars
+    x_coordinates = derived_columns.column(stars, 'galactic_x_coordinate')
+    y_coordinates = derived_columns.column(stars, 'galactic_y_coordinate')
+    limits = (-radius, radius)
+    histogram = partial(binned_statistics.histogram2d,
+                        bins_count=bins_count)
+    return dict(xy=histogram(x_coordinates.values,
+                             y_coordinates.values,
+                             x_limits=limits,
+                             y_limits=limits),
+                rz=histogram(stars['r_galactocentric'].values,
+                             stars['z_coordinate'].values,
+                             x_limits=(SOLAR_GALACTOCENTRIC_DISTANCE - radius,
+                                       SOLAR_GALACTOCENTRIC_DISTANCE + radius),
+                             y_limits=limits))
+
+
+def velocities_cube(stars: pd.DataFrame,
+                    *,
+                    limits: Tuple[float, float] = VELOCITIES_LIMITS,
+                    bins_count: int = VELOCITIES_BINS_COUNT
+                    ) -> VelocitiesCube:
+    # edges don't depend on stars,
+    # so cubes of chunks of stars or of different groups
+    # can be summed up or subtracted
+    # TODO: add choosing frame: relative to Sun/LSR. Now it's rel. to LSR
+    # stars are shared with other plots, so they should stay unchanged
+    u_velocities = (stars['u_velocity'].values.astype(np.float64)
+                    + PECULIAR_SOLAR_VELOCITY_U)
+    v_velocities = (stars['v_velocity'].values.astype(np.float64)
+                    + PECULIAR_SOLAR_VELOCITY_V)
+    w_velocities = (stars['w_velocity'].values.astype(np.float64)
+                    + PECULIAR_SOLAR_VELOCITY_W)
+    bins_index = partial(binned_statistics.uniform_bins_indexes,
+                         limits=limits,
+                         bins_count=bins_count)
+    u_indexes = bins_index(u_velocities)
+    v_indexes = bins_index(v_velocities)
+    w_indexes = bins_index(w_velocities)
+    in_range = partial(binned_statistics.in_range_mask,
+                       bins_count=bins_count)
+    mask = in_range(u_indexes) & in_range(v_indexes) & in_range(w_indexes)
+    shape = (bins_count,) * 3
+    flat_indexes = np.ravel_multi_index((u_indexes[mask],
+                                         v_indexes[mask],
+                                         w_indexes[mask]),
+                                        dims=shape)
+    counts = (np.bincount(flat_indexes,
+                          minlength=bins_count ** 3)
+              .reshape(shape))
+    return VelocitiesCube(counts=counts,
+                          edges=velocities_edges(limits=limits,
+                                                 bins_count=bins_count))
+
+
+def velocities_edges(*,
+                     limits: Tuple[float, float] = VELOCITIES_LIMITS,
+                     bins_count: int = VELOCITIES_BINS_COUNT) -> np.ndarray:
+    return np.linspace(*limits,
+                       num=bins_count + 1)
+
+
+def cube_projections(cube: VelocitiesCube) -> Dict[str, np.ndarray]:
+    return dict(uv=cube.counts.sum(axis=2),
+                uw=cube.counts.sum(axis=1),
+                vw=cube.counts.sum(axis=0))
+
+
+def save_cube(cube: VelocitiesCube,
+              filename: str) -> None:
+    np.savez_compressed(filename,
+                        counts=cube.counts,
+                        edges=cube.edges)
+
+
+def load_cube(filename: str) -> VelocitiesCube:
+    with np.load(filename) as file:
+        return VelocitiesCube(counts=file['counts'],
+                              edges=file['edges'])
+
+
+def draw_heatmap(*,
+                 xlabel: str,
+                 ylabel: str,
+                 heatmap: np.ndarray,
+                 xedges: np.ndarray,
+                 yedges: np.ndarray,
+                 filename: str,
+                 dpi: Optional[float] = None,
+                 figure_size: Tuple[float, float] = (8, 8),
+                 ratio: float = 10 / 13,
+                 spacing: float = 0.25,
+                 figure_grid_height_ratios: List[float] = None,
+                 vmin: float = 0.01) -> None:
     if figure_grid_height_ratios is None:
         figure_grid_height_ratios = [0.05, 1]
 
-    figure, (colorbar, subplot) = plt.subplots(
+    figure = new_figure(figsize=figure_size)
+    colorbar, subplot = figure.subplots(
             nrows=2,
-            figsize=figure_size,
             gridspec_kw={'height_ratios': figure_grid_height_ratios})
 
     # TODO: add sliders
     subplot.set(xlabel=xlabel,
                 ylabel=ylabel)
 
-    heatmap, xedges, yedges = np.histogram2d(x=xdata,
-                                             y=ydata,
-                                             bins=bins_count)
     extent = [xedges[0], xedges[-1],
               yedges[0], yedges[-1]]
 
@@ -96,7 +266,7 @@ def draw_plot(*,
                                   extent=extent,
                                   origin='lower')
 
-    plt.minorticks_on()
+    subplot.minorticks_on()
 
     subplot.xaxis.set_ticks_position('both')
     subplot.yaxis.set_ticks_position('both')
@@ -109,7 +279,8 @@ def draw_plot(*,
 
     figure.subplots_adjust(hspace=spacing)
 
-    plt.savefig(filename)
+    output.save(figure, filename,
+                dpi=dpi)
 
 
 def colormap_by_name(name: str,
@@ -1,19 +1,15 @@
 from functools import partial
-from typing import Tuple
+from typing import (Optional,
+                    Tuple)
 
-import matplotlib
-
-# More info at
-# http://matplotlib.org/faq/usage_faq.html#what-is-a-backend for details
-# TODO: use this: https://stackoverflow.com/a/37605654/7851470
-matplotlib.use('Agg')
-from matplotlib import pyplot as plt
 import numpy as np
 import pandas as pd
 
-from .utils import (bolometric_indexer,
-                    bolometric_magnitude,
-                    nan_array)
+from alcor.services import (binned_statistics,
+                            statistics)
+from . import output
+from .utils import (nan_array,
+                    new_figure)
 
 OBSERVATIONAL_STARS_COUNTS = np.array(
         [3, 4, 5, 7, 12, 17, 17, 12, 20, 19, 37, 42, 52, 72, 96, 62, 20, 3, 1])
@@ -33,6 +29,7 @@ def plot(stars: pd.DataFrame,
          # and don't lie in problematic regions
          trusted_bins: frozenset = frozenset([15, 16, 17]),
          filename: str = 'luminosity_function.ps',
+         dpi: Optional[float] = None,
          figure_size: Tuple[float, float] = (7, 7),
          ratio: float = 10 / 13,
          xlabel: str = '$M_{bol}$',
@@ -43,7 +40,54 @@ def plot(stars: pd.DataFrame,
          marker: str = 's',
          capsize: float = 5,
          observational_line_color: str = 'r') -> None:
-    bolometric_index = bolometric_indexer(
+    plot_stars_counts(
+            statistics.stars_bins_counts(
+                    stars,
+                    min_bolometric_magnitude=min_bolometric_magnitude,
+                    max_bolometric_magnitude=max_bolometric_magnitude,
+                    bin_size=bin_size),
+            min_bolometric_magnitude=min_bolometric_magnitude,
+            max_bolometric_magnitude=max_bolometric_magnitude,
+            bin_size=bin_size,
+            min_observed_magnitude=min_observed_magnitude,
+            observed_stars_counts=observed_stars_counts,
+            trusted_bins=trusted_bins,
+            filename=filename,
+            dpi=dpi,
+            figure_size=figure_size,
+            ratio=ratio,
+            xlabel=xlabel,
+            ylabel=ylabel,
+            xlimits=xlimits,
+            ylimits=ylimits,
+            line_color=line_color,
+            marker=marker,
+            capsize=capsize,
+            observational_line_color=observational_line_color)
+
+
+def plot_stars_counts(actual_stars_counts: np.ndarray,
+                      *,
+                      min_bolometric_magnitude: float = 6.,
+                      max_bolometric_magnitude: float = 21.,
+                      bin_size: float = 0.5,
+                      min_observed_magnitude: float = 7.75,
+                      observed_stars_counts: np.ndarray =
+                      OBSERVATIONAL_STARS_COUNTS,
+                      trusted_bins: frozenset = frozenset([15, 16, 17]),
+                      filename: str = 'luminosity_function.ps',
+                      dpi: Optional[float] = None,
+                      figure_size: Tuple[float, float] = (7, 7),
+                      ratio: float = 10 / 13,
+                      xlabel: str = '$M_{bol}$',
+                      ylabel: str = '$\log N (pc^{-3}M_{bol}^{-1})$',
+                      xlimits: Tuple[float, float] = (7, 19),
+                      ylimits: Tuple[float, float] = (-6, -2),
+                      line_color: str = 'k',
+                      marker: str = 's',
+                      capsize: float = 5,
+                      observational_line_color: str = 'r') -> None:
+    bolometric_index = binned_statistics.bolometric_indexer(
         min_magnitude=min_bolometric_magnitude,
         stars_bin_size=bin_size)
 
@@ -69,10 +113,9 @@ def plot(stars: pd.DataFrame,
             stars_bins_count=stars_bins_count,
             stars_counts=observed_stars_counts)
 
-    magnitudes = bolometric_magnitude(luminosities=stars['luminosity'])
-    bins_indexes = pd.Series(bolometric_index(magnitudes))
-
-    actual_stars_counts = bins_indexes.value_counts()
+    # empty bins are skipped like the missing ones
+    actual_stars_counts = pd.Series(actual_stars_counts)
+    actual_stars_counts = actual_stars_counts[actual_stars_counts > 0]
 
     observed_stars_counts = pd.Series(observed_stars_counts)
 
@@ -88,7 +131,8 @@ def plot(stars: pd.DataFrame,
             stars_bins_count=stars_bins_count,
             stars_counts=normalized_stars_counts)
 
-    figure, subplot = plt.subplots(figsize=figure_size)
+    figure = new_figure(figsize=figure_size)
+    subplot = figure.subplots()
 
     subplot.set(xlabel=xlabel,
                 ylabel=ylabel,
@@ -113,14 +157,15 @@ def plot(stars: pd.DataFrame,
                   color=observational_line_color,
                   zorder=1)
 
-    plt.minorticks_on()
+    subplot.minorticks_on()
 
     subplot.xaxis.set_ticks_position('both')
     subplot.yaxis.set_ticks_position('both')
 
     subplot.set_aspect(ratio / subplot.get_data_ratio())
 
-    plt.savefig(filename)
+    output.save(figure, filename,
+                dpi=dpi)
 
 
 def luminosity_function(*,
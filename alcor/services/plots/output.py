@@ -0,0 +1,54 @@
+import os
+from typing import Optional
+
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+
+FORMATS = ('png', 'pdf', 'svg', 'ps')
+VECTOR_FORMATS = {'pdf', 'svg', 'ps'}
+DEFAULT_FORMAT = 'ps'
+
+
+def file_path(name: str,
+              *,
+              directory: str,
+              output_format: str) -> str:
+    return os.path.join(directory, name + '.' + output_format)
+
+
+def save(figure: Figure,
+         filename: str,
+         *,
+         dpi: Optional[float] = None) -> None:
+    if file_format(filename) in VECTOR_FORMATS:
+        # vector primitive per star makes files huge and slow to open,
+        # so such layers are embedded as images with given resolution
+        rasterize_heavy_artists(figure)
+    try:
+        figure.savefig(filename,
+                       dpi=dpi)
+    finally:
+        # figures are not reused, clearing them breaks references
+        # between artists, so their memory is freed right away
+        figure.clear()
+
+
+def rasterize_heavy_artists(figure: Figure) -> None:
+    for subplot in figure.axes:
+        for collection in subplot.collections:
+            # unlike error bars and lines scatters have marker per point
+            if isinstance(collection, PathCollection):
+                collection.set_rasterized(True)
+        for image in subplot.images:
+            image.set_rasterized(True)
+
+
+def file_format(filename: str) -> str:
+    result = os.path.splitext(filename)[1][1:].lower()
+    if result not in FORMATS:
+        err_msg = ('Invalid plot file extension: "{extension}", '
+                   'supported formats are: {formats}.'
+                   .format(extension=result,
+                           formats=', '.join(FORMATS)))
+        raise ValueError(err_msg)
+    return result
@@ -1,27 +1,77 @@
+import logging
+import multiprocessing
+import os
+import random
 import uuid
-from collections import Counter
+from collections import (Counter,
+                         OrderedDict)
+from concurrent.futures import (FIRST_COMPLETED,
+                                ProcessPoolExecutor,
+                                wait)
 from functools import partial
 from typing import (Callable,
+                    Iterable,
+                    Iterator,
+                    Optional,
                     Dict,
-                    List)
+                    List,
+                    Tuple,
+                    Union)
 
 import numpy as np
 import pandas as pd
-from sqlalchemy import func
+from sqlalchemy import (and_,
+                        false,
+                        func,
+                        or_,
+                        select,
+                        true,
+                        union_all)
 from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.orm.query import Query
 from sqlalchemy.orm.session import Session
+from sqlalchemy.sql.base import ImmutableColumnCollection
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import Select
 
 from alcor.models import eliminations
+from alcor.models.simulation import Parameter
 from alcor.models.star import Star
-from . import filters
+from alcor.models.statistics import GroupStatistics
+from alcor.services import (columnar_store,
+                            derived_columns,
+                            filters,
+                            statistics)
+from alcor.services.compact import compact_stars_frame
+from alcor.services.filters import (MAX_V_APPARENT_MAGNITUDE,
+                                    MAX_VELOCITY,
+                                    MIN_DECLINATION,
+                                    MIN_PARALLAX,
+                                    MIN_PROPER_MOTION,
+                                    stars_filtration_functions,
+                                    stars_filtration_mask)
+from . import (output,
+               sql_filters)
 from . import (luminosity_function,
                velocities_vs_magnitude,
                velocity_clouds,
                heatmaps,
                toomre_diagram,
                ugriz_diagrams)
+from .utils import forget_inherited_fonts
+
+logger = logging.getLogger(__name__)
 
 ASTRONOMICAL_UNIT = 4.74
+COMPACT_READING_CHUNK_SIZE = 100000
+VELOCITIES_CUBE_FILE_NAME = 'velocities_cube.npz'
+# service columns of stars fetched along with their eliminations counts
+PASSES_FILTERS_COLUMN_NAME = 'passes_filters'
+GROUP_ROW_NUMBER_COLUMN_NAME = 'group_row_number'
+PASSED_COUNT_PREFIX = 'passed_count_'
+
+# filtered stars of plotting worker process
+shared_stars = None
 
 
 def draw(*,
@@ -36,8 +86,37 @@ def draw(*,
          with_toomre_diagram: bool,
          with_ugriz_diagrams: bool,
          desired_stars_count: int,
-         session: Session) -> None:
-    entities = star_query_entities(
+         session: Session,
+         storage_dir: Optional[str] = None,
+         compact: bool = False,
+         sample_seed: Optional[int] = None,
+         chunk_size: Optional[int] = None,
+         from_statistics: bool = False,
+         output_dir: str = '.',
+         jobs: int = 1,
+         density: bool = False,
+         output_format: str = output.DEFAULT_FORMAT,
+         dpi: Optional[float] = None) -> None:
+    if from_statistics:
+        draw_from_statistics(
+                group_id=group_id,
+                filtration_method=filtration_method,
+                nullify_radial_velocity=nullify_radial_velocity,
+                with_luminosity_function=with_luminosity_function,
+                with_velocities_vs_magnitude=with_velocities_vs_magnitude,
+                with_velocity_clouds=with_velocity_clouds,
+                lepine_criterion=lepine_criterion,
+                heatmaps_axes=heatmaps_axes,
+                with_toomre_diagram=with_toomre_diagram,
+                with_ugriz_diagrams=with_ugriz_diagrams,
+                desired_stars_count=desired_stars_count,
+                session=session,
+                output_dir=output_dir,
+                output_format=output_format,
+                dpi=dpi)
+        return
+
+    columns_names = stars_columns_names(
             filtration_method=filtration_method,
             nullify_radial_velocity=nullify_radial_velocity,
             lepine_criterion=lepine_criterion,
@@ -48,62 +127,962 @@ def draw(*,
             with_toomre_diagram=with_toomre_diagram,
             with_ugriz_diagrams=with_ugriz_diagrams)
 
-    if not entities:
+    if not columns_names:
         raise ValueError('No plotting options were chosen')
 
-    query = (session.query(Star)
-             .filter(Star.group_id == group_id))
+    if chunk_size is not None:
+        draw_by_chunks(group_id=group_id,
+                       columns_names=columns_names,
+                       filtration_method=filtration_method,
+                       nullify_radial_velocity=nullify_radial_velocity,
+                       with_luminosity_function=with_luminosity_function,
+                       with_velocities_vs_magnitude=(
+                           with_velocities_vs_magnitude),
+                       with_velocity_clouds=with_velocity_clouds,
+                       lepine_criterion=lepine_criterion,
+                       heatmaps_axes=heatmaps_axes,
+                       with_toomre_diagram=with_toomre_diagram,
+                       with_ugriz_diagrams=with_ugriz_diagrams,
+                       desired_stars_count=desired_stars_count,
+                       chunk_size=chunk_size,
+                       session=session,
+                       storage_dir=storage_dir,
+                       compact=compact,
+                       sample_seed=sample_seed,
+                       output_dir=output_dir,
+                       output_format=output_format,
+                       dpi=dpi)
+        return
 
-    if desired_stars_count:
-        query = (query.order_by(func.random())
-                 .limit(desired_stars_count))
+    if storage_dir is None:
+        statement = stars_statement(
+                group_id=group_id,
+                entities=star_query_entities(columns_names),
+                desired_stars_count=desired_stars_count,
+                sample_seed=sample_seed,
+                session=session)
+        # stars are filtered by database,
+        # so only remaining ones are transferred with eliminations counts
+        passed_counts, stars = fetch_counted_stars(
+                statement,
+                filtration_method=filtration_method,
+                compact=compact,
+                session=session)
+        eliminations_counter = eliminations.StarsCounter(
+                group_id=group_id,
+                **group_eliminations_counts(passed_counts))
+    else:
+        stars = columnar_store.read_group(
+                group_id,
+                directory=storage_dir,
+                columns_names=group_stored_columns_names(
+                        group_id,
+                        columns_names=columns_names,
+                        directory=storage_dir),
+                desired_stars_count=desired_stars_count,
+                sample_seed=sample_seed)
+        if compact:
+            stars = compact_stars_frame(stars)
 
-    query = query.with_entities(*entities)
+        filtration_functions = stars_filtration_functions(
+                method=filtration_method)
+        eliminations_counter, stars = filter_stars(
+                stars,
+                filtration_functions=filtration_functions,
+                group_id=group_id)
 
-    statement = query.statement
+    session.add(eliminations_counter)
+    session.commit()
 
-    stars = pd.read_sql_query(sql=statement,
-                              con=session.get_bind(),
-                              index_col='id')
+    plot_stars(stars,
+               radius=fetch_coordinates_radius(group_id,
+                                               heatmaps_axes=heatmaps_axes,
+                                               session=session),
+               nullify_radial_velocity=nullify_radial_velocity,
+               with_luminosity_function=with_luminosity_function,
+               with_velocities_vs_magnitude=with_velocities_vs_magnitude,
+               with_velocity_clouds=with_velocity_clouds,
+               lepine_criterion=lepine_criterion,
+               heatmaps_axes=heatmaps_axes,
+               with_toomre_diagram=with_toomre_diagram,
+               with_ugriz_diagrams=with_ugriz_diagrams,
+               output_dir=output_dir,
+               jobs=jobs,
+               density=density,
+               output_format=output_format,
+               dpi=dpi)
 
-    filtration_functions = stars_filtration_functions(method=filtration_method)
-    eliminations_counter = stars_eliminations_counter(
-            stars,
-            filtration_functions=filtration_functions,
-            group_id=group_id)
-    session.add(eliminations_counter)
+
+def draw_groups(*,
+                groups_ids: List[uuid.UUID],
+                filtration_method: str,
+                nullify_radial_velocity: bool,
+                with_luminosity_function: bool,
+                with_velocities_vs_magnitude: bool,
+                with_velocity_clouds: bool,
+                lepine_criterion: bool,
+                heatmaps_axes: str,
+                with_toomre_diagram: bool,
+                with_ugriz_diagrams: bool,
+                desired_stars_count: int,
+                jobs: int,
+                output_dir: str,
+                session: Session,
+                storage_dir: Optional[str] = None,
+                compact: bool = False,
+                sample_seed: Optional[int] = None,
+                density: bool = False,
+                output_format: str = output.DEFAULT_FORMAT,
+                dpi: Optional[float] = None) -> None:
+    columns_names = stars_columns_names(
+            filtration_method=filtration_method,
+            nullify_radial_velocity=nullify_radial_velocity,
+            lepine_criterion=lepine_criterion,
+            with_luminosity_function=with_luminosity_function,
+            with_velocities_vs_magnitude=with_velocities_vs_magnitude,
+            with_velocity_clouds=with_velocity_clouds,
+            heatmaps_axes=heatmaps_axes,
+            with_toomre_diagram=with_toomre_diagram,
+            with_ugriz_diagrams=with_ugriz_diagrams)
+
+    if not columns_names:
+        raise ValueError('No plotting options were chosen')
+
+    if storage_dir is None:
+        groups_stars = fetch_groups_filtered_stars(
+                groups_ids,
+                entities=star_query_entities(columns_names),
+                filtration_method=filtration_method,
+                desired_stars_count=desired_stars_count,
+                sample_seed=sample_seed,
+                # one batch of groups is enough to keep workers busy
+                batch_size=jobs,
+                compact=compact,
+                session=session)
+    else:
+        groups_stars = read_groups_filtered_stars(
+                groups_ids,
+                columns_names=columns_names,
+                filtration_method=filtration_method,
+                desired_stars_count=desired_stars_count,
+                sample_seed=sample_seed,
+                compact=compact,
+                directory=storage_dir)
+
+    plotting_kwargs = dict(
+            nullify_radial_velocity=nullify_radial_velocity,
+            with_luminosity_function=with_luminosity_function,
+            with_velocities_vs_magnitude=with_velocities_vs_magnitude,
+            with_velocity_clouds=with_velocity_clouds,
+            lepine_criterion=lepine_criterion,
+            heatmaps_axes=heatmaps_axes,
+            with_toomre_diagram=with_toomre_diagram,
+            with_ugriz_diagrams=with_ugriz_diagrams,
+            density=density,
+            output_format=output_format,
+            dpi=dpi)
+
+    if jobs == 1:
+        # single worker only adds pickling of stars
+        for eliminations_counter, stars in groups_stars:
+            session.add(eliminations_counter)
+            plot_stars(stars,
+                       radius=fetch_coordinates_radius(
+                               eliminations_counter.group_id,
+                               heatmaps_axes=heatmaps_axes,
+                               session=session),
+                       output_dir=group_output_dir(
+                               eliminations_counter.group_id,
+                               directory=output_dir),
+                       **plotting_kwargs)
+        session.commit()
+        return
+
+    # bounding number of fetched but not yet plotted groups,
+    # so their stars don't exhaust memory
+    max_pending_count = 2 * jobs
+    pending = set()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for eliminations_counter, stars in groups_stars:
+            if len(pending) >= max_pending_count:
+                completed, pending = wait(pending,
+                                          return_when=FIRST_COMPLETED)
+                for future in completed:
+                    future.result()
+
+            session.add(eliminations_counter)
+            pending.add(executor.submit(
+                    plot_group_stars,
+                    stars,
+                    radius=fetch_coordinates_radius(
+                            eliminations_counter.group_id,
+                            heatmaps_axes=heatmaps_axes,
+                            session=session),
+                    output_dir=group_output_dir(
+                            eliminations_counter.group_id,
+                            directory=output_dir),
+                    **plotting_kwargs))
+        for future in pending:
+            future.result()
     session.commit()
 
-    stars = filtered_stars(stars,
-                           filtration_functions=filtration_functions)
+
+def plot_group_stars(stars: pd.DataFrame,
+                     **kwargs) -> None:
+    forget_inherited_fonts()
+    plot_stars(stars, **kwargs)
+
+
+def group_output_dir(group_id: uuid.UUID,
+                     *,
+                     directory: str) -> str:
+    return os.path.join(directory, group_id.hex)
+
+
+def fetch_groups_filtered_stars(
+        groups_ids: List[uuid.UUID],
+        *,
+        entities: List[InstrumentedAttribute],
+        filtration_method: str,
+        desired_stars_count: int,
+        sample_seed: Optional[int],
+        batch_size: int,
+        compact: bool,
+        session: Session
+) -> Iterator[Tuple[eliminations.StarsCounter, pd.DataFrame]]:
+    for start in range(0, len(groups_ids), batch_size):
+        batch_groups_ids = groups_ids[start:start + batch_size]
+        statement = groups_stars_statement(
+                batch_groups_ids,
+                entities=entities,
+                desired_stars_count=desired_stars_count,
+                sample_seed=sample_seed,
+                session=session)
+        passed_counts, stars = fetch_counted_stars(
+                statement,
+                filtration_method=filtration_method,
+                compact=compact,
+                session=session)
+        eliminations_counts = groups_eliminations_counts(passed_counts)
+        stars_by_groups = dict(list(stars.groupby('group_id',
+                                                  sort=False)))
+        for group_id in batch_groups_ids:
+            # groups without remaining stars are not in the result
+            group_stars = stars_by_groups.get(group_id, stars.iloc[:0])
+            yield (eliminations.StarsCounter(
+                           group_id=group_id,
+                           **eliminations_counts.get(group_id,
+                                                     Counter(raw=0))),
+                   group_stars.drop(columns='group_id'))
+
+
+def read_groups_filtered_stars(
+        groups_ids: List[uuid.UUID],
+        *,
+        columns_names: List[str],
+        filtration_method: str,
+        desired_stars_count: int,
+        sample_seed: Optional[int],
+        compact: bool,
+        directory: str
+) -> Iterator[Tuple[eliminations.StarsCounter, pd.DataFrame]]:
+    filtration_functions = stars_filtration_functions(method=filtration_method)
+    for group_id in groups_ids:
+        stars = columnar_store.read_group(
+                group_id,
+                directory=directory,
+                columns_names=group_stored_columns_names(
+                        group_id,
+                        columns_names=columns_names,
+                        directory=directory),
+                desired_stars_count=desired_stars_count,
+                sample_seed=sample_seed)
+        if compact:
+            stars = compact_stars_frame(stars)
+        yield filter_stars(stars,
+                           filtration_functions=filtration_functions,
+                           group_id=group_id)
+
+
+def plot_stars(stars: pd.DataFrame,
+               *,
+               radius: Optional[float],
+               nullify_radial_velocity: bool,
+               with_luminosity_function: bool,
+               with_velocities_vs_magnitude: bool,
+               with_velocity_clouds: bool,
+               lepine_criterion: bool,
+               heatmaps_axes: str,
+               with_toomre_diagram: bool,
+               with_ugriz_diagrams: bool,
+               output_dir: str,
+               jobs: int = 1,
+               density: bool = False,
+               output_format: str = output.DEFAULT_FORMAT,
+               dpi: Optional[float] = None) -> None:
+    os.makedirs(output_dir,
+                exist_ok=True)
 
     if nullify_radial_velocity:
         set_radial_velocity_to_zero(stars)
 
+    plotters = stars_plotters(
+            radius=radius,
+            with_luminosity_function=with_luminosity_function,
+            with_velocities_vs_magnitude=with_velocities_vs_magnitude,
+            with_velocity_clouds=with_velocity_clouds,
+            lepine_criterion=lepine_criterion,
+            heatmaps_axes=heatmaps_axes,
+            with_toomre_diagram=with_toomre_diagram,
+            with_ugriz_diagrams=with_ugriz_diagrams,
+            output_dir=output_dir,
+            density=density,
+            output_format=output_format,
+            dpi=dpi)
+
+    processes_count = min(jobs, len(plotters))
+    if processes_count <= 1:
+        for plotter in plotters:
+            plotter(stars)
+        return
+
+    # plots don't depend on each other, so they are drawn simultaneously;
+    # forked workers get stars from parent's memory instead of pickling,
+    # where fork is not available they are pickled once per worker
+    with multiprocessing.Pool(processes=processes_count,
+                              initializer=share_stars,
+                              initargs=(stars,)) as pool:
+        pool.map(plot_shared_stars, plotters,
+                 chunksize=1)
+
+
+def stars_plotters(*,
+                   radius: Optional[float],
+                   with_luminosity_function: bool,
+                   with_velocities_vs_magnitude: bool,
+                   with_velocity_clouds: bool,
+                   lepine_criterion: bool,
+                   heatmaps_axes: str,
+                   with_toomre_diagram: bool,
+                   with_ugriz_diagrams: bool,
+                   output_dir: str,
+                   density: bool,
+                   output_format: str,
+                   dpi: Optional[float]
+                   ) -> List[Callable[[pd.DataFrame], None]]:
+    output_file_path = partial(output.file_path,
+                               directory=output_dir,
+                               output_format=output_format)
+    result = []
+
     if with_luminosity_function:
-        luminosity_function.plot(stars=stars)
+        result.append(partial(
+                luminosity_function.plot,
+                filename=output_file_path('luminosity_function'),
+                dpi=dpi))
 
     if with_velocities_vs_magnitude:
         if lepine_criterion:
-            velocities_vs_magnitude.plot_lepine_case(stars=stars)
+            plot_velocities_vs_magnitude = (
+                velocities_vs_magnitude.plot_lepine_case)
         else:
-            velocities_vs_magnitude.plot(stars=stars)
+            plot_velocities_vs_magnitude = velocities_vs_magnitude.plot
+        result.append(partial(
+                plot_velocities_vs_magnitude,
+                filename=output_file_path('velocities_vs_magnitude'),
+                dpi=dpi,
+                density=density))
 
     if with_velocity_clouds:
         if lepine_criterion:
-            velocity_clouds.plot_lepine_case(stars=stars)
+            plot_velocity_clouds = velocity_clouds.plot_lepine_case
         else:
-            velocity_clouds.plot(stars=stars)
+            plot_velocity_clouds = velocity_clouds.plot
+        result.append(partial(
+                plot_velocity_clouds,
+                filename=output_file_path('velocity_clouds'),
+                dpi=dpi,
+                density=density))
 
     if heatmaps_axes:
-        heatmaps.plot(stars=stars,
-                      axes=heatmaps_axes)
+        result.append(partial(heatmaps.plot,
+                              axes=heatmaps_axes,
+                              uv_filename=output_file_path('heatmap_uv'),
+                              uw_filename=output_file_path('heatmap_uw'),
+                              vw_filename=output_file_path('heatmap_vw'),
+                              cube_filename=os.path.join(
+                                      output_dir,
+                                      VELOCITIES_CUBE_FILE_NAME),
+                              xy_filename=output_file_path('heatmap_xy'),
+                              rz_filename=output_file_path('heatmap_rz'),
+                              radius=radius,
+                              dpi=dpi))
 
     if with_toomre_diagram:
-        toomre_diagram.plot(stars=stars)
+        result.append(partial(
+                toomre_diagram.plot,
+                filename=output_file_path('toomre_diagram'),
+                dpi=dpi,
+                density=density))
 
     if with_ugriz_diagrams:
-        ugriz_diagrams.plot(stars=stars)
+        result.append(partial(ugriz_diagrams.plot,
+                              filename=output_file_path('ugriz'),
+                              dpi=dpi,
+                              density=density))
+
+    return result
+
+
+def share_stars(stars: pd.DataFrame) -> None:
+    forget_inherited_fonts()
+    global shared_stars
+    shared_stars = stars
+
+
+def plot_shared_stars(plotter: Callable[[pd.DataFrame], None]) -> None:
+    plotter(shared_stars)
+
+
+def draw_by_chunks(*,
+                   group_id: uuid.UUID,
+                   columns_names: List[str],
+                   filtration_method: str,
+                   nullify_radial_velocity: bool,
+                   with_luminosity_function: bool,
+                   with_velocities_vs_magnitude: bool,
+                   with_velocity_clouds: bool,
+                   lepine_criterion: bool,
+                   heatmaps_axes: str,
+                   with_toomre_diagram: bool,
+                   with_ugriz_diagrams: bool,
+                   desired_stars_count: int,
+                   chunk_size: int,
+                   session: Session,
+                   storage_dir: Optional[str],
+                   compact: bool,
+                   sample_seed: Optional[int],
+                   output_dir: str,
+                   output_format: str,
+                   dpi: Optional[float]) -> None:
+    if with_velocity_clouds or with_toomre_diagram or with_ugriz_diagrams:
+        raise ValueError('Velocity clouds, Toomre and ugriz diagrams '
+                         'draw every star, so they can\'t be plotted '
+                         'by chunks.')
+
+    if storage_dir is None:
+        statement = stars_statement(
+                group_id=group_id,
+                entities=star_query_entities(columns_names),
+                desired_stars_count=desired_stars_count,
+                sample_seed=sample_seed,
+                session=session)
+        eliminations_counter = Counter(dict.fromkeys(
+                ['raw', *stars_filtration_functions(method=filtration_method)],
+                0))
+        stars_chunks = counted_stars_chunks(
+                stream_stars(counted_stars_statement(
+                                     statement,
+                                     filtration_method=filtration_method),
+                             chunk_size=chunk_size,
+                             session=session),
+                eliminations_counter=eliminations_counter)
+        if compact:
+            stars_chunks = map(compact_stars_frame, stars_chunks)
+    else:
+        stars_chunks = columnar_store.read_group_chunks(
+                group_id,
+                directory=storage_dir,
+                columns_names=group_stored_columns_names(
+                        group_id,
+                        columns_names=columns_names,
+                        directory=storage_dir),
+                chunk_size=chunk_size,
+                desired_stars_count=desired_stars_count,
+                sample_seed=sample_seed)
+        if compact:
+            stars_chunks = map(compact_stars_frame, stars_chunks)
+
+        filtration_functions = stars_filtration_functions(
+                method=filtration_method)
+        eliminations_counter = Counter(dict.fromkeys(['raw',
+                                                      *filtration_functions],
+                                                     0))
+        stars_chunks = filtered_stars_chunks(
+                stars_chunks,
+                filtration_functions=filtration_functions,
+                eliminations_counter=eliminations_counter)
+
+    radius = fetch_coordinates_radius(group_id,
+                                      heatmaps_axes=heatmaps_axes,
+                                      session=session)
+    # only binned values are accumulated,
+    # so memory usage doesn't depend on group size
+    stars_counts = velocities_moments = velocities_counts = None
+    coordinates_histograms = None
+    filtered_stars_count = 0
+    for stars in stars_chunks:
+        filtered_stars_count += stars.shape[0]
+        if nullify_radial_velocity:
+            set_radial_velocity_to_zero(stars)
+
+        if with_luminosity_function:
+            stars_counts = accumulated(
+                    stars_counts,
+                    statistics.stars_bins_counts(stars))
+
+        if with_velocities_vs_magnitude:
+            velocities_moments = accumulated(
+                    velocities_moments,
+                    statistics.velocities_bins_moments(
+                            stars,
+                            lepine_criterion=lepine_criterion))
+
+        if heatmaps_axes == 'velocities':
+            velocities_counts = accumulated(
+                    velocities_counts,
+                    heatmaps.velocities_cube(stars).counts)
+
+        if heatmaps_axes == 'coordinates':
+            coordinates_histograms = accumulated(
+                    coordinates_histograms,
+                    heatmaps.coordinates_histograms(stars,
+                                                    radius=radius))
+
+    session.add(eliminations.StarsCounter(group_id=group_id,
+                                          **eliminations_counter))
+    session.commit()
+
+    # chunks are empty if every star is filtered out,
+    # so there are no binned values to plot
+    if not filtered_stars_count:
+        logger.warning('Group "{group_id}" has no stars to plot.'
+                       .format(group_id=group_id))
+        return
+
+    os.makedirs(output_dir,
+                exist_ok=True)
+    output_file_path = partial(output.file_path,
+                               directory=output_dir,
+                               output_format=output_format)
+
+    if with_luminosity_function:
+        luminosity_function.plot_stars_counts(
+                stars_counts,
+                filename=output_file_path('luminosity_function'),
+                dpi=dpi)
+
+    if with_velocities_vs_magnitude:
+        velocities_vs_magnitude.plot_bins_moments(
+                velocities_moments,
+                filename=output_file_path('velocities_vs_magnitude'),
+                dpi=dpi)
+
+    if heatmaps_axes == 'velocities':
+        velocities_cube = heatmaps.VelocitiesCube(
+                counts=velocities_counts,
+                edges=heatmaps.velocities_edges())
+        heatmaps.save_cube(velocities_cube,
+                           os.path.join(output_dir,
+                                        VELOCITIES_CUBE_FILE_NAME))
+        heatmaps.plot_cube(
+                velocities_cube,
+                uv_filename=output_file_path('heatmap_uv'),
+                uw_filename=output_file_path('heatmap_uw'),
+                vw_filename=output_file_path('heatmap_vw'),
+                dpi=dpi)
+
+    if heatmaps_axes == 'coordinates':
+        heatmaps.plot_coordinates_histograms(
+                coordinates_histograms,
+                radius=radius,
+                xy_filename=output_file_path('heatmap_xy'),
+                rz_filename=output_file_path('heatmap_rz'),
+                dpi=dpi)
+
+
+def draw_from_statistics(*,
+                         group_id: uuid.UUID,
+                         filtration_method: str,
+                         nullify_radial_velocity: bool,
+                         with_luminosity_function: bool,
+                         with_velocities_vs_magnitude: bool,
+                         with_velocity_clouds: bool,
+                         lepine_criterion: bool,
+                         heatmaps_axes: str,
+                         with_toomre_diagram: bool,
+                         with_ugriz_diagrams: bool,
+                         desired_stars_count: Optional[int],
+                         session: Session,
+                         output_dir: str,
+                         output_format: str,
+                         dpi: Optional[float]) -> None:
+    if (nullify_radial_velocity or with_velocity_clouds or heatmaps_axes
+            or with_toomre_diagram or with_ugriz_diagrams):
+        raise ValueError('Only luminosity function '
+                         'and velocities vs magnitude lines '
+                         'can be plotted from statistics.')
+    if desired_stars_count is not None:
+        raise ValueError('Statistics are computed for all stars of group, '
+                         'so they can\'t be plotted for its sample.')
+
+    velocities_statistic_name = ('lepine_velocities_power_sums'
+                                 if lepine_criterion
+                                 else 'velocities_power_sums')
+    statistics_names = []
+    if with_luminosity_function:
+        statistics_names.append('luminosity_function_counts')
+    if with_velocities_vs_magnitude:
+        statistics_names.append(velocities_statistic_name)
+    if not statistics_names:
+        raise ValueError('No plotting options were chosen')
+
+    # groups simulated without statistics
+    # or without columns they are computed from have none
+    group_statistics = (session.query(GroupStatistics)
+                        .filter(GroupStatistics.group_id == group_id,
+                                (GroupStatistics.filtration_method
+                                 == filtration_method))
+                        .one_or_none())
+    missing_statistics_names = [
+        statistic_name
+        for statistic_name in statistics_names
+        if group_statistics is None
+        or getattr(group_statistics, statistic_name) is None]
+    if missing_statistics_names:
+        err_msg = ('Group "{group_id}" has no statistics '
+                   'for "{filtration_method}" filtration method: '
+                   '"{statistics_names}".'
+                   .format(group_id=group_id,
+                           filtration_method=filtration_method,
+                           statistics_names='", "'.join(
+                                   missing_statistics_names)))
+        raise ValueError(err_msg)
+
+    os.makedirs(output_dir,
+                exist_ok=True)
+    output_file_path = partial(output.file_path,
+                               directory=output_dir,
+                               output_format=output_format)
+
+    if with_luminosity_function:
+        luminosity_function.plot_stars_counts(
+                np.array(group_statistics.luminosity_function_counts),
+                filename=output_file_path('luminosity_function'),
+                dpi=dpi)
+
+    if with_velocities_vs_magnitude:
+        velocities_power_sums = getattr(group_statistics,
+                                        velocities_statistic_name)
+        velocities_vs_magnitude.plot_bins_moments(
+                statistics.unstacked_moments(
+                        np.array(velocities_power_sums,
+                                 dtype=np.float64)),
+                filename=output_file_path('velocities_vs_magnitude'),
+                dpi=dpi)
+
+
+def accumulated(total: Union[np.ndarray, Dict[str, np.ndarray], None],
+                chunk_result: Union[np.ndarray, Dict[str, np.ndarray]]
+                ) -> Union[np.ndarray, Dict[str, np.ndarray]]:
+    if total is None:
+        return chunk_result
+    if isinstance(chunk_result, dict):
+        return {key: total[key] + value
+                for key, value in chunk_result.items()}
+    return total + chunk_result
+
+
+def filtered_stars_chunks(stars_chunks: Iterable[pd.DataFrame],
+                          *,
+                          filtration_functions: Dict[str, Callable],
+                          eliminations_counter: Counter
+                          ) -> Iterator[pd.DataFrame]:
+    for stars in stars_chunks:
+        chunk_eliminations_counter, mask = stars_filtration_mask(
+                stars,
+                filtration_functions=filtration_functions)
+        eliminations_counter.update(chunk_eliminations_counter)
+        yield stars[mask]
+
+
+def group_stored_columns_names(group_id: uuid.UUID,
+                               *,
+                               columns_names: List[str],
+                               directory: str) -> List[str]:
+    # derived columns stored with the group are read
+    # instead of ones they are computed from, unless they are outdated
+    columns_versions = columnar_store.read_columns_versions(
+            group_id,
+            directory=directory)
+    return derived_columns.base_columns(
+            columns_names,
+            stored=derived_columns.up_to_date_columns_names(columns_versions))
+
+
+def update_derived_columns(group_id: uuid.UUID,
+                           *,
+                           directory: str,
+                           chunk_size: int) -> List[str]:
+    stored_columns_names = columnar_store.read_columns_names(
+            group_id,
+            directory=directory)
+    up_to_date_columns_names = derived_columns.up_to_date_columns_names(
+            columnar_store.read_columns_versions(group_id,
+                                                 directory=directory))
+    # only missing or outdated columns are computed
+    columns_names = [
+        column_name
+        for column_name in derived_columns.persisted_columns_names(
+                stored_columns_names)
+        if column_name not in up_to_date_columns_names]
+    if not columns_names:
+        return []
+
+    stars_chunks = columnar_store.read_group_chunks(
+            group_id,
+            directory=directory,
+            columns_names=derived_columns.base_columns(columns_names),
+            chunk_size=chunk_size)
+    columns_chunks = (
+        derived_columns.derived_columns_values(
+                {column_name: stars[column_name].values
+                 for column_name in stars.columns},
+                columns_names=columns_names)
+        for stars in stars_chunks)
+    columnar_store.write_group_columns(
+            columns_chunks,
+            group_id=group_id,
+            directory=directory,
+            columns_versions={
+                column_name: derived_columns.versions(column_name)
+                for column_name in columns_names})
+    return columns_names
+
+
+def fetch_coordinates_radius(group_id: uuid.UUID,
+                             *,
+                             heatmaps_axes: str,
+                             session: Session) -> Optional[float]:
+    # coordinates heatmaps cover the whole sphere simulated for group
+    if heatmaps_axes != 'coordinates':
+        return None
+    value, = (session.query(Parameter.value)
+              .filter(Parameter.group_id == group_id,
+                      Parameter.name == 'radius')
+              .one())
+    return float(value)
+
+
+def stream_stars(statement: Select,
+                 *,
+                 chunk_size: int,
+                 session: Session) -> Iterator[pd.DataFrame]:
+    # results are fetched through named server-side cursor,
+    # so only current chunk of stars is held on client
+    connection = session.connection().execution_options(stream_results=True)
+    yield from pd.read_sql_query(sql=statement,
+                                 con=connection,
+                                 index_col='id',
+                                 chunksize=chunk_size)
+
+
+def fetch_counted_stars(statement: Select,
+                        *,
+                        filtration_method: str,
+                        compact: bool,
+                        session: Session
+                        ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    statement = counted_stars_statement(statement,
+                                        filtration_method=filtration_method)
+    if compact:
+        # converting by chunks, so double precision values
+        # are never loaded all at once
+        stars_chunks = pd.read_sql_query(sql=statement,
+                                         con=session.get_bind(),
+                                         index_col='id',
+                                         chunksize=COMPACT_READING_CHUNK_SIZE)
+    else:
+        stars_chunks = [pd.read_sql_query(sql=statement,
+                                          con=session.get_bind(),
+                                          index_col='id')]
+    passed_counts_chunks = []
+    remaining_stars_chunks = []
+    for stars in stars_chunks:
+        passed_counts, remaining_stars = split_counted_stars(stars)
+        if compact:
+            remaining_stars = compact_stars_frame(remaining_stars)
+        passed_counts_chunks.append(passed_counts)
+        remaining_stars_chunks.append(remaining_stars)
+    if not remaining_stars_chunks:
+        # no chunks are read from empty result
+        return split_counted_stars(
+                pd.DataFrame(columns=[column.name
+                                      for column in statement.c])
+                .set_index('id'))
+    return (pd.concat(passed_counts_chunks),
+            pd.concat(remaining_stars_chunks))
+
+
+def counted_stars_chunks(stars_chunks: Iterable[pd.DataFrame],
+                         *,
+                         eliminations_counter: Counter
+                         ) -> Iterator[pd.DataFrame]:
+    for stars in stars_chunks:
+        passed_counts, remaining_stars = split_counted_stars(stars)
+        for _, group_passed_counts in passed_counts.iterrows():
+            eliminations_counter.update(
+                    eliminations_counts_by_passed(group_passed_counts))
+        yield remaining_stars
+
+
+def counted_stars_statement(statement: Select,
+                            *,
+                            filtration_method: str) -> Select:
+    # eliminations are counted by window aggregates
+    # in the same scan which yields remaining stars;
+    # first row of each group is kept regardless of criteria,
+    # so its counts are fetched even if every star is eliminated
+    stars = statement.alias('raw_stars')
+    conditions = stars_filtration_conditions(stars.c,
+                                             method=filtration_method)
+    # statement of a single group may have no groups identifiers
+    partition_by = stars.c.group_id if 'group_id' in stars.c else None
+    passes_filters = func.coalesce(and_(true(), *conditions.values()),
+                                   false())
+    counted_stars = select(
+            list(stars.c)
+            + [passes_filters.label(PASSES_FILTERS_COLUMN_NAME),
+               func.row_number().over(partition_by=partition_by)
+               .label(GROUP_ROW_NUMBER_COLUMN_NAME)]
+            + [passed_count.over(partition_by=partition_by)
+               .label(PASSED_COUNT_PREFIX + criterion)
+               for criterion, passed_count
+               in passed_counts(conditions).items()]).alias('counted_stars')
+    return (counted_stars.select()
+            .where(or_(counted_stars.c[PASSES_FILTERS_COLUMN_NAME],
+                       counted_stars.c[GROUP_ROW_NUMBER_COLUMN_NAME] == 1)))
+
+
+def passed_counts(conditions: Dict[str, ColumnElement]
+                  ) -> Dict[str, ColumnElement]:
+    # stars passing all previous criteria are counted for each one
+    result = OrderedDict(raw=func.count())
+    for index, criterion in enumerate(conditions):
+        result[criterion] = func.count().filter(
+                and_(*list(conditions.values())[:index + 1]))
+    return result
+
+
+def split_counted_stars(stars: pd.DataFrame
+                        ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    passed_counts_columns_names = [
+        column_name
+        for column_name in stars.columns
+        if column_name.startswith(PASSED_COUNT_PREFIX)]
+    stars_columns_names = [
+        column_name
+        for column_name in stars.columns
+        if column_name not in {PASSES_FILTERS_COLUMN_NAME,
+                               GROUP_ROW_NUMBER_COLUMN_NAME,
+                               *passed_counts_columns_names}]
+    groups_columns_names = [column_name
+                            for column_name in ['group_id']
+                            if column_name in stars.columns]
+    passed_counts = (
+        stars.loc[stars[GROUP_ROW_NUMBER_COLUMN_NAME].values == 1,
+                  groups_columns_names + passed_counts_columns_names]
+        .rename(columns={column_name: column_name[len(PASSED_COUNT_PREFIX):]
+                         for column_name in passed_counts_columns_names}))
+    mask = stars[PASSES_FILTERS_COLUMN_NAME].values.astype(np.bool_)
+    # remaining stars are copied only once
+    return passed_counts, stars.loc[mask, stars_columns_names]
+
+
+def group_eliminations_counts(passed_counts: pd.DataFrame) -> Counter:
+    if passed_counts.empty:
+        # group has no stars
+        return Counter(dict.fromkeys(passed_counts.columns, 0))
+    return eliminations_counts_by_passed(passed_counts.iloc[0])
+
+
+def groups_eliminations_counts(passed_counts: pd.DataFrame
+                               ) -> Dict[uuid.UUID, Counter]:
+    return {group_passed_counts['group_id']: eliminations_counts_by_passed(
+                    group_passed_counts.drop('group_id'))
+            for _, group_passed_counts in passed_counts.iterrows()}
+
+
+def eliminations_counts_by_passed(passed_counts: pd.Series) -> Counter:
+    # counts are converted from numpy integers,
+    # so they can be written to the database
+    criteria = [criterion
+                for criterion in passed_counts.index
+                if criterion != 'raw']
+    result = Counter(raw=int(passed_counts['raw']))
+    previous_count = passed_counts['raw']
+    for criterion in criteria:
+        result[criterion] = int(previous_count - passed_counts[criterion])
+        previous_count = passed_counts[criterion]
+    return result
+
+
+def groups_stars_statement(groups_ids: List[uuid.UUID],
+                           *,
+                           entities: List[InstrumentedAttribute],
+                           desired_stars_count: int,
+                           sample_seed: Optional[int],
+                           session: Session) -> Select:
+    entities = entities + [Star.group_id]
+    if desired_stars_count:
+        # each group is sampled separately
+        return union_all(*[stars_statement(group_id=group_id,
+                                           entities=entities,
+                                           desired_stars_count=(
+                                               desired_stars_count),
+                                           sample_seed=sample_seed,
+                                           session=session)
+                           .alias()
+                           .select()
+                           for group_id in groups_ids])
+    return (session.query(Star)
+            .filter(Star.group_id.in_(groups_ids))
+            .with_entities(*entities)
+            .statement)
+
+
+def stars_statement(*,
+                    group_id: uuid.UUID,
+                    entities: List[InstrumentedAttribute],
+                    desired_stars_count: int,
+                    sample_seed: Optional[int],
+                    session: Session) -> Select:
+    query = (session.query(Star)
+             .filter(Star.group_id == group_id)
+             .with_entities(*entities))
+
+    if desired_stars_count:
+        return stars_sample_statement(query,
+                                      stars_count=desired_stars_count,
+                                      seed=sample_seed)
+    return query.statement
+
+
+def stars_sample_statement(query: Query,
+                           *,
+                           stars_count: int,
+                           seed: Optional[int]) -> Select:
+    # sample starts from the key given by seed and wraps around,
+    # so both parts are index range scans
+    # which stop after required number of stars
+    start_key = 0. if seed is None else random.Random(seed).random()
+    parts = [(query.filter(condition)
+              .order_by(Star.sample_key)
+              .limit(stars_count)
+              .statement)
+             for condition in [Star.sample_key >= start_key,
+                               Star.sample_key < start_key]]
+    return union_all(*parts).limit(stars_count)
 
 
 def set_radial_velocity_to_zero(stars: pd.DataFrame) -> None:
@@ -130,7 +1109,15 @@ def set_radial_velocity_to_zero(stars: pd.DataFrame) -> None:
                            * distances_in_pc)
 
 
-def star_query_entities(*,
+def star_query_entities(columns_names: List[str]
+                        ) -> List[InstrumentedAttribute]:
+    # derived columns are computed from fetched ones after filtration
+    return [getattr(Star, column_name)
+            for column_name in derived_columns.base_columns(columns_names)
+            ] + [Star.id]
+
+
+def stars_columns_names(*,
                         filtration_method: str,
                         nullify_radial_velocity: bool,
                         lepine_criterion: bool,
@@ -139,120 +1126,101 @@ def star_query_entities(*,
                         with_velocity_clouds: bool,
                         heatmaps_axes: str,
                         with_toomre_diagram: bool,
-                        with_ugriz_diagrams: bool
-                        ) -> List[InstrumentedAttribute]:
-    entities = []
-
-    if filtration_method != 'raw':
-        entities += [Star.distance,
-                     Star.declination,
-                     Star.u_velocity,
-                     Star.v_velocity,
-                     Star.w_velocity]
-    if filtration_method == 'restricted':
-        entities += [Star.b_abs_magnitude,
-                     Star.v_abs_magnitude,
-                     Star.r_abs_magnitude,
-                     Star.i_abs_magnitude,
-                     Star.proper_motion]
+                        with_ugriz_diagrams: bool) -> List[str]:
+    columns_names = filters.filtration_columns_names(filtration_method)
 
     if nullify_radial_velocity:
-        entities += [Star.galactic_longitude,
-                     Star.galactic_latitude,
-                     Star.proper_motion_component_l,
-                     Star.proper_motion_component_b,
-                     Star.distance]
+        columns_names += ['galactic_longitude',
+                          'galactic_latitude',
+                          'proper_motion_component_l',
+                          'proper_motion_component_b',
+                          'distance']
 
     if lepine_criterion:
-        entities += [Star.right_ascension,
-                     Star.declination,
-                     Star.distance]
+        columns_names += ['dominant_axes']
 
     if with_luminosity_function:
-        entities += [Star.luminosity]
+        columns_names += ['bolometric_magnitude_bin_index']
 
     if with_velocities_vs_magnitude:
-        entities += [Star.luminosity,
-                     Star.u_velocity,
-                     Star.v_velocity,
-                     Star.w_velocity]
+        columns_names += ['bolometric_magnitude',
+                          'bolometric_magnitude_bin_index',
+                          'u_velocity',
+                          'v_velocity',
+                          'w_velocity']
+
+    if heatmaps_axes == 'velocities' or with_velocity_clouds:
+        columns_names += ['u_velocity',
+                          'v_velocity',
+                          'w_velocity']
 
-    if heatmaps_axes or with_velocity_clouds:
-        entities += [Star.u_velocity,
-                     Star.v_velocity,
-                     Star.w_velocity]
+    if heatmaps_axes == 'coordinates':
+        columns_names += ['galactic_x_coordinate',
+                          'galactic_y_coordinate',
+                          'r_galactocentric',
+                          'z_coordinate']
 
     if with_toomre_diagram:
-        entities += [Star.u_velocity,
-                     Star.v_velocity,
-                     Star.w_velocity,
-                     Star.spectral_type]
+        columns_names += ['u_velocity',
+                          'v_velocity',
+                          'w_velocity',
+                          'spectral_type',
+                          'galactic_disk_type']
 
     if with_ugriz_diagrams:
-        entities += [Star.b_abs_magnitude,
-                     Star.v_abs_magnitude,
-                     Star.r_abs_magnitude,
-                     Star.i_abs_magnitude,
-                     Star.spectral_type]
-
-    if entities:
-        entities += [Star.id]
-
-    return entities
-
-
-def stars_filtration_functions(*,
-                               method: str,
-                               min_parallax: float = 0.025,
-                               min_declination: float = 0.,
-                               max_velocity: float = 500.,
-                               min_proper_motion: float = 0.04,
-                               max_v_apparent_magnitude: float = 19.
-                               ) -> Dict[str, Callable]:
-    result = {}
-    # TODO: fix geometry of a simulated region so that we don't need to use
-    # the 'full' filtration method
+        columns_names += ['ugriz_gr',
+                          'ugriz_ri',
+                          'ugriz_iz',
+                          'spectral_type']
+
+    return columns_names
+
+
+def stars_filtration_conditions(stars: ImmutableColumnCollection,
+                                *,
+                                method: str,
+                                min_parallax: float = MIN_PARALLAX,
+                                min_declination: float = MIN_DECLINATION,
+                                max_velocity: float = MAX_VELOCITY,
+                                min_proper_motion: float = MIN_PROPER_MOTION,
+                                max_v_apparent_magnitude: float =
+                                MAX_V_APPARENT_MAGNITUDE
+                                ) -> Dict[str, ColumnElement]:
+    # criteria are in the same order as filtration functions
+    result = OrderedDict()
     if method != 'raw':
-        result['by_parallax'] = partial(filters.by_parallax,
-                                        min_parallax=min_parallax)
-        result['by_declination'] = partial(filters.by_declination,
-                                           min_declination=min_declination)
-        result['by_velocity'] = partial(filters.by_velocity,
-                                        max_velocity=max_velocity)
+        result['by_parallax'] = sql_filters.by_parallax(
+                stars,
+                min_parallax=min_parallax)
+        result['by_declination'] = sql_filters.by_declination(
+                stars,
+                min_declination=min_declination)
+        result['by_velocity'] = sql_filters.by_velocity(
+                stars,
+                max_velocity=max_velocity)
 
     if method == 'restricted':
-        result['by_proper_motion'] = partial(
-                filters.by_proper_motion,
+        result['by_proper_motion'] = sql_filters.by_proper_motion(
+                stars,
                 min_proper_motion=min_proper_motion)
         result['by_reduced_proper_motion'] = (
-            filters.by_reduced_proper_motion)
-        result['by_apparent_magnitude'] = partial(
-                filters.by_apparent_magnitude,
+            sql_filters.by_reduced_proper_motion(stars))
+        result['by_apparent_magnitude'] = sql_filters.by_apparent_magnitude(
+                stars,
                 max_v_apparent_magnitude=max_v_apparent_magnitude)
 
     return result
 
 
-def stars_eliminations_counter(stars: pd.DataFrame,
-                               filtration_functions: Dict[str, Callable],
-                               group_id: uuid.UUID
-                               ) -> eliminations.StarsCounter:
-    eliminations_counter = Counter()
-    eliminations_counter['raw'] = stars.shape[0]
-
-    for criterion, filtration_function in filtration_functions.items():
-        stars_count_before_filtration = stars.shape[0]
-        stars = filtration_function(stars)
-        eliminations_counter[criterion] = (stars_count_before_filtration
-                                           - stars.shape[0])
-
-    return eliminations.StarsCounter(group_id=group_id,
-                                     **eliminations_counter)
-
-
-def filtered_stars(stars: pd.DataFrame,
-                   filtration_functions: Dict[str, Callable]) -> pd.DataFrame:
-    for criterion, filtration_function in filtration_functions.items():
-        stars = filtration_function(stars)
-
-    return stars
+def filter_stars(stars: pd.DataFrame,
+                 *,
+                 filtration_functions: Dict[str, Callable],
+                 group_id: uuid.UUID
+                 ) -> Tuple[eliminations.StarsCounter, pd.DataFrame]:
+    eliminations_counter, mask = stars_filtration_mask(
+            stars,
+            filtration_functions=filtration_functions)
+    # remaining stars are copied only once
+    return (eliminations.StarsCounter(group_id=group_id,
+                                      **eliminations_counter),
+            stars[mask])
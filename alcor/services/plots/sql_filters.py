@@ -0,0 +1,102 @@
+from sqlalchemy import (and_,
+                        case,
+                        cast,
+                        func,
+                        null,
+                        or_)
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.sql.base import ImmutableColumnCollection
+from sqlalchemy.sql.elements import ColumnElement
+
+INFINITY = cast('Infinity', DOUBLE_PRECISION)
+
+
+def float64_column(stars: ImmutableColumnCollection,
+                   column_name: str) -> ColumnElement:
+    # the same precision as of pandas criteria
+    return cast(stars[column_name], DOUBLE_PRECISION)
+
+
+def by_parallax(stars: ImmutableColumnCollection,
+                *,
+                min_parallax: float) -> ColumnElement:
+    distances_in_pc = float64_column(stars, 'distance') * 1e3
+    # division by zero is an error in PostgreSQL
+    parallaxes = case([(distances_in_pc != 0, 1 / distances_in_pc)],
+                      else_=INFINITY)
+    return parallaxes > min_parallax
+
+
+def by_declination(stars: ImmutableColumnCollection,
+                   *,
+                   min_declination: float) -> ColumnElement:
+    return stars['declination'] > min_declination
+
+
+def by_velocity(stars: ImmutableColumnCollection,
+                *,
+                max_velocity: float) -> ColumnElement:
+    u_velocities = float64_column(stars, 'u_velocity')
+    v_velocities = float64_column(stars, 'v_velocity')
+    w_velocities = float64_column(stars, 'w_velocity')
+    return (u_velocities * u_velocities
+            + v_velocities * v_velocities
+            + w_velocities * w_velocities
+            < max_velocity ** 2)
+
+
+def by_proper_motion(stars: ImmutableColumnCollection,
+                     *,
+                     min_proper_motion: float) -> ColumnElement:
+    return stars['proper_motion'] > min_proper_motion
+
+
+def by_reduced_proper_motion(stars: ImmutableColumnCollection
+                             ) -> ColumnElement:
+    # same transformation as in pandas version
+    b_abs_magnitudes = float64_column(stars, 'b_abs_magnitude')
+    v_abs_magnitudes = float64_column(stars, 'v_abs_magnitude')
+    r_abs_magnitudes = float64_column(stars, 'r_abs_magnitude')
+    i_abs_magnitudes = float64_column(stars, 'i_abs_magnitude')
+    distances = float64_column(stars, 'distance')
+    g_ugriz_abs_magnitudes = (v_abs_magnitudes - 0.124
+                              + 0.63 * (b_abs_magnitudes
+                                        - v_abs_magnitudes))
+    z_ugriz_abs_magnitudes = (g_ugriz_abs_magnitudes
+                              - 1.646 * (v_abs_magnitudes
+                                         - r_abs_magnitudes)
+                              - 1.584 * (r_abs_magnitudes
+                                         - i_abs_magnitudes)
+                              + 0.525)
+    g_apparent_magnitudes = apparent_magnitude(g_ugriz_abs_magnitudes,
+                                               distance_kpc=distances)
+    z_apparent_magnitudes = apparent_magnitude(z_ugriz_abs_magnitudes,
+                                               distance_kpc=distances)
+    hrms = (g_apparent_magnitudes
+            + 5. * log10(float64_column(stars, 'proper_motion')) + 5.)
+    return and_(or_(g_apparent_magnitudes - z_apparent_magnitudes > -0.33,
+                    hrms > 14.),
+                hrms > 15.17 + 3.559 * (g_apparent_magnitudes
+                                        - z_apparent_magnitudes))
+
+
+def by_apparent_magnitude(stars: ImmutableColumnCollection,
+                          *,
+                          max_v_apparent_magnitude: float) -> ColumnElement:
+    v_apparent_magnitudes = apparent_magnitude(
+            float64_column(stars, 'v_abs_magnitude'),
+            distance_kpc=float64_column(stars, 'distance'))
+    return v_apparent_magnitudes <= max_v_apparent_magnitude
+
+
+def apparent_magnitude(abs_magnitude: ColumnElement,
+                       distance_kpc: ColumnElement) -> ColumnElement:
+    return abs_magnitude - 5. + 5. * (log10(distance_kpc) + 3.)
+
+
+def log10(values: ColumnElement) -> ColumnElement:
+    # logarithm of non-positive value is an error in PostgreSQL,
+    # NULL fails comparisons like NaN does in pandas
+    return case([(values > 0, func.log(values)),
+                 (values == 0, -INFINITY)],
+                else_=null())
@@ -1,55 +1,90 @@
 import logging
-from typing import Tuple
+from typing import (Optional,
+                    Tuple)
 
-import matplotlib
-
-# More info at
-# http://matplotlib.org/faq/usage_faq.html#what-is-a-backend for details
-# TODO: use this: https://stackoverflow.com/a/37605654/7851470
-matplotlib.use('Agg')
-from matplotlib import pyplot as plt
 from matplotlib.axes import Axes
 import numpy as np
 import pandas as pd
 
+from alcor.models import GalacticDiskType
 from alcor.services.common import PECULIAR_SOLAR_VELOCITY_V
+from . import (density_maps,
+               output)
+from .utils import new_figure
+
 logger = logging.getLogger(__name__)
 
 
 def plot(stars: pd.DataFrame,
          *,
          filename: str = 'toomre_diagram.ps',
+         dpi: Optional[float] = None,
          figure_size: Tuple[float, float] = (8, 8),
          ratio: float = 10 / 13,
          xlabel: str = '$V(km/s)$',
          ylabel: str = '$\sqrt{U^2+W^2}(km/s)$',
          thin_disk_color: str = 'r',
-         thick_disk_color: str = 'b') -> None:
+         thick_disk_color: str = 'b',
+         density: bool = False) -> None:
     # TODO: add choosing frame: relative to Sun/LSR. Now it's rel. to LSR
-    # TODO: check how to work with categorical data in pandas
-    thin_disk_stars = stars[stars['galactic_disk_type'] == 'thin']
-    thick_disk_stars = stars[stars['galactic_disk_type'] == 'thick']
-
-    figure, subplot = plt.subplots(figsize=figure_size)
-    plot_stars_by_galactic_disk_type(subplot=subplot,
-                                     stars=thin_disk_stars,
-                                     color=thin_disk_color)
-    plot_stars_by_galactic_disk_type(subplot=subplot,
-                                     stars=thick_disk_stars,
-                                     color=thick_disk_color)
+    thin_disk_stars = galactic_disk_stars(stars,
+                                          galactic_disk_type=(
+                                              GalacticDiskType.thin))
+    thick_disk_stars = galactic_disk_stars(stars,
+                                           galactic_disk_type=(
+                                               GalacticDiskType.thick))
+
+    figure = new_figure(figsize=figure_size)
+    subplot = figure.subplots()
+    if density:
+        # disks share one image, so stars of one don't cover ones of other
+        (thin_disk_v_velocities,
+         thin_disk_uw_velocities_magnitudes) = toomre_coordinates(
+                thin_disk_stars)
+        (thick_disk_v_velocities,
+         thick_disk_uw_velocities_magnitudes) = toomre_coordinates(
+                thick_disk_stars)
+        density_maps.draw_categories(
+                subplot,
+                xs=[thin_disk_v_velocities,
+                    thick_disk_v_velocities],
+                ys=[thin_disk_uw_velocities_magnitudes,
+                    thick_disk_uw_velocities_magnitudes],
+                colors=[thin_disk_color,
+                        thick_disk_color])
+    else:
+        plot_stars_by_galactic_disk_type(subplot=subplot,
+                                         stars=thin_disk_stars,
+                                         color=thin_disk_color)
+        plot_stars_by_galactic_disk_type(subplot=subplot,
+                                         stars=thick_disk_stars,
+                                         color=thick_disk_color)
 
     # TODO: add sliders
     subplot.set(xlabel=xlabel,
                 ylabel=ylabel)
 
-    plt.minorticks_on()
+    subplot.minorticks_on()
 
     subplot.xaxis.set_ticks_position('both')
     subplot.yaxis.set_ticks_position('both')
 
     subplot.set_aspect(ratio / subplot.get_data_ratio())
 
-    plt.savefig(filename)
+    output.save(figure, filename,
+                dpi=dpi)
+
+
+def galactic_disk_stars(stars: pd.DataFrame,
+                        *,
+                        galactic_disk_type: GalacticDiskType
+                        ) -> pd.DataFrame:
+    galactic_disk_types = stars['galactic_disk_type']
+    # stars fetched from database have enum members,
+    # while compact and stored in files ones have categories of their names
+    if pd.api.types.is_categorical_dtype(galactic_disk_types):
+        return stars[galactic_disk_types == galactic_disk_type.name]
+    return stars[galactic_disk_types == galactic_disk_type]
 
 
 def plot_stars_by_galactic_disk_type(*,
@@ -57,11 +92,17 @@ def plot_stars_by_galactic_disk_type(*,
                                      stars: pd.DataFrame,
                                      color: str,
                                      point_size: float = 0.5) -> None:
-    stars['v_velocity'] += PECULIAR_SOLAR_VELOCITY_V
-    uw_velocities_magnitudes = np.sqrt(np.power(stars['u_velocity'], 2)
-                                       + np.power(stars['w_velocity'], 2))
+    v_velocities, uw_velocities_magnitudes = toomre_coordinates(stars)
 
-    subplot.scatter(x=stars['v_velocity'],
+    subplot.scatter(x=v_velocities,
                     y=uw_velocities_magnitudes,
                     color=color,
                     s=point_size)
+
+
+def toomre_coordinates(stars: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    # stars are shared with other plots, so they should stay unchanged
+    v_velocities = stars['v_velocity'] + PECULIAR_SOLAR_VELOCITY_V
+    uw_velocities_magnitudes = np.sqrt(np.power(stars['u_velocity'], 2)
+                                       + np.power(stars['w_velocity'], 2))
+    return v_velocities, uw_velocities_magnitudes
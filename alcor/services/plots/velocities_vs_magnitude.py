@@ -1,23 +1,20 @@
 from typing import (Callable,
                     Dict,
+                    Optional,
                     Tuple)
 
-import matplotlib
-
-# More info at
-# http://matplotlib.org/faq/usage_faq.html#what-is-a-backend for details
-# TODO: use this: https://stackoverflow.com/a/37605654/7851470
-matplotlib.use('Agg')
-from matplotlib import pyplot as plt
 from matplotlib.axes import Axes
 import numpy as np
 import pandas as pd
 
+from alcor.services import (binned_statistics,
+                            derived_columns,
+                            statistics)
 from alcor.utils import zip_mappings
-from .utils import (bolometric_indexer,
-                    bolometric_magnitude,
-                    nan_array,
-                    to_cartesian_from_equatorial)
+from . import (density_maps,
+               output)
+from .utils import (nan_array,
+                    new_figure)
 
 
 def plot(stars: pd.DataFrame,
@@ -27,61 +24,33 @@ def plot(stars: pd.DataFrame,
          bin_size: float = 0.5,
          figure_size: Tuple[float, float] = (10, 12),
          filename: str = 'velocities_vs_magnitude.ps',
+         dpi: Optional[float] = None,
          u_label: str = '$U_{LSR}(km/s)$',
          v_label: str = '$V_{LSR}(km/s)$',
          w_label: str = '$W_{LSR}(km/s)$',
-         magnitude_label: str = '$M_{bol}$') -> None:
-    labels = dict(u_velocity=u_label,
-                  v_velocity=v_label,
-                  w_velocity=w_label)
-
-    bolometric_index = bolometric_indexer(
-            min_magnitude=min_bolometric_magnitude,
-            stars_bin_size=bin_size)
+         magnitude_label: str = '$M_{bol}$',
+         density: bool = False) -> None:
+    moments_by_velocities = statistics.velocities_bins_moments(
+            stars,
+            lepine_criterion=False,
+            min_bolometric_magnitude=min_bolometric_magnitude,
+            max_bolometric_magnitude=max_bolometric_magnitude,
+            bin_size=bin_size)
 
-    bins_by_velocities = empty_bins_by_velocities(
+    plot_bins_moments(
+            moments_by_velocities,
+            stars_by_velocities=dict.fromkeys(moments_by_velocities, stars),
             min_bolometric_magnitude=min_bolometric_magnitude,
             max_bolometric_magnitude=max_bolometric_magnitude,
             bin_size=bin_size,
-            bolometric_index=bolometric_index)
-
-    magnitudes = bolometric_magnitude(luminosities=stars['luminosity'])
-    bins_indexes = pd.Series(bolometric_index(magnitudes))
-
-    figure, subplots = plt.subplots(nrows=3,
-                                    figsize=figure_size)
-    subplots = dict(u_velocity=subplots[0],
-                    v_velocity=subplots[1],
-                    w_velocity=subplots[2])
-
-    for velocity, (bins,
-                   subplot,
-                   label) in zip_mappings(bins_by_velocities,
-                                          subplots,
-                                          labels):
-        bins = fill_bins(bins,
-                         stars=stars,
-                         bins_indexes=bins_indexes,
-                         velocity=velocity)
-
-        draw_subplot(subplot=subplot,
-                     ylabel=label,
-                     x_line=bins['magnitude'],
-                     y_line=bins['avg_velocity'],
-                     yerr=bins['velocity_std'],
-                     x_scatter=magnitudes,
-                     y_scatter=stars[velocity])
-
-    # Removing unnecessary x-labels for top and middle subplots
-    subplots['u_velocity'].set_xticklabels([])
-    subplots['v_velocity'].set_xticklabels([])
-
-    subplots['w_velocity'].set_xlabel(magnitude_label)
-
-    # TODO: delete overlapping y-labels
-    figure.subplots_adjust(hspace=0)
-
-    plt.savefig(filename)
+            figure_size=figure_size,
+            filename=filename,
+            dpi=dpi,
+            u_label=u_label,
+            v_label=v_label,
+            w_label=w_label,
+            magnitude_label=magnitude_label,
+            density=density)
 
 
 def plot_lepine_case(stars: pd.DataFrame,
@@ -91,15 +60,54 @@ def plot_lepine_case(stars: pd.DataFrame,
                      bin_size: float = 0.5,
                      figure_size: Tuple[float, float] = (10, 12),
                      filename: str = 'velocities_vs_magnitude.ps',
+                     dpi: Optional[float] = None,
                      u_label: str = '$U_{LSR}(km/s)$',
                      v_label: str = '$V_{LSR}(km/s)$',
                      w_label: str = '$W_{LSR}(km/s)$',
-                     magnitude_label: str = '$M_{bol}$') -> None:
+                     magnitude_label: str = '$M_{bol}$',
+                     density: bool = False) -> None:
+    stars_by_velocities = statistics.split_stars_by_velocities(stars)
+    moments_by_velocities = statistics.split_velocities_bins_moments(
+            stars_by_velocities,
+            min_bolometric_magnitude=min_bolometric_magnitude,
+            max_bolometric_magnitude=max_bolometric_magnitude,
+            bin_size=bin_size)
+
+    plot_bins_moments(moments_by_velocities,
+                      stars_by_velocities=stars_by_velocities,
+                      min_bolometric_magnitude=min_bolometric_magnitude,
+                      max_bolometric_magnitude=max_bolometric_magnitude,
+                      bin_size=bin_size,
+                      figure_size=figure_size,
+                      filename=filename,
+                      dpi=dpi,
+                      u_label=u_label,
+                      v_label=v_label,
+                      w_label=w_label,
+                      magnitude_label=magnitude_label,
+                      density=density)
+
+
+def plot_bins_moments(moments_by_velocities: Dict[str, np.ndarray],
+                      *,
+                      stars_by_velocities: Optional[Dict[str, pd.DataFrame]] =
+                      None,
+                      min_bolometric_magnitude: float = 6.,
+                      max_bolometric_magnitude: float = 30.,
+                      bin_size: float = 0.5,
+                      figure_size: Tuple[float, float] = (10, 12),
+                      filename: str = 'velocities_vs_magnitude.ps',
+                      dpi: Optional[float] = None,
+                      u_label: str = '$U_{LSR}(km/s)$',
+                      v_label: str = '$V_{LSR}(km/s)$',
+                      w_label: str = '$W_{LSR}(km/s)$',
+                      magnitude_label: str = '$M_{bol}$',
+                      density: bool = False) -> None:
     labels = dict(u_velocity=u_label,
                   v_velocity=v_label,
                   w_velocity=w_label)
 
-    bolometric_index = bolometric_indexer(
+    bolometric_index = binned_statistics.bolometric_indexer(
             min_magnitude=min_bolometric_magnitude,
             stars_bin_size=bin_size)
 
@@ -109,36 +117,39 @@ def plot_lepine_case(stars: pd.DataFrame,
             bin_size=bin_size,
             bolometric_index=bolometric_index)
 
-    stars_by_velocities = split_stars_by_velocities(stars)
-
-    figure, subplots = plt.subplots(nrows=3,
-                                    figsize=figure_size)
+    figure = new_figure(figsize=figure_size)
+    subplots = figure.subplots(nrows=3)
     subplots = dict(u_velocity=subplots[0],
                     v_velocity=subplots[1],
                     w_velocity=subplots[2])
 
     for velocity, (bins,
-                   stars,
+                   moments,
                    subplot,
                    label) in zip_mappings(bins_by_velocities,
-                                          stars_by_velocities,
+                                          moments_by_velocities,
                                           subplots,
                                           labels):
-        magnitudes = bolometric_magnitude(luminosities=stars['luminosity'])
-        bins_indexes = pd.Series(bolometric_index(magnitudes))
-
         bins = fill_bins(bins,
-                         stars=stars,
-                         bins_indexes=bins_indexes,
-                         velocity=velocity)
+                         moments=moments)
+
+        # separate stars are not kept while streaming,
+        # so only binned values are drawn
+        if stars_by_velocities is None:
+            x_scatter = y_scatter = None
+        else:
+            stars = stars_by_velocities[velocity]
+            x_scatter = derived_columns.column(stars, 'bolometric_magnitude')
+            y_scatter = stars[velocity]
 
         draw_subplot(subplot=subplot,
                      ylabel=label,
                      x_line=bins['magnitude'],
                      y_line=bins['avg_velocity'],
                      yerr=bins['velocity_std'],
-                     x_scatter=magnitudes,
-                     y_scatter=stars[velocity])
+                     x_scatter=x_scatter,
+                     y_scatter=y_scatter,
+                     density=density)
 
     # Removing unnecessary x-labels for top and middle subplots
     subplots['u_velocity'].set_xticklabels([])
@@ -149,7 +160,8 @@ def plot_lepine_case(stars: pd.DataFrame,
     # TODO: delete overlapping y-labels
     figure.subplots_adjust(hspace=0)
 
-    plt.savefig(filename)
+    output.save(figure, filename,
+                dpi=dpi)
 
 
 def draw_subplot(*,
@@ -166,11 +178,12 @@ def draw_subplot(*,
                  line_color: str = 'k',
                  capsize: float = 5.,
                  linewidth: float = 1.,
-                 x_scatter: pd.Series,
-                 y_scatter: pd.Series,
+                 x_scatter: pd.Series = None,
+                 y_scatter: pd.Series = None,
                  scatter_color: str = 'gray',
                  scatter_point_size: float = 1.,
-                 ratio: float = 7 / 13) -> None:
+                 ratio: float = 7 / 13,
+                 density: bool = False) -> None:
     subplot.set(xlabel=xlabel,
                 ylabel=ylabel,
                 xlim=xlim,
@@ -183,10 +196,19 @@ def draw_subplot(*,
                      color=line_color,
                      capsize=capsize,
                      linewidth=linewidth)
-    subplot.scatter(x=x_scatter,
-                    y=y_scatter,
-                    color=scatter_color,
-                    s=scatter_point_size)
+    if x_scatter is not None:
+        if density:
+            density_maps.draw(subplot,
+                              x=x_scatter,
+                              y=y_scatter,
+                              color=scatter_color,
+                              xlim=xlim,
+                              ylim=ylim)
+        else:
+            subplot.scatter(x=x_scatter,
+                            y=y_scatter,
+                            color=scatter_color,
+                            s=scatter_point_size)
 
     subplot.minorticks_on()
     subplot.xaxis.set_ticks_position('both')
@@ -219,40 +241,10 @@ def empty_bins_by_velocities(min_bolometric_magnitude: float,
 
 def fill_bins(bins: pd.DataFrame,
               *,
-              stars: pd.DataFrame,
-              bins_indexes: pd.Series,
-              velocity: str) -> pd.DataFrame:
-    # TODO: check cases when there are no stars in a bin
-    for index in range(bins.shape[0]):
-        bin_corresponding_stars_mask = bins_indexes == index
-        bin_corresponding_stars = stars[bin_corresponding_stars_mask]
-        velocities = bin_corresponding_stars[velocity]
-
-        bins.loc[index, 'avg_velocity'] = velocities.mean()
-        # FIXME: one star in a bin returns nothing for std
-        bins.loc[index, 'velocity_std'] = velocities.std()
-
+              moments: np.ndarray) -> pd.DataFrame:
+    # bins with less than two stars have no standard deviation
+    bins['avg_velocity'] = binned_statistics.means(moments)[0]
+    bins['velocity_std'] = binned_statistics.standard_deviations(moments)[0]
     return bins
 
 
-def split_stars_by_velocities(stars: pd.DataFrame) -> Dict[str, pd.DataFrame]:
-    x_coordinates, y_coordinates, z_coordinates = to_cartesian_from_equatorial(
-            stars)
-
-    highest_coordinates = np.maximum.reduce([np.abs(x_coordinates),
-                                             np.abs(y_coordinates),
-                                             np.abs(z_coordinates)])
-
-    x_highest_coordinate_mask = highest_coordinates == x_coordinates
-    y_highest_coordinate_mask = highest_coordinates == y_coordinates
-    z_highest_coordinate_mask = highest_coordinates == z_coordinates
-
-    u_vs_magnitude_stars = stars[y_highest_coordinate_mask
-                                 | z_highest_coordinate_mask]
-    v_vs_magnitude_stars = stars[x_highest_coordinate_mask
-                                 | z_highest_coordinate_mask]
-    w_vs_magnitude_stars = stars[x_highest_coordinate_mask
-                                 | y_highest_coordinate_mask]
-    return dict(u_velocity=u_vs_magnitude_stars,
-                v_velocity=v_vs_magnitude_stars,
-                w_velocity=w_vs_magnitude_stars)
@@ -1,19 +1,15 @@
-from typing import (Tuple,
+from typing import (Optional,
+                    Tuple,
                     List)
 
-import matplotlib
-
-# More info at
-# http://matplotlib.org/faq/usage_faq.html#what-is-a-backend for details
-# TODO: use this: https://stackoverflow.com/a/37605654/7851470
-matplotlib.use('Agg')
-from matplotlib import pyplot as plt
 from matplotlib.patches import Ellipse
 from matplotlib.axes import Axes
-import numpy as np
 import pandas as pd
 
-from .utils import to_cartesian_from_equatorial
+from alcor.services import derived_columns
+from . import (density_maps,
+               output)
+from .utils import new_figure
 
 # Kinematic properties of the thin disk taken from the paper of
 # N.Rowell and N.C.Hambly (mean motions are relative to the Sun):
@@ -32,6 +28,7 @@ STD_POPULATION_W = 18.1
 def plot(stars: pd.DataFrame,
          *,
          filename: str = 'velocity_clouds.ps',
+         dpi: Optional[float] = None,
          figure_size: Tuple[float, float] = (8, 12),
          spacing: float = 0.25,
          u_label: str = '$U(km/s)$',
@@ -39,11 +36,12 @@ def plot(stars: pd.DataFrame,
          w_label: str = '$W(km/s)$',
          u_limits: Tuple[float, float] = (-150, 150),
          v_limits: Tuple[float, float] = (-150, 150),
-         w_limits: Tuple[float, float] = (-150, 150)) -> None:
-    figure, (uv_subplot,
-             uw_subplot,
-             vw_subplot) = plt.subplots(nrows=3,
-                                        figsize=figure_size)
+         w_limits: Tuple[float, float] = (-150, 150),
+         density: bool = False) -> None:
+    figure = new_figure(figsize=figure_size)
+    (uv_subplot,
+     uw_subplot,
+     vw_subplot) = figure.subplots(nrows=3)
 
     draw_subplot(subplot=uv_subplot,
                  xlabel=u_label,
@@ -55,7 +53,8 @@ def plot(stars: pd.DataFrame,
                  x_avg=AVERAGE_POPULATION_VELOCITY_U,
                  y_avg=AVERAGE_POPULATION_VELOCITY_V,
                  x_std=STD_POPULATION_U,
-                 y_std=STD_POPULATION_V)
+                 y_std=STD_POPULATION_V,
+                 density=density)
     draw_subplot(subplot=uw_subplot,
                  xlabel=u_label,
                  ylabel=w_label,
@@ -66,7 +65,8 @@ def plot(stars: pd.DataFrame,
                  x_avg=AVERAGE_POPULATION_VELOCITY_U,
                  y_avg=AVERAGE_POPULATION_VELOCITY_W,
                  x_std=STD_POPULATION_U,
-                 y_std=STD_POPULATION_W)
+                 y_std=STD_POPULATION_W,
+                 density=density)
     draw_subplot(subplot=vw_subplot,
                  xlabel=v_label,
                  ylabel=w_label,
@@ -77,15 +77,18 @@ def plot(stars: pd.DataFrame,
                  x_avg=AVERAGE_POPULATION_VELOCITY_V,
                  y_avg=AVERAGE_POPULATION_VELOCITY_W,
                  x_std=STD_POPULATION_V,
-                 y_std=STD_POPULATION_W)
+                 y_std=STD_POPULATION_W,
+                 density=density)
 
     figure.subplots_adjust(hspace=spacing)
-    plt.savefig(filename)
+    output.save(figure, filename,
+                dpi=dpi)
 
 
 def plot_lepine_case(stars: pd.DataFrame,
                      *,
                      filename: str = 'velocity_clouds.ps',
+                     dpi: Optional[float] = None,
                      figure_size: Tuple[float, float] = (8, 12),
                      spacing: float = 0.25,
                      u_label: str = '$U(km/s)$',
@@ -93,22 +96,18 @@ def plot_lepine_case(stars: pd.DataFrame,
                      w_label: str = '$W(km/s)$',
                      u_limits: Tuple[float, float] = (-150, 150),
                      v_limits: Tuple[float, float] = (-150, 150),
-                     w_limits: Tuple[float, float] = (-150, 150)) -> None:
-    x_coordinates, y_coordinates, z_coordinates = to_cartesian_from_equatorial(
-            stars)
-
-    highest_coordinates = np.maximum.reduce([np.abs(x_coordinates),
-                                             np.abs(y_coordinates),
-                                             np.abs(z_coordinates)])
+                     w_limits: Tuple[float, float] = (-150, 150),
+                     density: bool = False) -> None:
+    dominant_axes = derived_columns.column(stars, 'dominant_axes')
 
-    uv_cloud_stars = stars[(highest_coordinates == z_coordinates)]
-    uw_cloud_stars = stars[(highest_coordinates == y_coordinates)]
-    vw_cloud_stars = stars[(highest_coordinates == x_coordinates)]
+    uv_cloud_stars = stars[(dominant_axes & derived_columns.Z_AXIS) > 0]
+    uw_cloud_stars = stars[(dominant_axes & derived_columns.Y_AXIS) > 0]
+    vw_cloud_stars = stars[(dominant_axes & derived_columns.X_AXIS) > 0]
 
-    figure, (uv_subplot,
-             uw_subplot,
-             vw_subplot) = plt.subplots(nrows=3,
-                                        figsize=figure_size)
+    figure = new_figure(figsize=figure_size)
+    (uv_subplot,
+     uw_subplot,
+     vw_subplot) = figure.subplots(nrows=3)
 
     draw_subplot(subplot=uv_subplot,
                  xlabel=u_label,
@@ -120,7 +119,8 @@ def plot_lepine_case(stars: pd.DataFrame,
                  x_avg=AVERAGE_POPULATION_VELOCITY_U,
                  y_avg=AVERAGE_POPULATION_VELOCITY_V,
                  x_std=STD_POPULATION_U,
-                 y_std=STD_POPULATION_V)
+                 y_std=STD_POPULATION_V,
+                 density=density)
     draw_subplot(subplot=uw_subplot,
                  xlabel=u_label,
                  ylabel=w_label,
@@ -131,7 +131,8 @@ def plot_lepine_case(stars: pd.DataFrame,
                  x_avg=AVERAGE_POPULATION_VELOCITY_U,
                  y_avg=AVERAGE_POPULATION_VELOCITY_W,
                  x_std=STD_POPULATION_U,
-                 y_std=STD_POPULATION_W)
+                 y_std=STD_POPULATION_W,
+                 density=density)
     draw_subplot(subplot=vw_subplot,
                  xlabel=v_label,
                  ylabel=w_label,
@@ -142,10 +143,12 @@ def plot_lepine_case(stars: pd.DataFrame,
                  x_avg=AVERAGE_POPULATION_VELOCITY_V,
                  y_avg=AVERAGE_POPULATION_VELOCITY_W,
                  x_std=STD_POPULATION_V,
-                 y_std=STD_POPULATION_W)
+                 y_std=STD_POPULATION_W,
+                 density=density)
 
     figure.subplots_adjust(hspace=spacing)
-    plt.savefig(filename)
+    output.save(figure, filename,
+                dpi=dpi)
 
 
 def draw_subplot(*,
@@ -162,15 +165,24 @@ def draw_subplot(*,
                  y_avg: float,
                  x_std: float,
                  y_std: float,
-                 ratio: float = 10 / 13) -> None:
+                 ratio: float = 10 / 13,
+                 density: bool) -> None:
     subplot.set(xlabel=xlabel,
                 ylabel=ylabel,
                 xlim=xlim,
                 ylim=ylim)
-    subplot.scatter(x=x,
-                    y=y,
-                    color=cloud_color,
-                    s=point_size)
+    if density:
+        density_maps.draw(subplot,
+                          x=x,
+                          y=y,
+                          color=cloud_color,
+                          xlim=xlim,
+                          ylim=ylim)
+    else:
+        subplot.scatter(x=x,
+                        y=y,
+                        color=cloud_color,
+                        s=point_size)
     plot_ellipses(subplot=subplot,
                   x_avg=x_avg,
                   y_avg=y_avg,
@@ -0,0 +1,174 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from typing import (NamedTuple,
+                    List)
+
+from .fingerprints import (HASH_ALGORITHM,
+                           file_hash)
+from .workers import (SEEDS_FILE_PATH,
+                      WORKING_DIRS_PREFIX,
+                      SeedsType)
+
+logger = logging.getLogger(__name__)
+
+BINARY_FILE_PATH = 'main.e'
+INPUT_DATA_DIR = 'input_data'
+TABLES_LINKS_PATTERN = 'fort.*'
+CACHED_FILES_EXTENSION = '.res'
+# arguments which values are paths of files,
+# their contents are hashed instead of paths
+OUTPUT_FILE_FLAG = '-o'
+CSV_FILES_FLAGS = {'-clcsv', '-cbcsv'}
+
+SimulationsCache = NamedTuple('SimulationsCache',
+                              [('directory', str),
+                               ('max_size', int),
+                               ('environment_hash', str)])
+
+
+def make_cache(directory: str,
+               *,
+               max_size: int,
+               project_dir: str) -> SimulationsCache:
+    directory = os.path.abspath(directory)
+    os.makedirs(directory,
+                exist_ok=True)
+    cache = SimulationsCache(directory=directory,
+                             max_size=max_size,
+                             environment_hash=environment_hash(project_dir))
+    # size limit could have been decreased since previous run
+    evict(cache)
+    return cache
+
+
+def environment_hash(project_dir: str) -> str:
+    # simulation binary with its input tables,
+    # seeds are not included since they can change between runs
+    # and are a part of simulation key
+    files_hashes = {}
+    paths = [BINARY_FILE_PATH] + sorted(
+            os.path.relpath(path, project_dir)
+            for path in glob.glob(os.path.join(project_dir,
+                                               TABLES_LINKS_PATTERN)))
+    input_data_dir = os.path.join(project_dir, INPUT_DATA_DIR)
+    for root, dirs_names, files_names in os.walk(input_data_dir,
+                                                 followlinks=True):
+        dirs_names[:] = [name
+                         for name in dirs_names
+                         if not name.startswith(WORKING_DIRS_PREFIX)]
+        paths.extend(sorted(
+                os.path.relpath(os.path.join(root, file_name), project_dir)
+                for file_name in files_names))
+    for path in paths:
+        if path == SEEDS_FILE_PATH:
+            continue
+        files_hashes[path] = file_hash(os.path.join(project_dir, path))
+    description_str = json.dumps(files_hashes,
+                                 sort_keys=True)
+    return hashlib.new(HASH_ALGORITHM,
+                       description_str.encode()).hexdigest()
+
+
+def simulation_key(args: List[str],
+                   *,
+                   seeds: SeedsType,
+                   environment_hash: str) -> str:
+    key_args = []
+    args_iterator = iter(args)
+    for arg in args_iterator:
+        if arg == OUTPUT_FILE_FLAG:
+            next(args_iterator)
+            continue
+        key_args.append(arg)
+        if arg in CSV_FILES_FLAGS:
+            key_args.append(file_hash(next(args_iterator)))
+    description = dict(args=key_args,
+                       seeds=list(seeds),
+                       environment=environment_hash)
+    description_str = json.dumps(description,
+                                 sort_keys=True)
+    return hashlib.new(HASH_ALGORITHM,
+                       description_str.encode()).hexdigest()
+
+
+def cached_file_path(cache: SimulationsCache,
+                     *,
+                     key: str) -> str:
+    return os.path.join(cache.directory,
+                        key + CACHED_FILES_EXTENSION)
+
+
+def fetch(cache: SimulationsCache,
+          *,
+          key: str,
+          destination: str) -> bool:
+    cached_path = cached_file_path(cache,
+                                   key=key)
+    try:
+        # marking entry as recently used
+        os.utime(cached_path)
+        link_or_copy(cached_path,
+                     destination=destination)
+    except FileNotFoundError:
+        # entry is missing or has been evicted by another worker
+        return False
+    return True
+
+
+def store(cache: SimulationsCache,
+          *,
+          key: str,
+          source: str) -> None:
+    cached_path = cached_file_path(cache,
+                                   key=key)
+    temporary_path = '{path}.{suffix}.tmp'.format(path=cached_path,
+                                                  suffix=uuid.uuid4().hex)
+    link_or_copy(source,
+                 destination=temporary_path)
+    # entries are replaced atomically,
+    # so concurrent workers never see partially written ones
+    os.replace(temporary_path, cached_path)
+    evict(cache)
+
+
+def evict(cache: SimulationsCache) -> None:
+    entries = []
+    for path in glob.glob(os.path.join(cache.directory,
+                                       '*' + CACHED_FILES_EXTENSION)):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    size = sum(entry_size for _, entry_size, _ in entries)
+    # least recently used entries go first
+    for _, entry_size, path in sorted(entries):
+        if size <= cache.max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        else:
+            logger.debug('Evicted simulation cache entry "{path}".'
+                         .format(path=path))
+        size -= entry_size
+
+
+def link_or_copy(source: str,
+                 *,
+                 destination: str) -> None:
+    # hard links save both time and disk space,
+    # but are not possible between different file systems
+    try:
+        os.link(source, destination)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(source, destination)
@@ -0,0 +1,77 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from subprocess import (CalledProcessError,
+                        Popen)
+from typing import (Iterator,
+                    NamedTuple,
+                    Optional,
+                    TextIO,
+                    List)
+
+logger = logging.getLogger(__name__)
+
+SimulationProcess = NamedTuple('SimulationProcess',
+                               [('process', Popen),
+                                ('output_file', TextIO)])
+
+
+def start_simulation(args: List[str],
+                     *,
+                     fifo_path: str,
+                     working_dir: Optional[str]) -> SimulationProcess:
+    os.mkfifo(fifo_path)
+    # opening reading end without blocking,
+    # so we don't wait for simulation which may fail before opening output
+    reading_fd = os.open(fifo_path, os.O_RDONLY | os.O_NONBLOCK)
+    # simulation closes and reopens output file while writing,
+    # so we hold writing end until simulation exits
+    # to prevent reader from getting end-of-file earlier
+    writing_fd = os.open(fifo_path, os.O_WRONLY)
+    os.set_blocking(reading_fd, True)
+    try:
+        process = Popen(args,
+                        cwd=working_dir)
+    except Exception:
+        os.close(reading_fd)
+        os.close(writing_fd)
+        os.remove(fifo_path)
+        raise
+    thread = threading.Thread(target=close_after_exit,
+                              args=(process, writing_fd),
+                              daemon=True)
+    thread.start()
+    return SimulationProcess(process=process,
+                             output_file=os.fdopen(reading_fd))
+
+
+def close_after_exit(process: Popen,
+                     fd: int) -> None:
+    process.wait()
+    os.close(fd)
+
+
+@contextmanager
+def simulation_output(simulation_process: SimulationProcess
+                      ) -> Iterator[TextIO]:
+    process = simulation_process.process
+    try:
+        with simulation_process.output_file as output_file:
+            yield output_file
+    except Exception:
+        if process.poll() is not None:
+            # failed simulation is the cause of parsing errors
+            check_exit_status(process)
+        raise
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    # end of output is reached only after simulation exits
+    check_exit_status(process)
+
+
+def check_exit_status(process: Popen) -> None:
+    if process.returncode:
+        raise CalledProcessError(process.returncode, process.args)
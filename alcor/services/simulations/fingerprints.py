@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+from typing import Dict
+
+from alcor.types import (NumericType,
+                         CSVParametersInfoType)
+
+HASH_ALGORITHM = 'sha256'
+FILE_READING_CHUNK_SIZE = 1 << 20
+
+
+def parameters_fingerprint(parameters_values: Dict[str, NumericType],
+                           *,
+                           precision: int,
+                           geometry: str,
+                           csv_parameters_info: CSVParametersInfoType
+                           ) -> str:
+    # values are formatted with fixed precision,
+    # so the same grid point gives the same fingerprint
+    # regardless of how it is written in settings (e.g. "2" and "2.0")
+    parameters = {name: '{value:.{precision}f}'.format(value=value,
+                                                        precision=precision)
+                  for name, value in parameters_values.items()}
+    csv_parameters = {
+        name: dict(column=str(info['column']),
+                   hash=file_hash(info['path']))
+        for name, info in used_csv_parameters_info(
+                parameters_values,
+                geometry=geometry,
+                csv_parameters_info=csv_parameters_info).items()}
+    description = dict(geometry=geometry,
+                       precision=precision,
+                       parameters=parameters,
+                       csv=csv_parameters)
+    description_str = json.dumps(description,
+                                 sort_keys=True)
+    return hashlib.new(HASH_ALGORITHM,
+                       description_str.encode()).hexdigest()
+
+
+def used_csv_parameters_info(parameters_values: Dict[str, NumericType],
+                             *,
+                             geometry: str,
+                             csv_parameters_info: CSVParametersInfoType
+                             ) -> CSVParametersInfoType:
+    # CSV files are used only for cones
+    # which angles are not set explicitly
+    if geometry != 'cones':
+        return {}
+    return {name: info
+            for name, info in csv_parameters_info.items()
+            if name not in parameters_values}
+
+
+def file_hash(path: str) -> str:
+    hasher = hashlib.new(HASH_ALGORITHM)
+    with open(os.path.abspath(path), 'rb') as file:
+        for chunk in iter(lambda: file.read(FILE_READING_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
@@ -0,0 +1,151 @@
+import io
+import logging
+from typing import (Any,
+                    Iterable,
+                    Iterator,
+                    Dict,
+                    List)
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm.session import Session
+
+from alcor.models import (Group,
+                          Star)
+from alcor.utils import (galactic_disk_types_categorical,
+                         stars_from_columns)
+
+logger = logging.getLogger(__name__)
+
+
+def loader_stars_chunks(columns_chunks: Iterable[Dict[str, np.ndarray]],
+                        *,
+                        group: Group,
+                        loader: str) -> Iterator[List[Any]]:
+    # both loaders get parsed values,
+    # so malformed outputs are rejected before writing to the database
+    if loader == 'orm':
+        yield from orm_stars_chunks(columns_chunks,
+                                    group=group)
+    elif loader == 'copy':
+        for columns in columns_chunks:
+            yield copy_rows(columns,
+                            group=group)
+    else:
+        raise ValueError(unknown_loader_message(loader))
+
+
+def orm_stars_chunks(columns_chunks: Iterable[Dict[str, np.ndarray]],
+                     *,
+                     group: Group) -> Iterator[List[Star]]:
+    for columns in columns_chunks:
+        yield list(stars_from_columns(columns,
+                                      group=group))
+
+
+def write_stars_chunks(stars_chunks: Iterable[List[Any]],
+                       *,
+                       group: Group,
+                       columns_names: List[str],
+                       loader: str,
+                       use_staging_table: bool,
+                       session: Session) -> int:
+    if loader == 'orm':
+        return insert_stars(stars_chunks,
+                            session=session)
+    if loader == 'copy':
+        return copy_stars(stars_chunks,
+                          group=group,
+                          columns_names=columns_names,
+                          use_staging_table=use_staging_table,
+                          session=session)
+    raise ValueError(unknown_loader_message(loader))
+
+
+def unknown_loader_message(loader: str) -> str:
+    return ('Unknown stars loader: "{loader}".'
+            .format(loader=loader))
+
+
+def insert_stars(stars_chunks: Iterable[List[Star]],
+                 *,
+                 session: Session) -> int:
+    stars_count = 0
+    for stars in stars_chunks:
+        session.add_all(stars)
+        session.flush()
+        # flushed stars are not needed anymore,
+        # so memory consumption is bounded by the chunk size
+        for star in stars:
+            session.expunge(star)
+        stars_count += len(stars)
+    return stars_count
+
+
+def copy_stars(rows_chunks: Iterable[List[str]],
+               *,
+               group: Group,
+               columns_names: List[str],
+               use_staging_table: bool,
+               session: Session) -> int:
+    # group and its parameters should be written
+    # in the same transaction before stars referencing them
+    session.flush()
+    connection = session.connection().connection
+    table_name = Star.__tablename__
+    columns = ['group_id'] + columns_names
+    columns_str = ', '.join(columns)
+
+    with connection.cursor() as cursor:
+        if use_staging_table:
+            target_table_name = staging_table_name(group)
+            cursor.execute('CREATE UNLOGGED TABLE {staging_table} AS '
+                           'SELECT {columns} FROM {table} WITH NO DATA'
+                           .format(staging_table=target_table_name,
+                                   columns=columns_str,
+                                   table=table_name))
+        else:
+            target_table_name = table_name
+
+        copy_statement = ('COPY {table} ({columns}) FROM STDIN'
+                          .format(table=target_table_name,
+                                  columns=columns_str))
+        stars_count = 0
+        for rows in rows_chunks:
+            cursor.copy_expert(copy_statement,
+                               io.StringIO(''.join(rows)))
+            stars_count += len(rows)
+
+        if use_staging_table:
+            cursor.execute('INSERT INTO {table} ({columns}) '
+                           'SELECT {columns} FROM {staging_table}'
+                           .format(table=table_name,
+                                   columns=columns_str,
+                                   staging_table=target_table_name))
+            cursor.execute('DROP TABLE {staging_table}'
+                           .format(staging_table=target_table_name))
+    return stars_count
+
+
+def copy_rows(columns: Dict[str, np.ndarray],
+              *,
+              group: Group) -> List[str]:
+    # values are written in "COPY" text format,
+    # floats with enough digits to be parsed back to the same values
+    stars = pd.DataFrame(columns,
+                         columns=list(columns))
+    if 'galactic_disk_type' in columns:
+        # enumeration values are written by names
+        stars['galactic_disk_type'] = galactic_disk_types_categorical(
+                columns['galactic_disk_type'])
+    stars.insert(0, 'group_id', str(group.id))
+    return stars.to_csv(sep='\t',
+                        header=False,
+                        index=False,
+                        na_rep='NaN',
+                        float_format='%.17g').splitlines(keepends=True)
+
+
+def staging_table_name(group: Group) -> str:
+    return '{table}_staging_{group_id}'.format(table=Star.__tablename__,
+                                               group_id=group.id.hex)
@@ -0,0 +1,327 @@
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from functools import partial
+from typing import (Any,
+                    Callable,
+                    ContextManager,
+                    Iterable,
+                    Iterator,
+                    NamedTuple,
+                    Optional,
+                    TextIO,
+                    Dict,
+                    List)
+
+import numpy as np
+from sqlalchemy.orm.session import Session
+
+from alcor.models import (STAR_PARAMETERS_NAMES,
+                          Group,
+                          Star)
+from alcor.models.eliminations import StarsCounter
+from alcor.models.simulation import Parameter
+from alcor.models.statistics import GroupStatistics
+from alcor.services import columnar_store
+from alcor.services import derived_columns as stars_derived_columns
+from alcor.services import statistics as stars_statistics
+from alcor.services.data_access import create_group_partition
+from alcor.services.compact import compact_stars_columns
+from alcor.utils import (parse_stars_columns,
+                         validate_header)
+from .fifo import (SimulationProcess,
+                   simulation_output)
+from .loading import (loader_stars_chunks,
+                      write_stars_chunks)
+
+logger = logging.getLogger(__name__)
+
+Simulation = NamedTuple('Simulation',
+                        [('group', Group),
+                         ('parameters_values', Dict[str, float]),
+                         ('output_file_path', str),
+                         ('working_dir', Optional[str]),
+                         ('process', Optional[SimulationProcess])])
+
+# markers of the end of group's stars chunks and of the whole stream
+GROUP_END = object()
+STREAM_END = object()
+POLLING_INTERVAL = 0.5
+
+
+class Stopped(Exception):
+    pass
+
+
+def run(simulations: Iterator[Simulation],
+        *,
+        stars_loader: str,
+        use_staging_table: bool,
+        chunk_size: Optional[int],
+        storage_dir: Optional[str],
+        compact: bool,
+        session: Session,
+        derived_columns: bool = False,
+        queue_size: int = 2) -> None:
+    # simulations, parsing and database writes are running
+    # in separate stages connected with bounded queues,
+    # so each of them is waiting for others only when queues are full
+    stopped = threading.Event()
+    simulations_queue = queue.Queue(maxsize=1)
+    chunks_queue = queue.Queue(maxsize=queue_size)
+
+    parse = partial(parse_simulations,
+                    queue_items(simulations_queue),
+                    stars_loader=stars_loader,
+                    chunk_size=chunk_size,
+                    storage_dir=storage_dir,
+                    compact=compact,
+                    derived_columns=derived_columns)
+    stages = [(lambda: simulations, simulations_queue),
+              (parse, chunks_queue)]
+    for produce, output_queue in stages:
+        thread = threading.Thread(target=run_stage,
+                                  kwargs=dict(produce=produce,
+                                              output_queue=output_queue,
+                                              stopped=stopped),
+                                  daemon=True)
+        thread.start()
+
+    try:
+        save_groups(queue_items(chunks_queue),
+                    stars_loader=stars_loader,
+                    use_staging_table=use_staging_table,
+                    storage_dir=storage_dir,
+                    session=session)
+    finally:
+        stopped.set()
+
+
+def run_stage(*,
+              produce: Callable[[], Iterable[Any]],
+              output_queue: queue.Queue,
+              stopped: threading.Event) -> None:
+    put = partial(put_item,
+                  output_queue=output_queue,
+                  stopped=stopped)
+    try:
+        for item in produce():
+            put(item)
+        put(STREAM_END)
+    except Stopped:
+        return
+    except Exception as error:
+        try:
+            put(error)
+        except Stopped:
+            return
+
+
+def put_item(item: Any,
+             *,
+             output_queue: queue.Queue,
+             stopped: threading.Event) -> None:
+    while not stopped.is_set():
+        try:
+            output_queue.put(item,
+                             timeout=POLLING_INTERVAL)
+        except queue.Full:
+            continue
+        else:
+            return
+    raise Stopped()
+
+
+def queue_items(input_queue: queue.Queue) -> Iterator[Any]:
+    while True:
+        item = input_queue.get()
+        if item is STREAM_END:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def parse_simulations(simulations: Iterable[Simulation],
+                      *,
+                      stars_loader: str,
+                      chunk_size: Optional[int],
+                      storage_dir: Optional[str],
+                      compact: bool,
+                      derived_columns: bool = False) -> Iterator[Any]:
+    for simulation in simulations:
+        with open_output(simulation) as output_file:
+            header = output_file.readline().split()
+            if not header:
+                err_msg = ('Simulation output "{path}" is empty.'
+                           .format(path=simulation.output_file_path))
+                raise ValueError(err_msg)
+            validate_header(header,
+                            possible_columns_names=STAR_PARAMETERS_NAMES)
+            if derived_columns:
+                derived_columns_names = (
+                    stars_derived_columns.persisted_columns_names(header))
+            else:
+                derived_columns_names = []
+            # filled by the time group ends
+            statistics = {}
+            yield simulation, header, derived_columns_names, statistics
+            columns_chunks = parse_stars_columns(output_file,
+                                                 columns_names=header,
+                                                 chunk_size=chunk_size)
+            if compact:
+                # values are the same as stored in compact database
+                columns_chunks = map(compact_stars_columns,
+                                     columns_chunks)
+            if derived_columns_names:
+                # values are derived from stored ones,
+                # so they are the same as computed while plotting
+                columns_chunks = map(
+                        partial(with_derived_columns,
+                                columns_names=derived_columns_names),
+                        columns_chunks)
+            columns_chunks = with_statistics(columns_chunks,
+                                             statistics=statistics)
+            if storage_dir is None:
+                yield from loader_stars_chunks(columns_chunks,
+                                               group=simulation.group,
+                                               loader=stars_loader)
+            else:
+                yield from columns_chunks
+        remove_output(simulation)
+        # group is completed only after its output is closed,
+        # so streamed simulation's failure prevents group from being saved
+        yield GROUP_END
+
+
+def with_derived_columns(columns: Dict[str, np.ndarray],
+                         *,
+                         columns_names: List[str]) -> Dict[str, np.ndarray]:
+    return {**columns,
+            **stars_derived_columns.derived_columns_values(
+                    columns,
+                    columns_names=columns_names)}
+
+
+def with_statistics(columns_chunks: Iterable[Dict[str, np.ndarray]],
+                    *,
+                    statistics: Dict[str, Dict[str, Any]]
+                    ) -> Iterator[Dict[str, np.ndarray]]:
+    # statistics are computed while stars are in memory,
+    # so plots which need only them don't read stars again
+    for columns in columns_chunks:
+        statistics.update(stars_statistics.accumulated(
+                statistics,
+                stars_statistics.columns_statistics(columns)))
+        yield columns
+
+
+def open_output(simulation: Simulation) -> ContextManager[TextIO]:
+    if simulation.process is None:
+        return open(simulation.output_file_path)
+    return simulation_output(simulation.process)
+
+
+def remove_output(simulation: Simulation) -> None:
+    if simulation.working_dir is None:
+        os.remove(simulation.output_file_path)
+    else:
+        shutil.rmtree(simulation.working_dir)
+
+
+def save_groups(items: Iterator[Any],
+                *,
+                stars_loader: str,
+                use_staging_table: bool,
+                storage_dir: Optional[str],
+                session: Session) -> None:
+    for (simulation, columns_names,
+         derived_columns_names, statistics) in items:
+        stars_chunks = iter(partial(next, items), GROUP_END)
+        save_group(simulation.group,
+                   parameters_values=simulation.parameters_values,
+                   columns_names=columns_names,
+                   derived_columns_names=derived_columns_names,
+                   statistics=statistics,
+                   stars_chunks=stars_chunks,
+                   stars_loader=stars_loader,
+                   use_staging_table=use_staging_table,
+                   storage_dir=storage_dir,
+                   session=session)
+
+
+def save_group(group: Group,
+               *,
+               parameters_values: Dict[str, float],
+               columns_names: List[str],
+               derived_columns_names: List[str],
+               statistics: Dict[str, Dict[str, Any]],
+               stars_chunks: Iterable[List[Any]],
+               stars_loader: str,
+               use_staging_table: bool,
+               storage_dir: Optional[str],
+               session: Session) -> None:
+    parameters = [Parameter(group_id=group.id,
+                            name=name,
+                            value=str(value))
+                  for name, value in parameters_values.items()]
+
+    session.add(group)
+    session.add_all(parameters)
+    # partitions are created in the same transaction,
+    # so they don't outlive failed groups
+    partitioned_models = [StarsCounter]
+    if storage_dir is None:
+        partitioned_models.append(Star)
+    for model in partitioned_models:
+        create_group_partition(model,
+                               group_id=group.id,
+                               session=session)
+
+    start = time.perf_counter()
+    if storage_dir is None:
+        stars_count = write_stars_chunks(stars_chunks,
+                                         group=group,
+                                         columns_names=columns_names,
+                                         loader=stars_loader,
+                                         use_staging_table=use_staging_table,
+                                         session=session)
+        loader = stars_loader
+    else:
+        # only group and its parameters are stored in the database
+        stars_count = columnar_store.write_group(
+                stars_chunks,
+                group_id=group.id,
+                directory=storage_dir,
+                columns_versions={
+                    column_name: stars_derived_columns.versions(column_name)
+                    for column_name in derived_columns_names})
+        loader = 'files'
+    # stars are written, so their statistics are complete
+    session.add_all(GroupStatistics(group_id=group.id,
+                                    filtration_method=filtration_method,
+                                    **method_statistics)
+                    for filtration_method, method_statistics
+                    in statistics.items())
+    session.commit()
+    elapsed = time.perf_counter() - start
+
+    log_loading_rate(stars_count=stars_count,
+                     elapsed=elapsed,
+                     loader=loader)
+
+
+def log_loading_rate(*,
+                     stars_count: int,
+                     elapsed: float,
+                     loader: str) -> None:
+    rate = stars_count / elapsed if elapsed else float('inf')
+    logger.info('Loaded {stars_count} stars with "{loader}" loader '
+                'in {elapsed:.2f} s ({rate:.0f} rows/sec).'
+                .format(stars_count=stars_count,
+                        loader=loader,
+                        elapsed=elapsed,
+                        rate=rate))
@@ -1,65 +1,328 @@
 import logging
 import os
+import shutil
 import uuid
+from concurrent.futures import (FIRST_COMPLETED,
+                                Future,
+                                ProcessPoolExecutor,
+                                wait)
 from subprocess import check_call
-from typing import Dict
+from typing import (Iterable,
+                    Iterator,
+                    Optional,
+                    Dict,
+                    List,
+                    Set,
+                    Tuple)
 
 from sqlalchemy.orm.session import Session
 
-from alcor.models import (STAR_PARAMETERS_NAMES,
-                          Group)
-from alcor.models.simulation import Parameter
+from alcor.models import Group
 from alcor.services.common import group_output_file_name
+from alcor.services.data_access import fetch_groups_fingerprints
 from alcor.types import (GridParametersInfoType,
                          CSVParametersInfoType)
-from alcor.utils import (parse_stars,
-                         validate_header)
-from . import grid
+from . import (cache as simulations_cache,
+               grid,
+               pipeline)
+from .cache import SimulationsCache
+from .fifo import (SimulationProcess,
+                   start_simulation)
+from .fingerprints import parameters_fingerprint
+from .pipeline import Simulation
+from .workers import (SEEDS_FILE_PATH,
+                      SeedsType,
+                      make_working_dir,
+                      read_seeds,
+                      shifted_seeds,
+                      write_seeds)
 
 logger = logging.getLogger(__name__)
 
+GridPointType = Tuple[Dict[str, float], str]
+
 
 def run(*,
         geometry: str,
         precision: int,
         grid_parameters_info: GridParametersInfoType,
         csv_parameters_info: CSVParametersInfoType,
-        session: Session) -> None:
-    for parameters_values in grid.parameters_values(
+        stars_loader: str,
+        use_staging_table: bool,
+        chunk_size: Optional[int],
+        jobs: int,
+        resume: bool,
+        cache_dir: Optional[str],
+        cache_size: int,
+        use_fifo: bool,
+        storage_dir: Optional[str],
+        compact: bool,
+        session: Session,
+        derived_columns: bool = False) -> None:
+    if use_fifo and jobs > 1:
+        err_msg = ('Streaming simulations outputs through FIFO '
+                   'is not supported for concurrent simulations.')
+        raise ValueError(err_msg)
+    if use_fifo and cache_dir is not None:
+        err_msg = ('Streaming simulations outputs through FIFO '
+                   'is not supported with simulations cache.')
+        raise ValueError(err_msg)
+    if derived_columns and storage_dir is None:
+        err_msg = ('Storing derived columns is supported '
+                   'only for "files" stars storage.')
+        raise ValueError(err_msg)
+
+    parameters_values_sets = grid.parameters_values(
             parameters_info=grid_parameters_info,
-            precision=precision):
-        group = Group(id=uuid.uuid4())
+            precision=precision)
+    points = grid_points(parameters_values_sets,
+                         precision=precision,
+                         geometry=geometry,
+                         csv_parameters_info=csv_parameters_info)
+    if resume:
+        points = not_simulated_points(
+                points,
+                simulated_fingerprints=fetch_groups_fingerprints(
+                        session=session))
+
+    if cache_dir is None:
+        cache = None
+    else:
+        cache = simulations_cache.make_cache(cache_dir,
+                                             max_size=cache_size,
+                                             project_dir=os.getcwd())
+
+    if jobs > 1:
+        simulations = parallel_simulations(
+                points,
+                geometry=geometry,
+                csv_parameters_info=csv_parameters_info,
+                jobs=jobs,
+                cache=cache)
+    else:
+        simulations = sequential_simulations(
+                points,
+                geometry=geometry,
+                csv_parameters_info=csv_parameters_info,
+                cache=cache,
+                use_fifo=use_fifo)
+
+    pipeline.run(simulations,
+                 stars_loader=stars_loader,
+                 use_staging_table=use_staging_table,
+                 chunk_size=chunk_size,
+                 storage_dir=storage_dir,
+                 compact=compact,
+                 derived_columns=derived_columns,
+                 session=session)
+
+
+def grid_points(parameters_values_sets: Iterable[Dict[str, float]],
+                *,
+                precision: int,
+                geometry: str,
+                csv_parameters_info: CSVParametersInfoType
+                ) -> Iterator[GridPointType]:
+    for parameters_values in parameters_values_sets:
+        fingerprint = parameters_fingerprint(
+                parameters_values,
+                precision=precision,
+                geometry=geometry,
+                csv_parameters_info=csv_parameters_info)
+        yield parameters_values, fingerprint
+
+
+def not_simulated_points(points: Iterable[GridPointType],
+                         *,
+                         simulated_fingerprints: Set[str]
+                         ) -> Iterator[GridPointType]:
+    for parameters_values, fingerprint in points:
+        if fingerprint in simulated_fingerprints:
+            logger.info('Skipping already simulated grid point '
+                        'with parameters {parameters_values}.'
+                        .format(parameters_values=parameters_values))
+            continue
+        yield parameters_values, fingerprint
+
+
+def sequential_simulations(points: Iterable[GridPointType],
+                           *,
+                           geometry: str,
+                           csv_parameters_info: CSVParametersInfoType,
+                           cache: Optional[SimulationsCache],
+                           use_fifo: bool
+                           ) -> Iterator[Simulation]:
+    simulation_process = None
+    for parameters_values, fingerprint in points:
+        if simulation_process is not None:
+            # simulation rewrites seeds file,
+            # so the next one should not start before previous exits
+            simulation_process.process.wait()
+        group = Group(id=uuid.uuid4(),
+                      fingerprint=fingerprint)
         output_file_name = group_output_file_name(group=group)
-        run_simulation(parameters_values=parameters_values,
-                       csv_parameters_info=csv_parameters_info,
-                       geometry=geometry,
-                       output_file_name=output_file_name)
+        simulation_process = run_simulation(
+                parameters_values=parameters_values,
+                csv_parameters_info=csv_parameters_info,
+                geometry=geometry,
+                output_file_name=output_file_name,
+                cache=cache,
+                use_fifo=use_fifo)
+        yield Simulation(group=group,
+                         parameters_values=parameters_values,
+                         output_file_path=output_file_name,
+                         working_dir=None,
+                         process=simulation_process)
+
+
+def parallel_simulations(points: Iterable[GridPointType],
+                         *,
+                         geometry: str,
+                         csv_parameters_info: CSVParametersInfoType,
+                         jobs: int,
+                         cache: Optional[SimulationsCache]
+                         ) -> Iterator[Simulation]:
+    seeds = read_seeds(SEEDS_FILE_PATH)
+    # bounding number of simulated but not yet saved groups,
+    # so their outputs don't exhaust disk space
+    max_pending_count = 2 * jobs
+    pending = set()
+    pending_groups = {}
+    simulations_count = 0
 
-        with open(output_file_name) as output_file:
-            header = next(output_file).split()
-            validate_header(header,
-                            possible_columns_names=STAR_PARAMETERS_NAMES)
-            stars = list(parse_stars(output_file,
-                                     group=group,
-                                     columns_names=header))
-        os.remove(output_file_name)
+    def completed_simulations(futures: Set[Future]) -> Iterator[Simulation]:
+        for future in futures:
+            group, parameters_values = pending_groups.pop(future)
+            working_dir = future.result()
+            yield Simulation(group=group,
+                             parameters_values=parameters_values,
+                             output_file_path=os.path.join(
+                                     working_dir,
+                                     group_output_file_name(group=group)),
+                             working_dir=working_dir,
+                             process=None)
 
-        parameters = [Parameter(group_id=group.id,
-                                name=name,
-                                value=str(value))
-                      for name, value in parameters_values.items()]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for parameters_values, fingerprint in points:
+            if len(pending) >= max_pending_count:
+                completed, pending = wait(pending,
+                                          return_when=FIRST_COMPLETED)
+                yield from completed_simulations(completed)
 
-        session.add(group)
-        session.add_all(parameters)
-        session.add_all(stars)
-        session.commit()
+            group = Group(id=uuid.uuid4(),
+                          fingerprint=fingerprint)
+            if geometry == 'cones':
+                simulation_seeds = shifted_seeds(seeds,
+                                                 offset=simulations_count)
+            else:
+                simulation_seeds = seeds
+            future = executor.submit(
+                    simulate_in_working_dir,
+                    group_id=group.id,
+                    parameters_values=parameters_values,
+                    csv_parameters_info=csv_parameters_info,
+                    geometry=geometry,
+                    seeds=simulation_seeds,
+                    cache=cache)
+            pending_groups[future] = group, parameters_values
+            pending.add(future)
+            simulations_count += 1
+
+        while pending:
+            completed, pending = wait(pending,
+                                      return_when=FIRST_COMPLETED)
+            yield from completed_simulations(completed)
+
+    if geometry == 'cones':
+        write_seeds(SEEDS_FILE_PATH,
+                    shifted_seeds(seeds,
+                                  offset=simulations_count))
+
+
+def simulate_in_working_dir(*,
+                            group_id: uuid.UUID,
+                            parameters_values: Dict[str, float],
+                            csv_parameters_info: CSVParametersInfoType,
+                            geometry: str,
+                            seeds: SeedsType,
+                            cache: Optional[SimulationsCache]) -> str:
+    working_dir = make_working_dir(os.getcwd(),
+                                   suffix=group_id.hex)
+    try:
+        write_seeds(os.path.join(working_dir, SEEDS_FILE_PATH),
+                    seeds)
+        run_simulation(parameters_values=parameters_values,
+                       csv_parameters_info=csv_parameters_info,
+                       geometry=geometry,
+                       output_file_name=group_output_file_name(
+                               group=Group(id=group_id)),
+                       working_dir=working_dir,
+                       cache=cache)
+    except Exception:
+        shutil.rmtree(working_dir)
+        raise
+    return working_dir
 
 
 def run_simulation(*,
                    parameters_values: Dict[str, float],
                    csv_parameters_info: CSVParametersInfoType,
                    geometry: str,
-                   output_file_name: str) -> None:
+                   output_file_name: str,
+                   working_dir: str = None,
+                   cache: SimulationsCache = None,
+                   use_fifo: bool = False) -> Optional[SimulationProcess]:
+    args = simulation_args(parameters_values=parameters_values,
+                           csv_parameters_info=csv_parameters_info,
+                           geometry=geometry,
+                           output_file_name=output_file_name)
+    if use_fifo:
+        # output is parsed while simulation is still producing it
+        logger.info('Starting simulation with command "{args_str}".'
+                    .format(args_str=' '.join(args)))
+        return start_simulation(args,
+                                fifo_path=os.path.join(working_dir or '',
+                                                       output_file_name),
+                                working_dir=working_dir)
+
+    if cache is None:
+        invoke_simulation(args,
+                          working_dir=working_dir)
+        return None
+
+    seeds_file_path = os.path.join(working_dir or '', SEEDS_FILE_PATH)
+    output_file_path = os.path.join(working_dir or '', output_file_name)
+    seeds = read_seeds(seeds_file_path)
+    key = simulations_cache.simulation_key(
+            args,
+            seeds=seeds,
+            environment_hash=cache.environment_hash)
+    if simulations_cache.fetch(cache,
+                               key=key,
+                               destination=output_file_path):
+        logger.info('Reusing cached output of simulation '
+                    'with command "{args_str}".'
+                    .format(args_str=' '.join(args)))
+        if geometry == 'cones':
+            # seeds should be the same as if simulation has been invoked
+            write_seeds(seeds_file_path,
+                        shifted_seeds(seeds,
+                                      offset=1))
+        return None
+
+    invoke_simulation(args,
+                      working_dir=working_dir)
+    simulations_cache.store(cache,
+                            key=key,
+                            source=output_file_path)
+    return None
+
+
+def simulation_args(*,
+                    parameters_values: Dict[str, float],
+                    csv_parameters_info: CSVParametersInfoType,
+                    geometry: str,
+                    output_file_name: str) -> List[str]:
     args = ['./main.e',
             '-db', parameters_values['DB_fraction'],
             '-g', parameters_values['thin_disk_age'],
@@ -92,7 +355,13 @@ def run_simulation(*,
             args.extend(['-cbcsv', os.path.abspath(latitudes_dict['path']),
                          '-cbcol', latitudes_dict['column']])
 
-    args = list(map(str, args))
+    return list(map(str, args))
+
+
+def invoke_simulation(args: List[str],
+                      *,
+                      working_dir: Optional[str]) -> None:
     logger.info('Invoking simulation with command "{args_str}".'
                 .format(args_str=' '.join(args)))
-    check_call(args)
+    check_call(args,
+               cwd=working_dir)
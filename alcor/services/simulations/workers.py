@@ -0,0 +1,79 @@
+import logging
+import os
+import shutil
+import tempfile
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+WORKING_DIRS_PREFIX = '.alcor-worker-'
+SEEDS_FILE_PATH = os.path.join('input_data', 'seeds_line.in')
+# files which simulation rewrites,
+# so they should be copied instead of being linked
+MUTABLE_FILES_PATHS = {SEEDS_FILE_PATH,
+                       'processed_cones.txt'}
+
+SeedsType = Tuple[int, int]
+
+
+def make_working_dir(project_dir: str,
+                     *,
+                     suffix: str) -> str:
+    project_dir = os.path.abspath(project_dir)
+    working_dir = tempfile.mkdtemp(prefix=WORKING_DIRS_PREFIX,
+                                   suffix=suffix,
+                                   dir=project_dir)
+    try:
+        mirror_dir(project_dir,
+                   destination=working_dir,
+                   relative_path='')
+    except Exception:
+        shutil.rmtree(working_dir)
+        raise
+    return working_dir
+
+
+def mirror_dir(source: str,
+               *,
+               destination: str,
+               relative_path: str) -> None:
+    source_dir = os.path.join(source, relative_path)
+    for name in os.listdir(source_dir):
+        if name.startswith(WORKING_DIRS_PREFIX):
+            continue
+        entry_relative_path = os.path.join(relative_path, name)
+        entry_source_path = os.path.join(source, entry_relative_path)
+        entry_destination_path = os.path.join(destination,
+                                              entry_relative_path)
+        if entry_relative_path in MUTABLE_FILES_PATHS:
+            shutil.copy2(entry_source_path, entry_destination_path)
+        elif any(path.startswith(entry_relative_path + os.sep)
+                 for path in MUTABLE_FILES_PATHS):
+            os.mkdir(entry_destination_path)
+            mirror_dir(source,
+                       destination=destination,
+                       relative_path=entry_relative_path)
+        else:
+            os.symlink(entry_source_path, entry_destination_path)
+
+
+def read_seeds(path: str) -> SeedsType:
+    with open(path) as file:
+        first_seed, second_seed = map(int, file.read().split())
+    return first_seed, second_seed
+
+
+def write_seeds(path: str,
+                seeds: SeedsType) -> None:
+    # the same format as simulation uses
+    with open(path, 'w') as file:
+        file.write('{:6d}  {:6d}\n'.format(*seeds))
+
+
+def shifted_seeds(seeds: SeedsType,
+                  *,
+                  offset: int) -> SeedsType:
+    # simulation with 'cones' geometry shifts seeds on each run,
+    # so this gives seeds which sequential runs would have
+    first_seed, second_seed = seeds
+    return first_seed - offset, second_seed + offset
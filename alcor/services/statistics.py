@@ -0,0 +1,271 @@
+from collections import OrderedDict
+from typing import (Any,
+                    Callable,
+                    Container,
+                    Dict,
+                    List,
+                    NamedTuple)
+
+import numpy as np
+import pandas as pd
+
+from alcor.models import GalacticDiskType
+from alcor.services.common import FILTRATION_METHODS
+from . import (binned_statistics,
+               derived_columns)
+from .filters import (filtration_columns_names,
+                      stars_filtration_functions,
+                      stars_filtration_mask)
+
+Statistic = NamedTuple('Statistic',
+                       [('columns_names', List[str]),
+                        ('function', Callable[[pd.DataFrame], np.ndarray])])
+
+VELOCITIES = ['u_velocity', 'v_velocity', 'w_velocity']
+
+
+def stars_bins_counts(stars: pd.DataFrame,
+                      *,
+                      min_bolometric_magnitude: float = 6.,
+                      max_bolometric_magnitude: float = 21.,
+                      bin_size: float = 0.5) -> np.ndarray:
+    # counts are additive, so they can be summed up over chunks of stars
+    bolometric_index = binned_statistics.bolometric_indexer(
+        min_magnitude=min_bolometric_magnitude,
+        stars_bin_size=bin_size)
+    stars_bins_count = np.asscalar(bolometric_index(max_bolometric_magnitude))
+
+    return binned_statistics.bins_counts(
+            bolometric_indices(stars,
+                               min_bolometric_magnitude=(
+                                   min_bolometric_magnitude),
+                               bin_size=bin_size),
+            bins_count=stars_bins_count)
+
+
+def velocities_bins_moments(stars: pd.DataFrame,
+                            *,
+                            lepine_criterion: bool,
+                            min_bolometric_magnitude: float = 6.,
+                            max_bolometric_magnitude: float = 30.,
+                            bin_size: float = 0.5) -> Dict[str, np.ndarray]:
+    if lepine_criterion:
+        return split_velocities_bins_moments(
+                split_stars_by_velocities(stars),
+                min_bolometric_magnitude=min_bolometric_magnitude,
+                max_bolometric_magnitude=max_bolometric_magnitude,
+                bin_size=bin_size)
+
+    # all velocities are binned in one pass
+    moments = magnitude_bins_moments(
+            stars,
+            columns_names=VELOCITIES,
+            min_bolometric_magnitude=min_bolometric_magnitude,
+            max_bolometric_magnitude=max_bolometric_magnitude,
+            bin_size=bin_size)
+    return {velocity: moments[:, [index]]
+            for index, velocity in enumerate(VELOCITIES)}
+
+
+def stacked_moments(moments_by_velocities: Dict[str, np.ndarray]
+                    ) -> np.ndarray:
+    # with shape (velocities, orders, bins)
+    return np.stack([moments_by_velocities[velocity][:, 0]
+                     for velocity in VELOCITIES])
+
+
+def unstacked_moments(moments: np.ndarray) -> Dict[str, np.ndarray]:
+    return {velocity: moments[index][:, np.newaxis]
+            for index, velocity in enumerate(VELOCITIES)}
+
+
+def split_velocities_bins_moments(
+        stars_by_velocities: Dict[str, pd.DataFrame],
+        *,
+        min_bolometric_magnitude: float = 6.,
+        max_bolometric_magnitude: float = 30.,
+        bin_size: float = 0.5) -> Dict[str, np.ndarray]:
+    return {velocity: magnitude_bins_moments(
+                    stars,
+                    columns_names=[velocity],
+                    min_bolometric_magnitude=min_bolometric_magnitude,
+                    max_bolometric_magnitude=max_bolometric_magnitude,
+                    bin_size=bin_size)
+            for velocity, stars in stars_by_velocities.items()}
+
+
+def magnitude_bins_moments(stars: pd.DataFrame,
+                           *,
+                           columns_names: List[str],
+                           min_bolometric_magnitude: float,
+                           max_bolometric_magnitude: float,
+                           bin_size: float) -> np.ndarray:
+    bolometric_index = binned_statistics.bolometric_indexer(
+            min_magnitude=min_bolometric_magnitude,
+            stars_bin_size=bin_size)
+    stars_bins_count = np.asscalar(bolometric_index(max_bolometric_magnitude))
+    return binned_statistics.power_sums(
+            bolometric_indices(stars,
+                               min_bolometric_magnitude=(
+                                   min_bolometric_magnitude),
+                               bin_size=bin_size),
+            values=stars[columns_names].values.T,
+            bins_count=stars_bins_count)
+
+
+def bolometric_indices(stars: pd.DataFrame,
+                       *,
+                       min_bolometric_magnitude: float,
+                       bin_size: float) -> np.ndarray:
+    # indices of default bins can be stored along with stars
+    if (min_bolometric_magnitude == derived_columns.MIN_BOLOMETRIC_MAGNITUDE
+            and bin_size == derived_columns.BOLOMETRIC_MAGNITUDE_BIN_SIZE):
+        return derived_columns.column(stars,
+                                      'bolometric_magnitude_bin_index').values
+    bolometric_index = binned_statistics.bolometric_indexer(
+            min_magnitude=min_bolometric_magnitude,
+            stars_bin_size=bin_size)
+    magnitudes = derived_columns.column(stars, 'bolometric_magnitude').values
+    return bolometric_index(magnitudes)
+
+
+def split_stars_by_velocities(stars: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    dominant_axes = derived_columns.column(stars, 'dominant_axes')
+
+    x_highest_coordinate_mask = (dominant_axes & derived_columns.X_AXIS) > 0
+    y_highest_coordinate_mask = (dominant_axes & derived_columns.Y_AXIS) > 0
+    z_highest_coordinate_mask = (dominant_axes & derived_columns.Z_AXIS) > 0
+
+    u_vs_magnitude_stars = stars[y_highest_coordinate_mask
+                                 | z_highest_coordinate_mask]
+    v_vs_magnitude_stars = stars[x_highest_coordinate_mask
+                                 | z_highest_coordinate_mask]
+    w_vs_magnitude_stars = stars[x_highest_coordinate_mask
+                                 | y_highest_coordinate_mask]
+    return dict(u_velocity=u_vs_magnitude_stars,
+                v_velocity=v_vs_magnitude_stars,
+                w_velocity=w_vs_magnitude_stars)
+
+
+def velocities_power_sums(stars: pd.DataFrame) -> np.ndarray:
+    return stacked_moments(velocities_bins_moments(stars,
+                                                   lepine_criterion=False))
+
+
+def lepine_velocities_power_sums(stars: pd.DataFrame) -> np.ndarray:
+    return stacked_moments(velocities_bins_moments(stars,
+                                                   lepine_criterion=True))
+
+
+def galactic_disk_types_counts(stars: pd.DataFrame) -> np.ndarray:
+    galactic_disk_types = stars['galactic_disk_type'].values
+    return np.array([np.count_nonzero(galactic_disk_types
+                                      == galactic_disk_type.value)
+                     for galactic_disk_type in GalacticDiskType])
+
+
+def spectral_types_counts(stars: pd.DataFrame) -> np.ndarray:
+    return np.bincount(stars['spectral_type'].values)
+
+
+# names of statistics are the ones of group statistics table columns
+STATISTICS = OrderedDict(
+        [('luminosity_function_counts',
+          Statistic(columns_names=['bolometric_magnitude_bin_index'],
+                    function=stars_bins_counts)),
+         ('velocities_power_sums',
+          Statistic(columns_names=['bolometric_magnitude_bin_index',
+                                   *VELOCITIES],
+                    function=velocities_power_sums)),
+         ('lepine_velocities_power_sums',
+          Statistic(columns_names=['bolometric_magnitude_bin_index',
+                                   'dominant_axes',
+                                   *VELOCITIES],
+                    function=lepine_velocities_power_sums)),
+         ('galactic_disk_types_counts',
+          Statistic(columns_names=['galactic_disk_type'],
+                    function=galactic_disk_types_counts)),
+         ('spectral_types_counts',
+          Statistic(columns_names=['spectral_type'],
+                    function=spectral_types_counts))])
+
+
+def columns_statistics(columns: Dict[str, np.ndarray]
+                       ) -> Dict[str, Dict[str, Any]]:
+    # statistics of stars which pass each filtration method,
+    # they are additive, so can be summed up over chunks of stars
+    statistics_names = [statistic_name
+                        for statistic_name, statistic in STATISTICS.items()
+                        if is_computable(statistic.columns_names,
+                                         columns=columns)]
+    methods = [method
+               for method in FILTRATION_METHODS
+               if is_computable(filtration_columns_names(method),
+                                columns=columns)]
+    columns_names = [column_name
+                     for method in methods
+                     for column_name in filtration_columns_names(method)]
+    for statistic_name in statistics_names:
+        columns_names += STATISTICS[statistic_name].columns_names
+    stars = pd.DataFrame(OrderedDict(
+            (column_name, columns[column_name])
+            for column_name in derived_columns.base_columns(
+                    columns_names,
+                    stored=columns)))
+    # derived columns are computed once for all filtration methods,
+    # since frames of filtered stars keep them
+    for column_name in columns_names:
+        derived_columns.column(stars, column_name)
+    result = {}
+    for method in methods:
+        _, mask = stars_filtration_mask(
+                stars,
+                filtration_functions=stars_filtration_functions(
+                        method=method))
+        filtered_stars = stars[mask]
+        result[method] = dict(
+                stars_count=int(np.count_nonzero(mask)),
+                **{statistic_name: STATISTICS[statistic_name].function(
+                        filtered_stars)
+                   for statistic_name in statistics_names})
+    return result
+
+
+def is_computable(columns_names: List[str],
+                  *,
+                  columns: Container[str]) -> bool:
+    return all(column_name in columns
+               for column_name in derived_columns.base_columns(
+                       columns_names))
+
+
+def accumulated(total: Dict[str, Dict[str, Any]],
+                chunk_statistics: Dict[str, Dict[str, Any]]
+                ) -> Dict[str, Dict[str, Any]]:
+    if not total:
+        return chunk_statistics
+    return {method: {statistic: added(total[method][statistic], values)
+                     for statistic, values in method_statistics.items()}
+            for method, method_statistics in chunk_statistics.items()}
+
+
+def added(total: Any,
+          values: Any) -> Any:
+    total_shape, values_shape = np.shape(total), np.shape(values)
+    if total_shape != values_shape:
+        # counts of categories which are missing in chunk are zeros
+        shape = np.maximum(total_shape, values_shape)
+        total = padded(total,
+                       shape=shape)
+        values = padded(values,
+                        shape=shape)
+    return total + values
+
+
+def padded(values: np.ndarray,
+           *,
+           shape: np.ndarray) -> np.ndarray:
+    return np.pad(values,
+                  [(0, size - values_size)
+                   for size, values_size in zip(shape, values.shape)],
+                  mode='constant')
@@ -2,24 +2,42 @@ import logging
 import operator
 from collections import OrderedDict
 from functools import reduce
+from itertools import islice
 from typing import (Any,
+                    Optional,
                     Union,
                     Hashable,
                     Iterable,
                     Iterator,
                     Container,
                     Mapping,
+                    TextIO,
                     Dict,
                     Tuple,
                     List)
 
+import numpy as np
+import pandas as pd
 import yaml
 
-from alcor.models import (Group,
+from alcor.models import (GalacticDiskType,
+                          Group,
                           Star)
 
 logger = logging.getLogger(__name__)
 
+STARS_COLUMNS_DTYPES = {'spectral_type': np.int8,
+                        'galactic_disk_type': 'category'}
+GALACTIC_DISK_TYPES_CODES = {galactic_disk_type.name: galactic_disk_type.value
+                             for galactic_disk_type in GalacticDiskType}
+GALACTIC_DISK_TYPES_CATEGORIES = [galactic_disk_type.name
+                                  for galactic_disk_type in GalacticDiskType]
+# lookup table from galactic disk types values to their categories codes
+GALACTIC_DISK_TYPES_CATEGORIES_CODES = np.full(max(GalacticDiskType) + 1, -1,
+                                               dtype=np.int8)
+for code, galactic_disk_type in enumerate(GalacticDiskType):
+    GALACTIC_DISK_TYPES_CATEGORIES_CODES[galactic_disk_type] = code
+
 
 def load_settings(path: str
                   ) -> Dict[str, Any]:
@@ -41,6 +59,81 @@ def parse_stars(lines: Iterator[str],
                    **values)
 
 
+def parse_stars_columns(file: TextIO,
+                        *,
+                        columns_names: List[str],
+                        chunk_size: Optional[int] = None
+                        ) -> Iterator[Dict[str, np.ndarray]]:
+    dtypes = {column_name: STARS_COLUMNS_DTYPES.get(column_name, np.float64)
+              for column_name in columns_names}
+    # whitespace separator is handled by pandas' C engine natively,
+    # round-trip precision gives the same floats as Python's parser
+    frames = pd.read_csv(file,
+                         sep=r'\s+',
+                         header=None,
+                         names=columns_names,
+                         dtype=dtypes,
+                         engine='c',
+                         float_precision='round_trip',
+                         chunksize=chunk_size)
+    if chunk_size is None:
+        frames = [frames]
+    for frame in frames:
+        yield stars_columns(frame)
+
+
+def stars_columns(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+    result = OrderedDict((column_name, frame[column_name].values)
+                         for column_name in frame.columns)
+    try:
+        galactic_disk_types = frame['galactic_disk_type']
+    except KeyError:
+        return result
+
+    # mapping categories instead of values, since there are only few of them
+    categories = galactic_disk_types.cat.categories
+    unknown_categories = [category
+                          for category in categories
+                          if category not in GALACTIC_DISK_TYPES_CODES]
+    if unknown_categories:
+        err_msg = ('Unknown galactic disk types: "{galactic_disk_types}".'
+                   .format(galactic_disk_types='", "'.join(
+                           unknown_categories)))
+        raise ValueError(err_msg)
+    categories_codes = galactic_disk_types.cat.codes.values
+    if (categories_codes < 0).any():
+        raise ValueError('Galactic disk type is missing.')
+    codes = np.array([GALACTIC_DISK_TYPES_CODES[category]
+                      for category in categories],
+                     dtype=np.int8)
+    result['galactic_disk_type'] = codes[categories_codes]
+    return result
+
+
+def galactic_disk_types_categorical(values: np.ndarray) -> pd.Categorical:
+    return pd.Categorical.from_codes(
+            GALACTIC_DISK_TYPES_CATEGORIES_CODES[values],
+            categories=GALACTIC_DISK_TYPES_CATEGORIES)
+
+
+def stars_from_columns(columns: Dict[str, np.ndarray],
+                       *,
+                       group: Group) -> Iterator[Star]:
+    group_id = group.id
+    columns_names = list(columns)
+    # converting to Python scalars, so database driver can adapt them
+    columns_values = [columns[column_name].tolist()
+                      for column_name in columns_names]
+    if 'galactic_disk_type' in columns:
+        galactic_disk_type_index = columns_names.index('galactic_disk_type')
+        columns_values[galactic_disk_type_index] = list(map(
+                GalacticDiskType,
+                columns_values[galactic_disk_type_index]))
+    for values in zip(*columns_values):
+        yield Star(group_id=group_id,
+                   **dict(zip(columns_names, values)))
+
+
 def validate_header(header: Iterable[str],
                     *,
                     possible_columns_names: Container[str]) -> None:
@@ -60,6 +153,17 @@ def str_to_float(string: str) -> Union[str, float]:
         return string
 
 
+def chunks(iterable: Iterable[Any],
+           *,
+           size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 def zip_mappings(*mappings: Mapping[Hashable, Any]
                  ) -> Iterator[Tuple[Hashable, Tuple[Any, ...]]]:
     keys_sets = map(set, mappings)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Compares throughput of row-wise and columnar simulation output parsers.
+
+Usage example:
+    python3 -m benchmarks.parsers --lines-count 10000000
+"""
+import logging
+import os
+import tempfile
+import time
+import uuid
+from collections import deque
+from typing import (Callable,
+                    List)
+
+import click
+import numpy as np
+
+from alcor.models import (STAR_PARAMETERS_NAMES,
+                          GalacticDiskType,
+                          Group)
+from alcor.utils import (parse_stars,
+                         parse_stars_columns,
+                         validate_header)
+
+logger = logging.getLogger(__name__)
+
+# the same columns as in sphere geometry simulation output
+HEADER = ['mass',
+          'luminosity',
+          'r_galactocentric',
+          'th_galactocentric',
+          'z_coordinate',
+          'galactic_longitude',
+          'galactic_latitude',
+          'right_ascension',
+          'declination',
+          'j_abs_magnitude',
+          'b_abs_magnitude',
+          'v_abs_magnitude',
+          'r_abs_magnitude',
+          'i_abs_magnitude',
+          'u_velocity',
+          'v_velocity',
+          'w_velocity',
+          'proper_motion_component_b',
+          'proper_motion_component_l',
+          'proper_motion',
+          'distance',
+          'birth_time',
+          'spectral_type',
+          'galactic_disk_type']
+
+
+@click.command()
+@click.option('--lines-count', '-n',
+              type=int,
+              default=1000000,
+              help='Number of stars in generated simulation output '
+                   '(default 1000000).')
+@click.option('--chunk-size',
+              type=int,
+              default=None,
+              help='Chunk size for columnar parser.')
+@click.option('--seed',
+              type=int,
+              default=0,
+              help='Random generator seed.')
+def main(lines_count: int,
+         chunk_size: int,
+         seed: int) -> None:
+    logging.basicConfig(format='%(message)s',
+                        level=logging.INFO)
+    file_descriptor, path = tempfile.mkstemp(suffix='.res')
+    os.close(file_descriptor)
+    try:
+        write_output_file(path,
+                          lines_count=lines_count,
+                          seed=seed)
+        group = Group(id=uuid.uuid4())
+
+        def parse_rows(file) -> None:
+            deque(parse_stars(file,
+                              group=group,
+                              columns_names=HEADER),
+                  maxlen=0)
+
+        def parse_columns(file) -> None:
+            deque(parse_stars_columns(file,
+                                      columns_names=HEADER,
+                                      chunk_size=chunk_size),
+                  maxlen=0)
+
+        rows_time = measure(parse_rows,
+                            path=path)
+        columns_time = measure(parse_columns,
+                               path=path)
+        for name, elapsed in [('row-wise', rows_time),
+                              ('columnar', columns_time)]:
+            logger.info('{name} parser: {elapsed:.2f} s '
+                        '({rate:.0f} lines/sec).'
+                        .format(name=name,
+                                elapsed=elapsed,
+                                rate=lines_count / elapsed))
+        logger.info('Speedup: {speedup:.1f}x.'
+                    .format(speedup=rows_time / columns_time))
+    finally:
+        os.remove(path)
+
+
+def measure(parse: Callable[..., None],
+            *,
+            path: str) -> float:
+    with open(path) as file:
+        header = next(file).split()
+        validate_header(header,
+                        possible_columns_names=STAR_PARAMETERS_NAMES)
+        start = time.perf_counter()
+        parse(file)
+        return time.perf_counter() - start
+
+
+def write_output_file(path: str,
+                      *,
+                      lines_count: int,
+                      seed: int,
+                      chunk_size: int = 100000) -> None:
+    random_state = np.random.RandomState(seed)
+    galactic_disk_types = np.array([galactic_disk_type.name
+                                    for galactic_disk_type in GalacticDiskType])
+    float_columns_count = len(HEADER) - 2
+    with open(path, 'w') as file:
+        file.write(' '.join(HEADER) + '\n')
+        for start in range(0, lines_count, chunk_size):
+            size = min(chunk_size, lines_count - start)
+            floats = random_state.normal(size=(size, float_columns_count))
+            spectral_types = random_state.randint(0, 3,
+                                                  size=size)
+            disk_types = random_state.choice(galactic_disk_types,
+                                             size=size)
+            file.writelines(format_line(values,
+                                        spectral_type=spectral_type,
+                                        galactic_disk_type=disk_type)
+                            for values, spectral_type, disk_type
+                            in zip(floats.tolist(),
+                                   spectral_types.tolist(),
+                                   disk_types.tolist()))
+
+
+def format_line(values: List[float],
+                *,
+                spectral_type: int,
+                galactic_disk_type: str) -> str:
+    # mimics Fortran list-directed output
+    parts = ['{:15.7E}'.format(value)
+             for value in values]
+    parts.append('{:12d}'.format(spectral_type))
+    parts.append(galactic_disk_type)
+    return '  '.join(parts) + '\n'
+
+
+if __name__ == '__main__':
+    main()
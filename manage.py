@@ -16,16 +16,26 @@ from sqlalchemy_utils import (database_exists,
 
 from alcor.models.base import Base
 from alcor.models import Group
-from alcor.services import (simulations,
+from alcor.services import (columnar_store,
+                            simulations,
                             plots)
-from alcor.services.common import FILTRATION_METHODS
-from alcor.services.data_access import (fetch_all,
+from alcor.services.common import (FILTRATION_METHODS,
+                                   STARS_LOADERS,
+                                   is_compact_stars_storage,
+                                   stars_storage_dir,
+                                   stores_derived_columns)
+from alcor.services.data_access import (add_missing_columns,
+                                        delete_group,
+                                        fetch_all,
                                         fetch_group_by_id,
                                         fetch_last_groups)
+from alcor.services.compact import set_stars_table_precision
 from alcor.utils import load_settings
 
 logger = logging.getLogger(__name__)
 
+MEGABYTE = 1 << 20
+
 
 @click.group()
 @click.pass_context
@@ -51,11 +61,59 @@ def main(ctx: click.Context) -> None:
 @click.option('--clean',
               is_flag=True,
               help='Cleans destination database.')
+@click.option('--stars-loader', '-l',
+              type=click.Choice(STARS_LOADERS),
+              default='orm',
+              help='Stars ingestion method: '
+                   '"orm" - ORM objects insertion (default), '
+                   '"copy" - PostgreSQL "COPY FROM STDIN" bulk loading.')
+@click.option('--use-staging-table',
+              is_flag=True,
+              help='Copy stars through an unlogged staging table '
+                   '(only for "copy" stars loader, '
+                   'compared with direct copying by loaders benchmark).')
+@click.option('--chunk-size',
+              type=int,
+              default=None,
+              help='Stream simulation output to the database '
+                   'by chunks of given number of stars '
+                   'instead of loading it at once.')
+@click.option('--jobs', '-j',
+              type=click.IntRange(min=1),
+              default=1,
+              help='Number of simulations running concurrently '
+                   '(default 1).')
+@click.option('--resume',
+              is_flag=True,
+              help='Skip grid points which have been already simulated.')
+@click.option('--cache-dir',
+              type=click.Path(),
+              default=None,
+              help='Directory for caching simulations outputs '
+                   '(absolute or relative, disabled by default).')
+@click.option('--cache-size',
+              type=click.IntRange(min=0),
+              default=10240,
+              help='Simulations cache size limit in megabytes '
+                   '(default 10240).')
+@click.option('--use-fifo',
+              is_flag=True,
+              help='Stream simulations outputs through named pipes '
+                   'instead of temporary files '
+                   '(only for non-concurrent runs without cache).')
 @click.pass_context
 def simulate(ctx: click.Context,
              settings_path: str,
              project_dir: str,
-             clean: bool) -> None:
+             clean: bool,
+             stars_loader: str,
+             use_staging_table: bool,
+             chunk_size: Optional[int],
+             jobs: int,
+             resume: bool,
+             cache_dir: Optional[str],
+             cache_size: int,
+             use_fifo: bool) -> None:
     db_uri = ctx.obj
     check_connection(db_uri)
 
@@ -63,12 +121,19 @@ def simulate(ctx: click.Context,
         session_factory = sessionmaker(bind=engine)
         session = session_factory()
 
+        settings = load_settings(settings_path)
+        storage_dir = stars_storage_dir(settings)
+        compact = is_compact_stars_storage(settings)
+        derived_columns = stores_derived_columns(settings)
+
         if clean:
             ctx.invoke(clean_db)
 
-        ctx.invoke(init_db)
+        ctx.invoke(init_db,
+                   compact=compact)
 
-        settings = load_settings(settings_path)
+        if cache_dir is not None:
+            cache_dir = os.path.abspath(cache_dir)
         os.chdir(project_dir)
 
         geometry = settings['geometry']
@@ -84,10 +149,27 @@ def simulate(ctx: click.Context,
                         precision=precision,
                         grid_parameters_info=grid_parameters_info,
                         csv_parameters_info=csv_parameters_info,
+                        stars_loader=stars_loader,
+                        use_staging_table=use_staging_table,
+                        chunk_size=chunk_size,
+                        jobs=jobs,
+                        resume=resume,
+                        cache_dir=cache_dir,
+                        cache_size=cache_size * MEGABYTE,
+                        use_fifo=use_fifo,
+                        storage_dir=storage_dir,
+                        compact=compact,
+                        derived_columns=derived_columns,
                         session=session)
 
 
 @main.command()
+@click.option('--settings-path', '-p',
+              default='settings.yml',
+              type=click.Path(),
+              help='Settings file path '
+                   '(absolute or relative, '
+                   'default "settings.yml").')
 @click.option('--group_id',
               default=None,
               type=uuid.UUID,
@@ -134,12 +216,60 @@ def simulate(ctx: click.Context,
 @click.option('--ugriz-color-color-diagram', '-ugriz',
               is_flag=True,
               help='Plot color-color diagrams for ugriz photometry.')
+@click.option('--density',
+              is_flag=True,
+              help='Draw stars of scatter plots as density image '
+                   'instead of separate points.')
 @click.option('--desired-stars-count',
               type=int,
               default=None,
               help='Make plots for last N groups by time')
+@click.option('--sample-seed',
+              type=int,
+              default=None,
+              help='Seed which selects random subset of stars '
+                   '(only with "--desired-stars-count", '
+                   'the same subset is taken by default).')
+@click.option('--chunk-size',
+              type=click.IntRange(min=1),
+              default=None,
+              help='Read stars by chunks of given number of stars '
+                   'accumulating only binned values '
+                   'instead of loading whole group at once '
+                   '(scatter plots are not available).')
+@click.option('--from-statistics',
+              is_flag=True,
+              help='Plot luminosity function '
+                   'and velocities vs magnitude lines '
+                   'from statistics computed while simulating '
+                   'instead of reading stars.')
+@click.option('--jobs', '-j',
+              type=click.IntRange(min=1),
+              default=1,
+              help='Number of groups plotted concurrently '
+                   'or of plots of single group '
+                   'drawn concurrently (default 1).')
+@click.option('--output-dir', '-o',
+              default='.',
+              type=click.Path(file_okay=False),
+              help='Plots directory path, '
+                   'plots of several groups are placed '
+                   'in subdirectories named by their identifiers '
+                   '(default current directory).')
+@click.option('--output-format',
+              type=click.Choice(['png', 'pdf', 'svg', 'ps']),
+              default='ps',
+              help='Plots files format (default "ps"), '
+                   'scatters and images in vector formats '
+                   'are rasterized.')
+@click.option('--dpi',
+              type=click.IntRange(min=1),
+              default=None,
+              help='Resolution of raster plots and rasterized layers '
+                   'in dots per inch (default matplotlib one).')
 @click.pass_context
 def plot(ctx: click.Context,
+         settings_path: str,
          group_id: Optional[uuid.UUID],
          last: int,
          all_groups: bool,
@@ -152,10 +282,22 @@ def plot(ctx: click.Context,
          heatmap: str,
          toomre_diagram: bool,
          ugriz_color_color_diagram: bool,
-         desired_stars_count: int) -> None:
+         density: bool,
+         desired_stars_count: int,
+         sample_seed: Optional[int],
+         chunk_size: Optional[int],
+         from_statistics: bool,
+         jobs: int,
+         output_dir: str,
+         output_format: str,
+         dpi: Optional[int]) -> None:
     db_uri = ctx.obj
     check_connection(db_uri)
 
+    settings = load_settings(settings_path)
+    storage_dir = stars_storage_dir(settings)
+    compact = is_compact_stars_storage(settings)
+
     with create_engine(db_uri) as engine:
         session_factory = sessionmaker(bind=engine)
         session = session_factory()
@@ -172,7 +314,38 @@ def plot(ctx: click.Context,
         else:
             return
 
+        if len(groups) > 1 and chunk_size is None and not from_statistics:
+            # groups are fetched by batches and plotted by worker processes
+            plots.draw_groups(
+                    groups_ids=[group.id for group in groups],
+                    filtration_method=filtration_method,
+                    nullify_radial_velocity=nullify_radial_velocity,
+                    with_luminosity_function=luminosity_function,
+                    with_velocities_vs_magnitude=velocities_vs_magnitude,
+                    with_velocity_clouds=velocity_clouds,
+                    lepine_criterion=lepine_criterion,
+                    heatmaps_axes=heatmap,
+                    with_toomre_diagram=toomre_diagram,
+                    with_ugriz_diagrams=ugriz_color_color_diagram,
+                    desired_stars_count=desired_stars_count,
+                    jobs=jobs,
+                    output_dir=output_dir,
+                    storage_dir=storage_dir,
+                    compact=compact,
+                    sample_seed=sample_seed,
+                    density=density,
+                    output_format=output_format,
+                    dpi=dpi,
+                    session=session)
+            return
+
         for group in groups:
+            if len(groups) > 1:
+                group_output_dir = plots.group_output_dir(
+                        group.id,
+                        directory=output_dir)
+            else:
+                group_output_dir = output_dir
             plots.draw(group_id=group.id,
                        filtration_method=filtration_method,
                        nullify_radial_velocity=nullify_radial_velocity,
@@ -184,12 +357,118 @@ def plot(ctx: click.Context,
                        with_toomre_diagram=toomre_diagram,
                        with_ugriz_diagrams=ugriz_color_color_diagram,
                        desired_stars_count=desired_stars_count,
+                       storage_dir=storage_dir,
+                       compact=compact,
+                       sample_seed=sample_seed,
+                       chunk_size=chunk_size,
+                       from_statistics=from_statistics,
+                       output_dir=group_output_dir,
+                       jobs=jobs,
+                       density=density,
+                       output_format=output_format,
+                       dpi=dpi,
                        session=session)
 
 
+@main.command(name='drop_group')
+@click.option('--settings-path', '-p',
+              default='settings.yml',
+              type=click.Path(),
+              help='Settings file path '
+                   '(absolute or relative, '
+                   'default "settings.yml").')
+@click.option('--group_id',
+              required=True,
+              type=uuid.UUID,
+              help='Identifier of a group to drop.')
+@click.pass_context
+def drop_group(ctx: click.Context,
+               settings_path: str,
+               group_id: uuid.UUID) -> None:
+    """Removes group with its stars."""
+    db_uri = ctx.obj
+    check_connection(db_uri)
+
+    settings = load_settings(settings_path)
+    storage_dir = stars_storage_dir(settings)
+
+    with create_engine(db_uri) as engine:
+        session_factory = sessionmaker(bind=engine)
+        session = session_factory()
+
+        logging.info('Dropping group "{group_id}".'
+                     .format(group_id=group_id))
+        delete_group(group_id,
+                     session=session)
+        session.commit()
+
+    if storage_dir is not None:
+        columnar_store.remove_group(group_id,
+                                    directory=storage_dir)
+
+
+@main.command(name='update_derived_columns')
+@click.option('--settings-path', '-p',
+              default='settings.yml',
+              type=click.Path(),
+              help='Settings file path '
+                   '(absolute or relative, '
+                   'default "settings.yml").')
+@click.option('--group_id',
+              type=uuid.UUID,
+              default=None,
+              help='Identifier of a group to update '
+                   '(all groups by default).')
+@click.option('--chunk-size',
+              type=click.IntRange(min=1),
+              default=100000,
+              help='Number of stars to read at once '
+                   '(default 100000).')
+@click.pass_context
+def update_derived_columns(ctx: click.Context,
+                           settings_path: str,
+                           group_id: Optional[uuid.UUID],
+                           chunk_size: int) -> None:
+    """Stores derived columns which are missing or outdated."""
+    db_uri = ctx.obj
+    check_connection(db_uri)
+
+    settings = load_settings(settings_path)
+    storage_dir = stars_storage_dir(settings)
+    if storage_dir is None:
+        err_msg = ('Storing derived columns is supported '
+                   'only for "files" stars storage.')
+        raise ValueError(err_msg)
+
+    with create_engine(db_uri) as engine:
+        session_factory = sessionmaker(bind=engine)
+        session = session_factory()
+
+        if group_id is None:
+            groups_ids = [group.id
+                          for group in fetch_all(Group,
+                                                 session=session)]
+        else:
+            groups_ids = [group_id]
+
+    for group_id in groups_ids:
+        columns_names = plots.update_derived_columns(group_id,
+                                                     directory=storage_dir,
+                                                     chunk_size=chunk_size)
+        logging.info('Updated derived columns of group "{group_id}": '
+                     '{columns_names}.'
+                     .format(group_id=group_id,
+                             columns_names=', '.join(columns_names)
+                             or 'none'))
+
+
 @main.command(name='init_db')
+@click.option('--compact',
+              is_flag=True,
+              help='Store stars parameters in single precision.')
 @click.pass_context
-def init_db(ctx: click.Context) -> None:
+def init_db(ctx: click.Context,
+            compact: bool) -> None:
     """Creates Postgres database."""
     db_uri = ctx.obj
     db_uri_str = db_uri_to_str(db_uri)
@@ -203,6 +482,15 @@ def init_db(ctx: click.Context) -> None:
         logging.info('Creating "{db_uri_str}" database schema.'
                      .format(db_uri_str=db_uri_str))
         Base.metadata.create_all(bind=engine)
+        add_missing_columns(engine)
+        altered_columns_names = set_stars_table_precision(engine,
+                                                          compact=compact)
+        if altered_columns_names:
+            logging.info('Altered precision of stars table columns '
+                         'of "{db_uri_str}" database: {columns_names}.'
+                         .format(db_uri_str=db_uri_str,
+                                 columns_names=', '.join(
+                                         altered_columns_names)))
 
 
 @main.command()
@@ -30,14 +30,14 @@ setup(name=PROJECT_NAME,
           'Topic :: Scientific/Engineering :: Physics',
       ],
       keywords=['astrophysics'],
-      packages=find_packages(exclude=('tests',)),
+      packages=find_packages(exclude=('tests', 'benchmarks')),
       install_requires=[
           'psycopg2>=2.7.1',  # PostgreSQL driver
-          'sqlalchemy>=1.1.14',  # ORM
+          'sqlalchemy>=1.2.6',  # ORM, partitioned tables declaration
           'PyYAML>=3.12.0',  # settings loading
           'pandas>=0.20.3',  # data analysis
           'numpy>=1.11.3',  # multidimensional arrays computations
-          'matplotlib>=2.0.2',  # plotting
+          'matplotlib>=3.0.0',  # plotting
       ],
       setup_requires=['pytest-runner>=2.11.1'],
       tests_require=[
@@ -329,7 +329,8 @@ C     TODO: add choosing what output we want to get
      &                  'galactic_disk_type ',
      &                  'spectral_type'
       end if
-      close(421)
+C     Output unit stays open until the end of the program,
+C     so it can be a named pipe which doesn't support reopening
       
       do i = 1, iterations_count
           print *, 'Iteration Nº', i
@@ -620,7 +621,6 @@ C     same as for arrayOfVelocitiesForSD_u/v/w. (For cloud)
       stars_counter = 0
       eliminations_counter = 0
 
-      open(421, file = output_filename, access='append')
       if (geometry == 'sphere') then
           do i = 1, numberOfWDs
               if (disk_belonging(i) == 1) then
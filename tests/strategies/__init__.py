@@ -1,6 +1,36 @@
-from .processing import filtration_methods
+from .columns import (boundary_stars_columns,
+                      coordinates_stars_columns,
+                      derivable_stars_columns,
+                      far_stars_columns,
+                      near_stars_columns,
+                      persisted_columns_names,
+                      radii,
+                      samples_fractions,
+                      samples_seeds,
+                      stars_columns,
+                      stars_columns_lists,
+                      stars_counts)
+from .outputs import stars_outputs
+from .plots import (colors,
+                    invalid_extensions,
+                    output_formats)
+from .processing import (batches_sizes,
+                         filtration_methods,
+                         jobs_counts)
+from .simulations import (cache_entries_sizes_lists,
+                          caches_max_sizes,
+                          geometries,
+                          parameters_values_dicts,
+                          points_counts,
+                          precisions,
+                          seeds_pairs)
 from .stars import (defined_stars,
                     defined_stars_lists,
                     undefined_stars_lists)
-from .utils import (floats,
+from .statistics import (bins_counts,
+                         counts_arrays_lists,
+                         spectral_types_chunks)
+from .utils import (chunks_sizes,
+                    floats,
+                    integers_lists,
                     non_float_strings)
@@ -0,0 +1,111 @@
+from functools import partial
+from typing import Dict
+
+import numpy as np
+from hypothesis import strategies
+from hypothesis.extra.numpy import arrays
+from hypothesis.searchstrategy import SearchStrategy
+
+from alcor.services.derived_columns import (PERSISTED_COLUMNS_NAMES,
+                                            REGISTRY,
+                                            base_columns)
+
+stars_counts = strategies.integers(min_value=1,
+                                   max_value=100)
+samples_fractions = strategies.floats(min_value=0.,
+                                      max_value=1.)
+samples_seeds = strategies.integers(min_value=0,
+                                    max_value=2 ** 32 - 1)
+magnitudes = strategies.floats(min_value=10.,
+                              max_value=20.)
+
+
+def stars_columns_factory(stars_count: int,
+                          *,
+                          distances: SearchStrategy) -> SearchStrategy:
+    column = partial(arrays, np.float64, stars_count)
+    return strategies.fixed_dictionaries(
+            dict(distance=column(elements=distances),
+                 declination=column(elements=strategies.floats(
+                         min_value=-90.,
+                         max_value=90.)),
+                 u_velocity=column(elements=strategies.floats(
+                         min_value=-300.,
+                         max_value=300.)),
+                 v_velocity=column(elements=strategies.floats(
+                         min_value=-300.,
+                         max_value=300.)),
+                 w_velocity=column(elements=strategies.floats(
+                         min_value=-300.,
+                         max_value=300.)),
+                 luminosity=column(elements=strategies.floats(
+                         min_value=-5.,
+                         max_value=0.)),
+                 proper_motion=column(elements=strategies.floats(
+                         min_value=0.,
+                         max_value=1.)),
+                 b_abs_magnitude=column(elements=magnitudes),
+                 v_abs_magnitude=column(elements=magnitudes),
+                 r_abs_magnitude=column(elements=magnitudes),
+                 i_abs_magnitude=column(elements=magnitudes)))
+
+
+def coordinates_stars_columns_factory(stars_count: int) -> SearchStrategy:
+    column = partial(arrays, np.float64, stars_count)
+    return strategies.fixed_dictionaries(
+            dict(distance=column(elements=distances),
+                 right_ascension=column(elements=strategies.floats(
+                         min_value=0.,
+                         max_value=2. * np.pi)),
+                 declination=column(elements=strategies.floats(
+                         min_value=-np.pi / 2.,
+                         max_value=np.pi / 2.)),
+                 r_galactocentric=column(elements=strategies.floats(
+                         min_value=0.,
+                         max_value=20.)),
+                 z_coordinate=column(elements=strategies.floats(
+                         min_value=-10.,
+                         max_value=10.))))
+
+
+def with_derived_column_name(stars_columns: Dict[str, np.ndarray]
+                             ) -> SearchStrategy:
+    # columns which can be derived from given ones
+    names = [name
+             for name in sorted(REGISTRY)
+             if stars_columns.keys() >= set(base_columns([name]))]
+    return strategies.tuples(strategies.just(stars_columns),
+                             strategies.sampled_from(names))
+
+
+distances = strategies.floats(min_value=0.001,
+                              max_value=10.)
+# parallaxes of stars farther than 40 pc are less than minimal one
+far_distances = strategies.floats(min_value=0.05,
+                                  max_value=10.)
+# around distance of minimal parallax, so filters pass only some stars
+near_distances = strategies.floats(min_value=0.001,
+                                   max_value=0.05)
+# stars at the observer's position have neither finite parallaxes
+# nor apparent magnitudes
+boundary_distances = strategies.one_of(strategies.just(0.),
+                                       near_distances)
+
+stars_columns = stars_counts.flatmap(partial(stars_columns_factory,
+                                             distances=distances))
+far_stars_columns = stars_counts.flatmap(partial(stars_columns_factory,
+                                                 distances=far_distances))
+near_stars_columns = stars_counts.flatmap(partial(stars_columns_factory,
+                                                  distances=near_distances))
+boundary_stars_columns = stars_counts.flatmap(
+        partial(stars_columns_factory,
+                distances=boundary_distances))
+coordinates_stars_columns = stars_counts.flatmap(
+        coordinates_stars_columns_factory)
+radii = strategies.floats(min_value=0.001,
+                          max_value=10.)
+derivable_stars_columns = stars_columns.flatmap(with_derived_column_name)
+persisted_columns_names = strategies.sampled_from(PERSISTED_COLUMNS_NAMES)
+stars_columns_lists = strategies.lists(stars_columns,
+                                       min_size=1,
+                                       max_size=3)
@@ -0,0 +1,47 @@
+from functools import partial
+from operator import attrgetter
+from typing import (List,
+                    Tuple)
+
+from hypothesis import strategies
+from hypothesis.searchstrategy import SearchStrategy
+
+from alcor.models import GalacticDiskType
+from alcor.models.star import STAR_PARAMETERS_NAMES
+
+floats = strategies.floats(allow_nan=False,
+                           allow_infinity=False)
+columns_values = dict(spectral_type=strategies.integers(min_value=0,
+                                                        max_value=2),
+                      galactic_disk_type=strategies.sampled_from(
+                              GalacticDiskType).map(attrgetter('name')))
+
+columns_names_lists = strategies.lists(
+        strategies.sampled_from(sorted(STAR_PARAMETERS_NAMES)),
+        min_size=1,
+        unique=True)
+
+
+def stars_outputs_factory(columns_names: List[str]) -> SearchStrategy:
+    row = strategies.tuples(*[columns_values.get(column_name, floats)
+                              for column_name in columns_names])
+    return (strategies.lists(row,
+                             min_size=1,
+                             max_size=100)
+            .map(partial(map, output_line))
+            .map(list)
+            .map(partial(with_columns_names,
+                         columns_names)))
+
+
+def output_line(values: Tuple) -> str:
+    # floats representations are parsed back to the same values
+    return ' '.join(map(str, values)) + '\n'
+
+
+def with_columns_names(columns_names: List[str],
+                       lines: List[str]) -> Tuple[List[str], List[str]]:
+    return columns_names, lines
+
+
+stars_outputs = columns_names_lists.flatmap(stars_outputs_factory)
@@ -0,0 +1,12 @@
+import string
+
+from hypothesis import strategies
+
+from alcor.services.plots.output import FORMATS
+
+colors = strategies.sampled_from(['black', 'red', 'green', 'blue'])
+output_formats = strategies.sampled_from(FORMATS)
+invalid_extensions = (strategies.text(alphabet=string.ascii_letters,
+                                      max_size=4)
+                      .filter(lambda extension:
+                              extension.lower() not in FORMATS))
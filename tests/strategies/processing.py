@@ -4,3 +4,7 @@ from alcor.services.common import FILTRATION_METHODS
 
 filtration_methods = strategies.one_of(map(strategies.just,
                                            FILTRATION_METHODS))
+jobs_counts = strategies.integers(min_value=1,
+                                  max_value=2)
+batches_sizes = strategies.integers(min_value=1,
+                                    max_value=3)
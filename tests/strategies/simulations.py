@@ -0,0 +1,30 @@
+import string
+
+from hypothesis import strategies
+
+parameters_names = strategies.text(alphabet=string.ascii_lowercase + '_',
+                                   min_size=1)
+parameters_values = (strategies.integers(min_value=-10 ** 6,
+                                         max_value=10 ** 6)
+                     | strategies.floats(min_value=-1e6,
+                                         max_value=1e6))
+parameters_values_dicts = strategies.dictionaries(keys=parameters_names,
+                                                  values=parameters_values,
+                                                  min_size=1)
+precisions = strategies.integers(min_value=0,
+                                 max_value=10)
+geometries = strategies.sampled_from(['sphere', 'cones'])
+
+cache_entries_sizes = strategies.integers(min_value=0,
+                                          max_value=100)
+cache_entries_sizes_lists = strategies.lists(cache_entries_sizes,
+                                             min_size=1,
+                                             max_size=20)
+caches_max_sizes = strategies.integers(min_value=0,
+                                       max_value=1000)
+
+seeds = strategies.integers(min_value=0,
+                            max_value=10 ** 5)
+seeds_pairs = strategies.tuples(seeds, seeds)
+points_counts = strategies.integers(min_value=1,
+                                    max_value=5)
@@ -0,0 +1,29 @@
+from functools import partial
+
+import numpy as np
+from hypothesis import strategies
+from hypothesis.extra.numpy import (array_shapes,
+                                    arrays)
+
+bins_counts = strategies.integers(min_value=1,
+                                  max_value=20)
+
+spectral_types = strategies.integers(min_value=0,
+                                     max_value=5)
+# chunks of filtered stars can be empty
+spectral_types_chunks = strategies.lists(
+        strategies.lists(spectral_types).map(partial(np.array,
+                                                     dtype=np.int8)),
+        min_size=1,
+        max_size=10)
+
+counts_shapes = array_shapes(min_dims=2,
+                             max_dims=2,
+                             max_side=5)
+counts = strategies.integers(min_value=0,
+                             max_value=100)
+counts_arrays = counts_shapes.flatmap(partial(arrays, np.int64,
+                                              elements=counts))
+counts_arrays_lists = strategies.lists(counts_arrays,
+                                       min_size=1,
+                                       max_size=10)
@@ -9,3 +9,7 @@ floats = strategies.floats(allow_nan=False,
 non_numbers_alphabet = strategies.characters(
         blacklist_characters=string.digits)
 non_float_strings = strategies.text(non_numbers_alphabet)
+
+chunks_sizes = strategies.integers(min_value=1,
+                                   max_value=100)
+integers_lists = strategies.lists(strategies.integers())
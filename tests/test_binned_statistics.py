@@ -0,0 +1,96 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from hypothesis import given
+
+from alcor.services import binned_statistics
+from tests import strategies
+
+VELOCITIES = ['u_velocity', 'v_velocity', 'w_velocity']
+# narrower than generated values, so some stars are out of bins
+LUMINOSITIES_LIMITS = (-4., -1.)
+U_VELOCITIES_LIMITS = (-200., 200.)
+V_VELOCITIES_LIMITS = (-100., 250.)
+
+
+@given(strategies.stars_columns,
+       strategies.bins_counts)
+def test_power_sums(stars_columns: Dict[str, np.ndarray],
+                    bins_count: int) -> None:
+    stars = pd.DataFrame(stars_columns)
+    bins_indexes = binned_statistics.uniform_bins_indexes(
+            stars['luminosity'],
+            limits=LUMINOSITIES_LIMITS,
+            bins_count=bins_count)
+    velocities = stars[VELOCITIES]
+
+    sums = binned_statistics.power_sums(bins_indexes,
+                                        values=velocities.values.T,
+                                        bins_count=bins_count)
+
+    in_range = binned_statistics.in_range_mask(bins_indexes,
+                                               bins_count=bins_count)
+    bins_velocities = (velocities[in_range]
+                       .groupby(bins_indexes[in_range]))
+    bins = range(bins_count)
+    counts = bins_velocities.size().reindex(bins,
+                                            fill_value=0)
+    means = bins_velocities.mean().reindex(bins)
+    standard_deviations = bins_velocities.std().reindex(bins)
+    assert sums.shape == (3, len(VELOCITIES), bins_count)
+    assert np.array_equal(binned_statistics.bins_counts(bins_indexes,
+                                                        bins_count=bins_count),
+                          counts.values)
+    assert all(np.array_equal(column_counts, counts.values)
+               for column_counts in binned_statistics.counts(sums))
+    assert np.allclose(binned_statistics.means(sums), means.values.T,
+                       equal_nan=True)
+    # sums of squares lose precision for close values,
+    # so variances are compared up to rounding errors of squares
+    tolerance = (1e3 * np.finfo(np.float64).eps
+                 * np.max(np.square(velocities.values)))
+    assert np.allclose(binned_statistics.variances(sums),
+                       np.square(standard_deviations.values.T),
+                       atol=tolerance,
+                       equal_nan=True)
+    assert np.allclose(binned_statistics.standard_deviations(sums),
+                       standard_deviations.values.T,
+                       atol=np.sqrt(tolerance),
+                       equal_nan=True)
+
+
+@given(strategies.stars_columns,
+       strategies.bins_counts)
+def test_histogram2d(stars_columns: Dict[str, np.ndarray],
+                     bins_count: int) -> None:
+    u_velocities = stars_columns['u_velocity']
+    v_velocities = stars_columns['v_velocity']
+
+    result = binned_statistics.histogram2d(u_velocities, v_velocities,
+                                           x_limits=U_VELOCITIES_LIMITS,
+                                           y_limits=V_VELOCITIES_LIMITS,
+                                           bins_count=bins_count)
+
+    expected, _, _ = np.histogram2d(u_velocities, v_velocities,
+                                    bins=bins_count,
+                                    range=[U_VELOCITIES_LIMITS,
+                                           V_VELOCITIES_LIMITS])
+    assert np.array_equal(result, expected)
+
+
+@given(strategies.bins_counts)
+def test_uniform_bins_indexes_of_edges(bins_count: int) -> None:
+    edges = np.histogram_bin_edges([],
+                                   bins=bins_count,
+                                   range=V_VELOCITIES_LIMITS)
+
+    result = binned_statistics.uniform_bins_indexes(
+            edges,
+            limits=V_VELOCITIES_LIMITS,
+            bins_count=bins_count)
+
+    # each edge starts its bin, except the last one which ends it
+    assert np.array_equal(result,
+                          np.minimum(np.arange(bins_count + 1),
+                                     bins_count - 1))
@@ -0,0 +1,76 @@
+import os
+import tempfile
+from typing import List
+
+from hypothesis import given
+from py.path import local
+
+from alcor.services.simulations import cache as simulations_cache
+from tests import strategies
+
+
+@given(strategies.cache_entries_sizes_lists,
+       strategies.caches_max_sizes)
+def test_evict(cache_entries_sizes: List[int],
+               cache_max_size: int) -> None:
+    keys = [str(index)
+            for index in range(len(cache_entries_sizes))]
+    with tempfile.TemporaryDirectory() as directory:
+        cache = simulations_cache.SimulationsCache(
+                directory=directory,
+                max_size=cache_max_size,
+                environment_hash='')
+        # entries are used in order of keys
+        for index, (key, size) in enumerate(zip(keys,
+                                                 cache_entries_sizes)):
+            path = simulations_cache.cached_file_path(cache,
+                                                      key=key)
+            with open(path, 'wb') as file:
+                file.write(bytes(size))
+            os.utime(path, (index, index))
+
+        simulations_cache.evict(cache)
+
+        kept = [os.path.exists(simulations_cache.cached_file_path(cache,
+                                                                  key=key))
+                for key in keys]
+    kept_sizes = [size
+                  for size, is_kept in zip(cache_entries_sizes, kept)
+                  if is_kept]
+    evicted_count = kept.index(True) if any(kept) else len(kept)
+    assert all(kept[evicted_count:])
+    assert sum(kept_sizes) <= cache_max_size
+    # only least recently used entries which don't fit are evicted
+    assert (not evicted_count
+            or (sum(kept_sizes) + cache_entries_sizes[evicted_count - 1]
+                > cache_max_size))
+
+
+def test_fetch(tmpdir: local) -> None:
+    cache = simulations_cache.SimulationsCache(
+            directory=str(tmpdir.mkdir('cache')),
+            max_size=1 << 10,
+            environment_hash='')
+    source = tmpdir.join('source.res')
+    destination = tmpdir.join('destination.res')
+    source.write('0.1 0.2\n')
+    simulations_cache.store(cache,
+                            key='stored',
+                            source=str(source))
+    cached_path = simulations_cache.cached_file_path(cache,
+                                                     key='stored')
+    os.utime(cached_path, (0, 0))
+
+    is_fetched = simulations_cache.fetch(cache,
+                                         key='stored',
+                                         destination=str(destination))
+    is_missing_fetched = simulations_cache.fetch(
+            cache,
+            key='missing',
+            destination=str(tmpdir.join('missing.res')))
+
+    assert is_fetched
+    assert not is_missing_fetched
+    assert destination.read() == source.read()
+    # fetched entry becomes the most recently used one
+    assert os.stat(cached_path).st_mtime > 0
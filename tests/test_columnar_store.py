@@ -0,0 +1,177 @@
+import tempfile
+import uuid
+from typing import (Dict,
+                    Iterator)
+
+import numpy as np
+import pandas as pd
+import pytest
+from hypothesis import (given,
+                        settings)
+
+from alcor.services import columnar_store
+from alcor.services.columnar_store.service import sample_indices
+from tests import strategies
+
+
+@settings(deadline=None)
+@given(strategies.stars_columns)
+def test_read_group_sample_is_reproducible(
+        stars_columns: Dict[str, np.ndarray]) -> None:
+    group_id = uuid.uuid4()
+    columns_names = sorted(stars_columns)
+    stars_count = len(stars_columns['distance'])
+    desired_stars_count = max(stars_count // 2, 1)
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        columnar_store.write_group([stars_columns],
+                                   group_id=group_id,
+                                   directory=storage_dir)
+        sample = columnar_store.read_group(
+                group_id,
+                directory=storage_dir,
+                columns_names=columns_names,
+                desired_stars_count=desired_stars_count)
+        same_sample = columnar_store.read_group(
+                group_id,
+                directory=storage_dir,
+                columns_names=columns_names,
+                desired_stars_count=desired_stars_count)
+        chunks = list(columnar_store.read_group_chunks(
+                group_id,
+                directory=storage_dir,
+                columns_names=columns_names,
+                chunk_size=max(desired_stars_count // 2, 1),
+                desired_stars_count=desired_stars_count))
+
+    assert len(sample) == desired_stars_count
+    pd.testing.assert_frame_equal(sample, same_sample)
+    pd.testing.assert_frame_equal(sample,
+                                  pd.concat(chunks, ignore_index=True))
+
+
+@settings(deadline=None)
+@given(strategies.stars_columns,
+       strategies.chunks_sizes)
+def test_write_group(stars_columns: Dict[str, np.ndarray],
+                     chunk_size: int) -> None:
+    group_id = uuid.uuid4()
+    columns_names = sorted(stars_columns)
+    expected = pd.DataFrame(stars_columns,
+                            columns=columns_names)
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        stars_count = columnar_store.write_group(
+                columns_chunks(stars_columns,
+                               chunk_size=chunk_size),
+                group_id=group_id,
+                directory=storage_dir)
+        stored_columns_names = columnar_store.read_columns_names(
+                group_id,
+                directory=storage_dir)
+        stars = columnar_store.read_group(group_id,
+                                          directory=storage_dir,
+                                          columns_names=columns_names)
+        chunks = list(columnar_store.read_group_chunks(
+                group_id,
+                directory=storage_dir,
+                columns_names=columns_names,
+                chunk_size=chunk_size))
+
+    assert stars_count == len(expected)
+    assert sorted(stored_columns_names) == columns_names
+    pd.testing.assert_frame_equal(stars, expected)
+    assert all(len(chunk) <= chunk_size
+               for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                  expected)
+
+
+@settings(deadline=None)
+@given(strategies.stars_columns)
+def test_read_missing_columns(stars_columns: Dict[str, np.ndarray]) -> None:
+    group_id = uuid.uuid4()
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        columnar_store.write_group([stars_columns],
+                                   group_id=group_id,
+                                   directory=storage_dir)
+
+        with pytest.raises(ValueError):
+            columnar_store.read_group(group_id,
+                                      directory=storage_dir,
+                                      columns_names=['missing'])
+
+
+@settings(deadline=None)
+@given(strategies.stars_columns,
+       strategies.chunks_sizes)
+def test_write_group_columns(stars_columns: Dict[str, np.ndarray],
+                             chunk_size: int) -> None:
+    group_id = uuid.uuid4()
+    distances = stars_columns.pop('distance')
+    added_columns = dict(distance=distances,
+                         parallax=1. / distances)
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        columnar_store.write_group([stars_columns],
+                                   group_id=group_id,
+                                   directory=storage_dir)
+        columnar_store.write_group_columns(
+                columns_chunks(added_columns,
+                               chunk_size=chunk_size),
+                group_id=group_id,
+                directory=storage_dir,
+                columns_versions=dict(parallax=1))
+        stars = columnar_store.read_group(group_id,
+                                          directory=storage_dir,
+                                          columns_names=['distance',
+                                                         'parallax'])
+        columns_versions = columnar_store.read_columns_versions(
+                group_id,
+                directory=storage_dir)
+
+        # columns of other stars count are rejected
+        with pytest.raises(ValueError):
+            columnar_store.write_group_columns(
+                    [dict(parallax=np.append(distances, 1.))],
+                    group_id=group_id,
+                    directory=storage_dir,
+                    columns_versions={})
+
+    pd.testing.assert_frame_equal(
+            stars,
+            pd.DataFrame(added_columns,
+                         columns=['distance', 'parallax']))
+    assert columns_versions == dict(parallax=1)
+
+
+def columns_chunks(columns: Dict[str, np.ndarray],
+                   *,
+                   chunk_size: int) -> Iterator[Dict[str, np.ndarray]]:
+    stars_count = len(next(iter(columns.values())))
+    for start in range(0, stars_count, chunk_size):
+        yield {column_name: column[start:start + chunk_size]
+               for column_name, column in columns.items()}
+
+
+@given(strategies.stars_counts,
+       strategies.samples_fractions,
+       strategies.samples_seeds)
+def test_sample_indices(stars_count: int,
+                        sample_fraction: float,
+                        seed: int) -> None:
+    size = int(stars_count * sample_fraction)
+
+    result = sample_indices(stars_count,
+                            size=size,
+                            seed=seed)
+    same_result = sample_indices(stars_count,
+                                 size=size,
+                                 seed=seed)
+
+    assert result.size == size
+    # indices are distinct and sorted
+    assert np.all(np.diff(result) > 0)
+    assert np.all((result >= 0) & (result < stars_count))
+    assert np.array_equal(result, same_result)
@@ -0,0 +1,84 @@
+import tempfile
+import uuid
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from hypothesis import (given,
+                        settings)
+
+from alcor.models import GalacticDiskType
+from alcor.services import columnar_store
+from alcor.services.compact import (COMPACT_FLOAT_DTYPE,
+                                    COMPACT_INTEGER_DTYPE,
+                                    compact_stars_columns,
+                                    compact_stars_frame)
+from tests import strategies
+
+
+@given(strategies.stars_columns)
+def test_compact_stars_columns(stars_columns: Dict[str, np.ndarray]
+                               ) -> None:
+    columns = {**stars_columns,
+               'spectral_type': np.zeros_like(stars_columns['distance'],
+                                              dtype=COMPACT_INTEGER_DTYPE)}
+
+    result = compact_stars_columns(columns)
+
+    assert result.keys() == columns.keys()
+    assert result['spectral_type'] is columns['spectral_type']
+    for column_name, column in stars_columns.items():
+        assert result[column_name].dtype == COMPACT_FLOAT_DTYPE
+        np.testing.assert_array_equal(result[column_name],
+                                      column.astype(COMPACT_FLOAT_DTYPE))
+        # original columns are left intact
+        assert column.dtype == np.float64
+
+
+@settings(deadline=None)
+@given(strategies.stars_columns)
+def test_compact_columns_storage(stars_columns: Dict[str, np.ndarray]
+                                 ) -> None:
+    group_id = uuid.uuid4()
+    columns_names = sorted(stars_columns)
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        columnar_store.write_group([compact_stars_columns(stars_columns)],
+                                   group_id=group_id,
+                                   directory=storage_dir)
+        stars = columnar_store.read_group(group_id,
+                                          directory=storage_dir,
+                                          columns_names=columns_names)
+
+    # stored stars are the same as compacted ones
+    # and compacting them again keeps them intact
+    assert all(stars.dtypes == COMPACT_FLOAT_DTYPE)
+    pd.testing.assert_frame_equal(compact_stars_frame(stars), stars)
+    for column_name, column in stars_columns.items():
+        np.testing.assert_array_equal(stars[column_name],
+                                      column.astype(COMPACT_FLOAT_DTYPE))
+
+
+@given(strategies.stars_columns)
+def test_compact_stars_frame(stars_columns: Dict[str, np.ndarray]) -> None:
+    stars_count = len(stars_columns['distance'])
+    # stars fetched from double precision database
+    stars = pd.DataFrame({
+        **stars_columns,
+        'spectral_type': np.zeros(stars_count,
+                                  dtype=np.int64),
+        'galactic_disk_type': np.full(stars_count,
+                                      GalacticDiskType.thick.value),
+        'parallax': 1. / stars_columns['distance']})
+
+    result = compact_stars_frame(stars)
+
+    assert list(result.columns) == list(stars.columns)
+    pd.testing.assert_index_equal(result.index, stars.index)
+    for column_name in stars_columns:
+        assert result[column_name].dtype == COMPACT_FLOAT_DTYPE
+    assert result['spectral_type'].dtype == COMPACT_INTEGER_DTYPE
+    assert (result['galactic_disk_type']
+            == GalacticDiskType.thick.name).all()
+    # derived columns keep their precision
+    pd.testing.assert_series_equal(result['parallax'], stars['parallax'])
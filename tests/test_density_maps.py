@@ -0,0 +1,80 @@
+from typing import Dict
+
+import numpy as np
+from hypothesis import given
+from matplotlib.colors import to_rgb
+from matplotlib.figure import Figure
+
+from alcor.services import binned_statistics
+from alcor.services.plots import density_maps
+from tests import strategies
+
+
+@given(strategies.stars_columns,
+       strategies.colors,
+       strategies.bins_counts)
+def test_draw(stars_columns: Dict[str, np.ndarray],
+              color: str,
+              bins_count: int) -> None:
+    x = stars_columns['u_velocity']
+    y = stars_columns['v_velocity']
+    subplot = Figure().add_subplot(111)
+
+    density_maps.draw(subplot,
+                      x=x,
+                      y=y,
+                      color=color,
+                      bins_count=bins_count)
+
+    image, = subplot.images
+    pixels = image.get_array()
+    xlim = density_maps.finite_range([x])
+    ylim = density_maps.finite_range([y])
+    # rows of image correspond to y values
+    counts = binned_statistics.histogram2d(x, y,
+                                           x_limits=xlim,
+                                           y_limits=ylim,
+                                           bins_count=bins_count).T
+    opacities = pixels[..., 3]
+    assert pixels.shape == (bins_count, bins_count, 4)
+    assert tuple(image.get_extent()) == (*xlim, *ylim)
+    np.testing.assert_array_equal(opacities > 0, counts > 0)
+    assert np.isclose(opacities.max(), 1.)
+    colored_pixels = pixels[counts > 0, :3]
+    np.testing.assert_allclose(colored_pixels,
+                               np.broadcast_to(to_rgb(color),
+                                               colored_pixels.shape))
+
+
+@given(strategies.stars_columns,
+       strategies.bins_counts)
+def test_draw_categories(stars_columns: Dict[str, np.ndarray],
+                         bins_count: int) -> None:
+    x = stars_columns['u_velocity']
+    y = stars_columns['v_velocity']
+    subplot = Figure().add_subplot(111)
+
+    density_maps.draw_categories(subplot,
+                                 xs=[x, x],
+                                 ys=[y, y],
+                                 colors=['red', 'blue'],
+                                 bins_count=bins_count)
+
+    image, = subplot.images
+    pixels = image.get_array()
+    # pixels with equal counts of categories have mean color
+    mixed_pixels = pixels[pixels[..., 3] > 0, :3]
+    np.testing.assert_allclose(mixed_pixels,
+                               np.broadcast_to([0.5, 0., 0.5],
+                                               mixed_pixels.shape))
+
+
+def test_draw_without_finite_values() -> None:
+    subplot = Figure().add_subplot(111)
+
+    density_maps.draw(subplot,
+                      x=np.array([np.nan, np.inf]),
+                      y=np.array([0., 1.]),
+                      color='black')
+
+    assert not subplot.images
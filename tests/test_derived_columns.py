@@ -0,0 +1,103 @@
+from typing import (Dict,
+                    Set,
+                    Tuple)
+from unittest.mock import (MagicMock,
+                           patch)
+
+import numpy as np
+import pandas as pd
+from hypothesis import given
+
+from alcor.services import derived_columns
+from alcor.services.derived_columns import DerivedColumns
+from tests import strategies
+
+
+@given(strategies.persisted_columns_names)
+def test_up_to_date_columns_names(persisted_column_name: str) -> None:
+    columns_versions = derived_columns.versions(persisted_column_name)
+
+    assert derived_columns.up_to_date_columns_names(
+            {persisted_column_name: columns_versions}
+    ) == [persisted_column_name]
+    # change of any function which column depends on outdates it
+    for column_name, version in columns_versions.items():
+        outdated_columns_versions = dict(columns_versions)
+        outdated_columns_versions[column_name] = version + 1
+        assert not derived_columns.up_to_date_columns_names(
+                {persisted_column_name: outdated_columns_versions})
+    # columns stored before dependency has become derived one are outdated
+    for column_name in columns_versions:
+        if column_name == persisted_column_name:
+            continue
+        incomplete_columns_versions = dict(columns_versions)
+        del incomplete_columns_versions[column_name]
+        assert not derived_columns.up_to_date_columns_names(
+                {persisted_column_name: incomplete_columns_versions})
+
+
+@given(strategies.derivable_stars_columns)
+def test_column(derivable_stars_columns: Tuple[Dict[str, np.ndarray], str]
+                ) -> None:
+    stars_columns, column_name = derivable_stars_columns
+    stars = pd.DataFrame(stars_columns)
+    counted_registry = counted_functions_registry()
+
+    with patch.dict(derived_columns.REGISTRY, counted_registry):
+        result = derived_columns.column(stars, column_name)
+        same_result = derived_columns.column(stars, column_name)
+
+    # values are memoized in the frame
+    assert same_result is result
+    pd.testing.assert_series_equal(result, stars[column_name])
+    assert counted_registry[column_name].function.call_count == 1
+    for name in stars.columns:
+        if name in derived_columns.REGISTRY:
+            assert counted_registry[name].function.call_count == 1
+            # dependencies are derived before columns which use them
+            assert all(stars.columns.get_loc(dependency)
+                       < stars.columns.get_loc(name)
+                       for dependency
+                       in derived_columns.REGISTRY[name].dependencies)
+    # only required columns are derived
+    assert (set(stars.columns) - stars_columns.keys()
+            <= derived_dependencies(column_name))
+
+
+@given(strategies.derivable_stars_columns)
+def test_column_with_stored_dependencies(
+        derivable_stars_columns: Tuple[Dict[str, np.ndarray], str]) -> None:
+    stars_columns, column_name = derivable_stars_columns
+    stored_dependencies = derived_dependencies(column_name) - {column_name}
+    stars = pd.DataFrame(stars_columns)
+    expected = derived_columns.column(stars.copy(), column_name)
+    for name in stored_dependencies:
+        derived_columns.column(stars, name)
+    counted_registry = counted_functions_registry()
+
+    with patch.dict(derived_columns.REGISTRY, counted_registry):
+        result = derived_columns.column(stars, column_name)
+
+    pd.testing.assert_series_equal(result, expected)
+    # stored columns are not derived again
+    assert all(not counted_registry[name].function.called
+               for name in stored_dependencies)
+
+
+def counted_functions_registry() -> Dict[str, DerivedColumns]:
+    # columns computed together share counting function
+    functions = {}
+    for entry in derived_columns.REGISTRY.values():
+        functions.setdefault(entry.names,
+                             MagicMock(side_effect=entry.function))
+    return {name: entry._replace(function=functions[entry.names])
+            for name, entry in derived_columns.REGISTRY.items()}
+
+
+def derived_dependencies(column_name: str) -> Set[str]:
+    # columns are derived together with ones computed at once
+    result = set(derived_columns.REGISTRY[column_name].names)
+    for dependency in derived_columns.REGISTRY[column_name].dependencies:
+        if dependency in derived_columns.REGISTRY:
+            result.update(derived_dependencies(dependency))
+    return result
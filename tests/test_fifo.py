@@ -0,0 +1,85 @@
+import os
+import sys
+import tempfile
+from subprocess import CalledProcessError
+from typing import Dict
+
+import numpy as np
+import pytest
+from hypothesis import (given,
+                        settings)
+
+from alcor.services.simulations.fifo import (simulation_output,
+                                             start_simulation)
+from tests import strategies
+from tests.utils import (write_executable,
+                         write_output)
+
+# copies given output by halves reopening it in between
+# like simulation does, then exits with given status
+SIMULATION_SOURCE = '''#!{executable}
+import sys
+
+source_path, output_path, exit_status = sys.argv[1:]
+with open(source_path) as file:
+    lines = file.readlines()
+half = len(lines) // 2
+with open(output_path, 'w') as file:
+    file.writelines(lines[:half])
+with open(output_path, 'w') as file:
+    file.writelines(lines[half:])
+sys.exit(int(exit_status))
+'''.format(executable=sys.executable)
+
+
+@settings(deadline=None,
+          max_examples=10)
+@given(strategies.stars_columns)
+def test_simulation_output(stars_columns: Dict[str, np.ndarray]) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = write_simulation(directory,
+                                       stars_columns=stars_columns)
+        simulation_process = start_simulation(
+                [os.path.join(directory, 'main.e'), source_path,
+                 'output.res', '0'],
+                fifo_path=os.path.join(directory, 'output.res'),
+                working_dir=directory)
+
+        with simulation_output(simulation_process) as output_file:
+            output = output_file.read()
+
+        with open(source_path) as source_file:
+            source = source_file.read()
+
+    assert output == source
+
+
+@settings(deadline=None,
+          max_examples=10)
+@given(strategies.stars_columns)
+def test_failed_simulation_output(stars_columns: Dict[str, np.ndarray]
+                                  ) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = write_simulation(directory,
+                                       stars_columns=stars_columns)
+        simulation_process = start_simulation(
+                [os.path.join(directory, 'main.e'), source_path,
+                 'output.res', '1'],
+                fifo_path=os.path.join(directory, 'output.res'),
+                working_dir=directory)
+
+        # output is complete, but simulation's failure is reported
+        with pytest.raises(CalledProcessError):
+            with simulation_output(simulation_process) as output_file:
+                output_file.read()
+
+
+def write_simulation(directory: str,
+                     *,
+                     stars_columns: Dict[str, np.ndarray]) -> str:
+    source_path = os.path.join(directory, 'source.res')
+    write_output(source_path,
+                 stars_columns)
+    write_executable(os.path.join(directory, 'main.e'),
+                     SIMULATION_SOURCE)
+    return source_path
@@ -0,0 +1,50 @@
+from collections import Counter
+from typing import (Callable,
+                    Dict,
+                    Tuple)
+
+import numpy as np
+import pandas as pd
+from hypothesis import given
+
+from alcor.services.filters import (stars_filtration_functions,
+                                    stars_filtration_mask)
+from tests import strategies
+
+
+@given(strategies.near_stars_columns,
+       strategies.filtration_methods)
+def test_stars_filtration_mask(near_stars_columns: Dict[str, np.ndarray],
+                               filtration_method: str) -> None:
+    columns_names = list(near_stars_columns)
+    filtration_functions = stars_filtration_functions(
+            method=filtration_method)
+
+    eliminations_counter, mask = stars_filtration_mask(
+            pd.DataFrame(near_stars_columns),
+            filtration_functions=filtration_functions)
+    (sequential_eliminations_counter,
+     sequentially_filtered_stars) = sequential_filtration(
+            pd.DataFrame(near_stars_columns),
+            filtration_functions=filtration_functions)
+
+    assert eliminations_counter == sequential_eliminations_counter
+    assert list(eliminations_counter) == ['raw'] + list(filtration_functions)
+    pd.testing.assert_frame_equal(
+            pd.DataFrame(near_stars_columns)[mask],
+            sequentially_filtered_stars[columns_names])
+
+
+def sequential_filtration(stars: pd.DataFrame,
+                          *,
+                          filtration_functions: Dict[str, Callable]
+                          ) -> Tuple[Counter, pd.DataFrame]:
+    # each criterion is applied only to stars passed previous ones
+    eliminations_counter = Counter(raw=stars.shape[0])
+    with np.errstate(divide='ignore',
+                     invalid='ignore'):
+        for criterion, filtration_function in filtration_functions.items():
+            stars_count = stars.shape[0]
+            stars = stars[np.asarray(filtration_function(stars))]
+            eliminations_counter[criterion] = stars_count - stars.shape[0]
+    return eliminations_counter, stars
@@ -0,0 +1,110 @@
+import os
+import tempfile
+from collections import OrderedDict
+from functools import partial
+from typing import Dict
+
+from hypothesis import given
+
+from alcor.services.simulations.fingerprints import parameters_fingerprint
+from alcor.types import NumericType
+from tests import strategies
+
+CSV_PARAMETER_NAME = 'longitudes'
+
+
+@given(strategies.parameters_values_dicts,
+       strategies.precisions,
+       strategies.geometries)
+def test_parameters_fingerprint(parameters_values: Dict[str, NumericType],
+                                precision: int,
+                                geometry: str) -> None:
+    fingerprint = parameters_fingerprint(parameters_values,
+                                         precision=precision,
+                                         geometry=geometry,
+                                         csv_parameters_info={})
+    reversed_parameters_values = OrderedDict(
+            reversed(list(parameters_values.items())))
+    # like values written in settings with fractional part
+    float_parameters_values = {name: float(value)
+                               for name, value in parameters_values.items()}
+    parameter_name, parameter_value = next(iter(parameters_values.items()))
+    other_parameters_values = {**parameters_values,
+                               parameter_name: parameter_value + 1}
+    other_geometry = 'cones' if geometry == 'sphere' else 'sphere'
+
+    assert fingerprint == parameters_fingerprint(
+            dict(parameters_values),
+            precision=precision,
+            geometry=geometry,
+            csv_parameters_info={})
+    assert fingerprint == parameters_fingerprint(
+            reversed_parameters_values,
+            precision=precision,
+            geometry=geometry,
+            csv_parameters_info={})
+    assert fingerprint == parameters_fingerprint(
+            float_parameters_values,
+            precision=precision,
+            geometry=geometry,
+            csv_parameters_info={})
+    assert fingerprint != parameters_fingerprint(
+            other_parameters_values,
+            precision=precision,
+            geometry=geometry,
+            csv_parameters_info={})
+    assert fingerprint != parameters_fingerprint(
+            parameters_values,
+            precision=precision + 1,
+            geometry=geometry,
+            csv_parameters_info={})
+    assert fingerprint != parameters_fingerprint(
+            parameters_values,
+            precision=precision,
+            geometry=other_geometry,
+            csv_parameters_info={})
+
+
+@given(strategies.parameters_values_dicts,
+       strategies.precisions)
+def test_csv_parameters_fingerprint(
+        parameters_values: Dict[str, NumericType],
+        precision: int) -> None:
+    parameters_values = {name: value
+                         for name, value in parameters_values.items()
+                         if name != CSV_PARAMETER_NAME}
+    fingerprint = partial(cones_fingerprint, parameters_values,
+                          precision=precision)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'angles.csv')
+        os.mkdir(os.path.join(directory, 'moved'))
+        moved_csv_path = os.path.join(directory, 'moved', 'angles.csv')
+        changed_csv_path = os.path.join(directory, 'changed_angles.csv')
+        for path, contents in [(csv_path, '0 1\n'),
+                               (moved_csv_path, '0 1\n'),
+                               (changed_csv_path, '0 2\n')]:
+            with open(path, 'w') as file:
+                file.write(contents)
+
+        # files are identified by their contents, not by paths
+        assert (fingerprint(csv_path=csv_path)
+                == fingerprint(csv_path=moved_csv_path))
+        assert (fingerprint(csv_path=csv_path)
+                != fingerprint(csv_path=changed_csv_path))
+        assert (fingerprint(csv_path=csv_path)
+                != fingerprint(csv_path=csv_path,
+                               column=0))
+
+
+def cones_fingerprint(parameters_values: Dict[str, NumericType],
+                      *,
+                      precision: int,
+                      csv_path: str,
+                      column: int = 1) -> str:
+    return parameters_fingerprint(
+            parameters_values,
+            precision=precision,
+            geometry='cones',
+            csv_parameters_info={CSV_PARAMETER_NAME: dict(path=csv_path,
+                                                          column=column)})
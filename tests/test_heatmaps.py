@@ -0,0 +1,120 @@
+import os
+import tempfile
+from functools import partial
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+from hypothesis import (given,
+                        settings)
+
+from alcor.services import derived_columns
+from alcor.services.plots.heatmaps import (PECULIAR_SOLAR_VELOCITY_U,
+                                           PECULIAR_SOLAR_VELOCITY_V,
+                                           PECULIAR_SOLAR_VELOCITY_W,
+                                           SOLAR_GALACTOCENTRIC_DISTANCE,
+                                           coordinates_histograms,
+                                           plot,
+                                           velocities_cube)
+from tests import strategies
+
+# narrower than generated velocities, so some stars are out of bins
+VELOCITIES_LIMITS = (-200., 200.)
+
+
+@given(strategies.stars_columns,
+       strategies.bins_counts)
+def test_velocities_cube(stars_columns: Dict[str, np.ndarray],
+                         bins_count: int) -> None:
+    result = velocities_cube(pd.DataFrame(stars_columns),
+                             limits=VELOCITIES_LIMITS,
+                             bins_count=bins_count)
+
+    velocities = np.column_stack(
+            [stars_columns['u_velocity'] + PECULIAR_SOLAR_VELOCITY_U,
+             stars_columns['v_velocity'] + PECULIAR_SOLAR_VELOCITY_V,
+             stars_columns['w_velocity'] + PECULIAR_SOLAR_VELOCITY_W])
+    expected, expected_edges = np.histogramdd(
+            velocities,
+            bins=bins_count,
+            range=[VELOCITIES_LIMITS] * 3)
+    assert np.array_equal(result.counts, expected)
+    assert all(np.allclose(result.edges, edges)
+               for edges in expected_edges)
+
+
+@given(strategies.coordinates_stars_columns,
+       strategies.radii,
+       strategies.bins_counts)
+def test_coordinates_histograms(stars_columns: Dict[str, np.ndarray],
+                                radius: float,
+                                bins_count: int) -> None:
+    stars = pd.DataFrame(stars_columns)
+
+    result = coordinates_histograms(stars,
+                                    radius=radius,
+                                    bins_count=bins_count)
+
+    x_coordinates = derived_columns.column(stars, 'galactic_x_coordinate')
+    y_coordinates = derived_columns.column(stars, 'galactic_y_coordinate')
+    limits = (-radius, radius)
+    expected_xy, _, _ = np.histogram2d(x_coordinates, y_coordinates,
+                                       bins=bins_count,
+                                       range=[limits, limits])
+    expected_rz, _, _ = np.histogram2d(
+            stars_columns['r_galactocentric'],
+            stars_columns['z_coordinate'],
+            bins=bins_count,
+            range=[(SOLAR_GALACTOCENTRIC_DISTANCE - radius,
+                    SOLAR_GALACTOCENTRIC_DISTANCE + radius),
+                   limits])
+    assert np.array_equal(result['xy'], expected_xy)
+    assert np.array_equal(result['rz'], expected_rz)
+
+
+@given(strategies.coordinates_stars_columns,
+       strategies.radii,
+       strategies.chunks_sizes)
+def test_coordinates_histograms_by_chunks(
+        stars_columns: Dict[str, np.ndarray],
+        radius: float,
+        chunk_size: int) -> None:
+    stars = pd.DataFrame(stars_columns)
+    histograms = partial(coordinates_histograms,
+                         radius=radius)
+
+    result = histograms(stars)
+
+    chunks_histograms = [histograms(stars.iloc[start:start + chunk_size])
+                         for start in range(0, len(stars), chunk_size)]
+    for name, histogram in result.items():
+        assert np.array_equal(histogram,
+                              sum(chunk_histograms[name]
+                                  for chunk_histograms in chunks_histograms))
+
+
+@settings(deadline=None,
+          max_examples=5)
+@given(strategies.coordinates_stars_columns,
+       strategies.radii)
+def test_plot_coordinates(stars_columns: Dict[str, np.ndarray],
+                          radius: float) -> None:
+    stars = pd.DataFrame(stars_columns)
+
+    with tempfile.TemporaryDirectory() as directory:
+        xy_filename = os.path.join(directory, 'heatmap_xy.png')
+        rz_filename = os.path.join(directory, 'heatmap_rz.png')
+        plot(stars,
+             axes='coordinates',
+             xy_filename=xy_filename,
+             rz_filename=rz_filename,
+             radius=radius)
+
+        with pytest.raises(ValueError):
+            plot(stars,
+                 axes='coordinates',
+                 radius=None)
+
+        assert sorted(os.listdir(directory)) == ['heatmap_rz.png',
+                                                 'heatmap_xy.png']
@@ -0,0 +1,40 @@
+import io
+import uuid
+from typing import (List,
+                    Tuple)
+
+from hypothesis import given
+
+from alcor.models import (GalacticDiskType,
+                          Group)
+from alcor.services.simulations.loading import copy_rows
+from alcor.utils import (parse_stars,
+                         parse_stars_columns)
+from tests import strategies
+
+
+@given(strategies.stars_outputs)
+def test_copy_rows(stars_output: Tuple[List[str], List[str]]) -> None:
+    columns_names, lines = stars_output
+    group = Group(id=uuid.uuid4())
+    columns = next(parse_stars_columns(io.StringIO(''.join(lines)),
+                                       columns_names=columns_names))
+
+    rows = copy_rows(columns,
+                     group=group)
+
+    stars = parse_stars(lines,
+                        group=group,
+                        columns_names=columns_names)
+    assert len(rows) == len(lines)
+    for row, star in zip(rows, stars):
+        assert row.endswith('\n')
+        group_id, *values = row.rstrip('\n').split('\t')
+        assert group_id == str(group.id)
+        assert len(values) == len(columns_names)
+        for column_name, value in zip(columns_names, values):
+            star_value = getattr(star, column_name)
+            if column_name == 'galactic_disk_type':
+                assert GalacticDiskType[value].name == star_value
+            else:
+                assert float(value) == star_value
@@ -0,0 +1,78 @@
+import os
+import tempfile
+from typing import Dict
+
+import numpy as np
+import pytest
+from hypothesis import (given,
+                        settings)
+from matplotlib.figure import Figure
+
+from alcor.services.plots import output
+from alcor.services.plots.utils import new_figure
+from tests import strategies
+
+
+@settings(deadline=None)
+@given(strategies.stars_columns,
+       strategies.output_formats)
+def test_save(stars_columns: Dict[str, np.ndarray],
+              output_format: str) -> None:
+    figure = scatter_figure(stars_columns)
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = output.file_path('plot',
+                                    directory=directory,
+                                    output_format=output_format)
+        output.save(figure, filename)
+
+        file_size = os.path.getsize(filename)
+
+    assert filename.endswith('.' + output_format)
+    assert file_size > 0
+    # figure is cleared after saving
+    assert not figure.axes
+
+
+@settings(deadline=None)
+@given(strategies.stars_columns)
+def test_save_vector_format(stars_columns: Dict[str, np.ndarray]) -> None:
+    figure = scatter_figure(stars_columns)
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'plot.svg')
+        output.save(figure, filename)
+
+        with open(filename, 'rb') as file:
+            content = file.read()
+
+    # scatter is embedded as image instead of path per point
+    assert b'<image' in content
+
+
+@given(strategies.stars_columns)
+def test_rasterize_heavy_artists(stars_columns: Dict[str, np.ndarray]
+                                 ) -> None:
+    figure = scatter_figure(stars_columns)
+    subplot, = figure.axes
+    line, = subplot.plot(stars_columns['u_velocity'])
+
+    output.rasterize_heavy_artists(figure)
+
+    scatter, = subplot.collections
+    assert scatter.get_rasterized()
+    assert not line.get_rasterized()
+
+
+@given(strategies.invalid_extensions)
+def test_invalid_file_format(extension: str) -> None:
+    with pytest.raises(ValueError):
+        output.file_format('plot.' + extension)
+
+
+def scatter_figure(stars_columns: Dict[str, np.ndarray]) -> Figure:
+    figure = new_figure()
+    subplot = figure.add_subplot(111)
+    subplot.scatter(stars_columns['u_velocity'],
+                    stars_columns['v_velocity'])
+    return figure
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import uuid
+from functools import partial
+from typing import (Any,
+                    Iterable,
+                    Iterator,
+                    Dict,
+                    List,
+                    Tuple)
+from unittest import mock
+
+import numpy as np
+import pytest
+from hypothesis import (given,
+                        settings)
+
+from alcor.models import Group
+from alcor.services.simulations import pipeline
+from alcor.services.simulations.pipeline import Simulation
+from tests import strategies
+from tests.utils import write_output
+
+
+@settings(deadline=None)
+@given(strategies.stars_columns_lists,
+       strategies.chunks_sizes)
+def test_run(stars_columns_list: List[Dict[str, np.ndarray]],
+             chunk_size: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        simulations = write_simulations(stars_columns_list,
+                                        directory=directory)
+        saved_groups = []
+
+        run(iter(simulations),
+            chunk_size=chunk_size,
+            storage_dir=directory,
+            saved_groups=saved_groups)
+
+        outputs_exist = [os.path.exists(simulation.output_file_path)
+                         for simulation in simulations]
+
+    assert [group for group, _, _ in saved_groups] == [
+        simulation.group for simulation in simulations]
+    for (_, columns_names, columns), stars_columns in zip(
+            saved_groups, stars_columns_list):
+        assert columns_names == list(stars_columns)
+        assert columns.keys() == stars_columns.keys()
+        for column_name, values in columns.items():
+            np.testing.assert_array_equal(values,
+                                          stars_columns[column_name])
+    # outputs are removed after their groups are parsed
+    assert not any(outputs_exist)
+
+
+@settings(deadline=None)
+@given(strategies.stars_columns_lists)
+def test_run_failure(stars_columns_list: List[Dict[str, np.ndarray]]
+                     ) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        simulations = write_simulations(stars_columns_list,
+                                        directory=directory)
+        saved_groups = []
+
+        with pytest.raises(RuntimeError):
+            run(failing_simulations(simulations),
+                chunk_size=None,
+                storage_dir=directory,
+                saved_groups=saved_groups)
+
+    # groups which have been simulated before failure are saved
+    assert [group for group, _, _ in saved_groups] == [
+        simulation.group for simulation in simulations]
+
+
+def run(simulations: Iterator[Simulation],
+        *,
+        chunk_size: int,
+        storage_dir: str,
+        saved_groups: List[Tuple[Group, List[str], Dict[str, np.ndarray]]]
+        ) -> None:
+    with mock.patch.object(pipeline, 'save_group',
+                           partial(record_group,
+                                   saved_groups=saved_groups)):
+        pipeline.run(simulations,
+                     stars_loader='copy',
+                     use_staging_table=False,
+                     chunk_size=chunk_size,
+                     storage_dir=storage_dir,
+                     compact=False,
+                     session=None)
+
+
+def record_group(group: Group,
+                 *,
+                 columns_names: List[str],
+                 stars_chunks: Iterable[Dict[str, np.ndarray]],
+                 saved_groups: List[Tuple[Group, List[str],
+                                          Dict[str, np.ndarray]]],
+                 **_: Any) -> None:
+    chunks = list(stars_chunks)
+    columns = {column_name: np.concatenate([chunk[column_name]
+                                            for chunk in chunks])
+               for column_name in chunks[0]}
+    saved_groups.append((group, columns_names, columns))
+
+
+def failing_simulations(simulations: Iterable[Simulation]
+                        ) -> Iterator[Simulation]:
+    yield from simulations
+    raise RuntimeError('Simulation failed.')
+
+
+def write_simulations(stars_columns_list: List[Dict[str, np.ndarray]],
+                      *,
+                      directory: str) -> List[Simulation]:
+    result = []
+    for stars_columns in stars_columns_list:
+        group = Group(id=uuid.uuid4())
+        output_file_path = os.path.join(directory,
+                                        '{}.res'.format(group.id))
+        write_output(output_file_path,
+                     stars_columns)
+        result.append(Simulation(group=group,
+                                 parameters_values={},
+                                 output_file_path=output_file_path,
+                                 working_dir=None,
+                                 process=None))
+    return result
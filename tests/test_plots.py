@@ -0,0 +1,304 @@
+import os
+import tempfile
+import uuid
+from functools import partial
+from typing import (Any,
+                    Dict,
+                    List,
+                    Tuple)
+from unittest.mock import (MagicMock,
+                           patch)
+
+import numpy as np
+import pandas as pd
+from hypothesis import (given,
+                        settings)
+
+from alcor.models.eliminations import StarsCounter
+from alcor.services import (columnar_store,
+                            derived_columns)
+from alcor.services.plots import service
+from tests import strategies
+
+CHUNKS_PLOTTERS_FLAGS = dict(filtration_method='full',
+                             nullify_radial_velocity=False,
+                             with_luminosity_function=True,
+                             with_velocities_vs_magnitude=True,
+                             with_velocity_clouds=False,
+                             lepine_criterion=False,
+                             heatmaps_axes='velocities',
+                             with_toomre_diagram=False,
+                             with_ugriz_diagrams=False)
+
+
+def chunks_columns_names() -> Any:
+    return service.stars_columns_names(**CHUNKS_PLOTTERS_FLAGS)
+
+
+@settings(deadline=None)
+@given(strategies.far_stars_columns,
+       strategies.chunks_sizes)
+def test_draw_by_chunks_from_files_without_filtered_stars(
+        far_stars_columns: Dict[str, np.ndarray],
+        chunk_size: int) -> None:
+    group_id = uuid.uuid4()
+    session = MagicMock()
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage_dir = os.path.join(directory, 'storage')
+        output_dir = os.path.join(directory, 'output')
+        columnar_store.write_group([far_stars_columns],
+                                   group_id=group_id,
+                                   directory=storage_dir)
+
+        service.draw_by_chunks(group_id=group_id,
+                               columns_names=chunks_columns_names(),
+                               desired_stars_count=None,
+                               chunk_size=chunk_size,
+                               session=session,
+                               storage_dir=storage_dir,
+                               compact=False,
+                               sample_seed=None,
+                               output_dir=output_dir,
+                               output_format='png',
+                               dpi=None,
+                               **CHUNKS_PLOTTERS_FLAGS)
+
+        assert not os.path.exists(output_dir)
+    stars_counter, = session.add.call_args[0]
+    stars_count = far_stars_columns['distance'].size
+    assert isinstance(stars_counter, StarsCounter)
+    assert stars_counter.raw == stars_count
+    assert stars_counter.by_parallax == stars_count
+
+
+@settings(deadline=None)
+@given(strategies.far_stars_columns,
+       strategies.chunks_sizes)
+def test_draw_by_chunks_from_database_without_filtered_stars(
+        far_stars_columns: Dict[str, np.ndarray],
+        chunk_size: int) -> None:
+    group_id = uuid.uuid4()
+    stars_count = far_stars_columns['distance'].size
+    # database yields only the first star of the group
+    # with eliminations counts along with it
+    counted_stars = pd.DataFrame(far_stars_columns).iloc[:1].assign(
+            **{service.PASSES_FILTERS_COLUMN_NAME: False,
+               service.GROUP_ROW_NUMBER_COLUMN_NAME: 1,
+               service.PASSED_COUNT_PREFIX + 'raw': stars_count,
+               service.PASSED_COUNT_PREFIX + 'by_parallax': 0,
+               service.PASSED_COUNT_PREFIX + 'by_declination': 0,
+               service.PASSED_COUNT_PREFIX + 'by_velocity': 0})
+    session = MagicMock()
+
+    with tempfile.TemporaryDirectory() as directory, \
+            patch.object(service, 'stars_statement'), \
+            patch.object(service, 'counted_stars_statement'), \
+            patch.object(service, 'stream_stars',
+                         return_value=iter([counted_stars])):
+        output_dir = os.path.join(directory, 'output')
+
+        service.draw_by_chunks(group_id=group_id,
+                               columns_names=chunks_columns_names(),
+                               desired_stars_count=None,
+                               chunk_size=chunk_size,
+                               session=session,
+                               storage_dir=None,
+                               compact=False,
+                               sample_seed=None,
+                               output_dir=output_dir,
+                               output_format='png',
+                               dpi=None,
+                               **CHUNKS_PLOTTERS_FLAGS)
+
+        assert not os.path.exists(output_dir)
+    stars_counter, = session.add.call_args[0]
+    assert stars_counter.raw == stars_count
+    assert stars_counter.by_parallax == stars_count
+
+
+@settings(deadline=None)
+@given(strategies.stars_columns,
+       strategies.chunks_sizes)
+def test_update_derived_columns(stars_columns: Dict[str, np.ndarray],
+                                chunk_size: int) -> None:
+    group_id = uuid.uuid4()
+    (outdated_column_name,
+     *up_to_date_columns_names,
+     missing_column_name) = derived_columns.persisted_columns_names(
+            stars_columns)
+    derived_values = derived_columns.derived_columns_values(
+            stars_columns,
+            columns_names=[outdated_column_name,
+                           *up_to_date_columns_names,
+                           missing_column_name])
+    stored_columns = dict(stars_columns)
+    stored_columns.update((column_name, derived_values[column_name])
+                          for column_name in up_to_date_columns_names)
+    # values of outdated column are computed by previous function
+    stored_columns[outdated_column_name] = np.zeros_like(
+            derived_values[outdated_column_name])
+    columns_versions = {
+        column_name: derived_columns.versions(column_name)
+        for column_name in up_to_date_columns_names}
+    columns_versions[outdated_column_name] = {
+        column_name: version - 1
+        for column_name, version
+        in derived_columns.versions(outdated_column_name).items()}
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        columnar_store.write_group([stored_columns],
+                                   group_id=group_id,
+                                   directory=storage_dir,
+                                   columns_versions=columns_versions)
+
+        updated_columns_names = service.update_derived_columns(
+                group_id,
+                directory=storage_dir,
+                chunk_size=chunk_size)
+        stars = columnar_store.read_group(
+                group_id,
+                directory=storage_dir,
+                columns_names=list(derived_values))
+        stored_columns_versions = columnar_store.read_columns_versions(
+                group_id,
+                directory=storage_dir)
+        repeatedly_updated_columns_names = service.update_derived_columns(
+                group_id,
+                directory=storage_dir,
+                chunk_size=chunk_size)
+
+    assert updated_columns_names == [outdated_column_name,
+                                     missing_column_name]
+    for column_name, values in derived_values.items():
+        np.testing.assert_array_equal(stars[column_name].values, values)
+        assert (stored_columns_versions[column_name]
+                == derived_columns.versions(column_name))
+    assert not repeatedly_updated_columns_names
+
+
+@settings(deadline=None,
+          max_examples=5)
+@given(strategies.stars_columns_lists,
+       strategies.jobs_counts)
+def test_draw_groups_from_files(
+        stars_columns_list: List[Dict[str, np.ndarray]],
+        jobs: int) -> None:
+    groups_ids = [uuid.uuid4()
+                  for _ in stars_columns_list]
+    session = MagicMock()
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage_dir = os.path.join(directory, 'storage')
+        output_dir = os.path.join(directory, 'output')
+        for group_id, stars_columns in zip(groups_ids, stars_columns_list):
+            columnar_store.write_group([stars_columns],
+                                       group_id=group_id,
+                                       directory=storage_dir)
+
+        service.draw_groups(groups_ids=groups_ids,
+                            filtration_method='raw',
+                            nullify_radial_velocity=False,
+                            with_luminosity_function=True,
+                            with_velocities_vs_magnitude=True,
+                            with_velocity_clouds=False,
+                            lepine_criterion=False,
+                            heatmaps_axes='',
+                            with_toomre_diagram=False,
+                            with_ugriz_diagrams=False,
+                            desired_stars_count=None,
+                            jobs=jobs,
+                            output_dir=output_dir,
+                            session=session,
+                            storage_dir=storage_dir,
+                            output_format='png')
+
+        groups_outputs = [
+            sorted(os.listdir(service.group_output_dir(group_id,
+                                                       directory=output_dir)))
+            for group_id in groups_ids]
+
+    stars_counters = [call[0][0]
+                      for call in session.add.call_args_list]
+    assert [stars_counter.group_id
+            for stars_counter in stars_counters] == groups_ids
+    assert [stars_counter.raw
+            for stars_counter in stars_counters] == [
+        stars_columns['distance'].size
+        for stars_columns in stars_columns_list]
+    assert all(group_outputs == ['luminosity_function.png',
+                                 'velocities_vs_magnitude.png']
+               for group_outputs in groups_outputs)
+    session.commit.assert_called_once_with()
+
+
+@given(strategies.stars_columns_lists,
+       strategies.batches_sizes)
+def test_fetch_groups_filtered_stars(
+        stars_columns_list: List[Dict[str, np.ndarray]],
+        batch_size: int) -> None:
+    groups_ids = [uuid.uuid4()
+                  for _ in stars_columns_list]
+    groups_stars = dict(zip(groups_ids,
+                            map(pd.DataFrame, stars_columns_list)))
+    # the last group has every star eliminated
+    eliminated_group_id = groups_ids[-1]
+    session = MagicMock()
+
+    with patch.object(service, 'groups_stars_statement',
+                      side_effect=batch_groups_ids), \
+            patch.object(service, 'fetch_counted_stars',
+                         side_effect=partial(
+                                 fetch_batch_counted_stars,
+                                 groups_stars=groups_stars,
+                                 eliminated_group_id=eliminated_group_id)
+                         ) as fetch_counted_stars:
+        result = list(service.fetch_groups_filtered_stars(
+                groups_ids,
+                entities=[],
+                filtration_method='raw',
+                desired_stars_count=None,
+                sample_seed=None,
+                batch_size=batch_size,
+                compact=False,
+                session=session))
+
+    assert fetch_counted_stars.call_count == -(-len(groups_ids)
+                                               // batch_size)
+    assert [stars_counter.group_id
+            for stars_counter, _ in result] == groups_ids
+    for stars_counter, stars in result:
+        group_stars = groups_stars[stars_counter.group_id]
+        assert stars_counter.raw == len(group_stars)
+        if stars_counter.group_id == eliminated_group_id:
+            assert stars_counter.by_parallax == len(group_stars)
+            assert stars.empty
+        else:
+            assert stars_counter.by_parallax == 0
+            pd.testing.assert_frame_equal(stars, group_stars)
+
+
+def batch_groups_ids(groups_ids: List[uuid.UUID],
+                     **_: Any) -> List[uuid.UUID]:
+    return groups_ids
+
+
+def fetch_batch_counted_stars(groups_ids: List[uuid.UUID],
+                              *,
+                              groups_stars: Dict[uuid.UUID, pd.DataFrame],
+                              eliminated_group_id: uuid.UUID,
+                              **_: Any) -> Tuple[pd.DataFrame,
+                                                 pd.DataFrame]:
+    passed_counts = pd.DataFrame(
+            [(group_id,
+              len(groups_stars[group_id]),
+              0 if group_id == eliminated_group_id
+              else len(groups_stars[group_id]))
+             for group_id in groups_ids],
+            columns=['group_id', 'raw', 'by_parallax'])
+    stars = pd.concat([groups_stars[group_id].assign(group_id=group_id)
+                       for group_id in groups_ids
+                       if group_id != eliminated_group_id]
+                      or [pd.DataFrame(columns=['group_id'])],
+                      sort=False)
+    return passed_counts, stars
@@ -0,0 +1,152 @@
+import operator
+from functools import partial
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from hypothesis import given
+from sqlalchemy import (column,
+                        table)
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import (BindParameter,
+                                     BooleanClauseList,
+                                     Case,
+                                     Cast,
+                                     ClauseElement,
+                                     ColumnClause,
+                                     False_,
+                                     Grouping,
+                                     Label,
+                                     Null,
+                                     True_,
+                                     UnaryExpression)
+from sqlalchemy.sql.functions import Function
+
+from alcor.services.filters import stars_filtration_functions
+from alcor.services.plots.service import stars_filtration_conditions
+from tests import strategies
+
+COMPARISON_OPERATORS = {operators.eq, operators.ne,
+                        operators.gt, operators.ge,
+                        operators.lt, operators.le}
+
+
+@given(strategies.boundary_stars_columns,
+       strategies.filtration_methods)
+def test_stars_filtration_conditions(
+        boundary_stars_columns: Dict[str, np.ndarray],
+        filtration_method: str) -> None:
+    stars = table('stars', *map(column, boundary_stars_columns))
+    conditions = stars_filtration_conditions(stars.c,
+                                             method=filtration_method)
+    filtration_functions = stars_filtration_functions(
+            method=filtration_method)
+    stars_count = boundary_stars_columns['distance'].size
+
+    assert list(conditions) == list(filtration_functions)
+    with np.errstate(divide='ignore',
+                     invalid='ignore'):
+        for criterion, condition in conditions.items():
+            # "WHERE" clause passes only stars with true conditions
+            passed = evaluate(condition,
+                              columns=boundary_stars_columns,
+                              mask=np.ones(stars_count,
+                                           dtype=np.bool_)) == 1.
+            filtration_function = filtration_functions[criterion]
+            expected_passed = np.asarray(filtration_function(
+                    pd.DataFrame(boundary_stars_columns)))
+
+            assert np.array_equal(passed, expected_passed)
+
+
+def evaluate(element: ClauseElement,
+             *,
+             columns: Dict[str, np.ndarray],
+             mask: np.ndarray) -> np.ndarray:
+    # values are evaluated with SQL semantics:
+    # NULL is represented by NaN, booleans by ones and zeros,
+    # division and logarithm fail for invalid arguments
+    # only in stars selected by mask, like in guarded "CASE" branches
+    evaluate_operand = partial(evaluate,
+                               columns=columns,
+                               mask=mask)
+    if isinstance(element, (Grouping, Label)):
+        return evaluate_operand(element.element)
+    if isinstance(element, ColumnClause):
+        return columns[element.name].astype(np.float64)
+    if isinstance(element, BindParameter):
+        return np.full(mask.size, float(element.value))
+    if isinstance(element, Cast):
+        return evaluate_operand(element.clause).astype(np.float64)
+    if isinstance(element, Null):
+        return np.full(mask.size, np.nan)
+    if isinstance(element, (True_, False_)):
+        return np.full(mask.size, float(isinstance(element, True_)))
+    if isinstance(element, UnaryExpression):
+        assert element.operator is operators.neg
+        return -evaluate_operand(element.element)
+    if isinstance(element, BooleanClauseList):
+        return evaluate_boolean_clauses(element,
+                                        columns=columns,
+                                        mask=mask)
+    if isinstance(element, Case):
+        return evaluate_case(element,
+                             columns=columns,
+                             mask=mask)
+    if isinstance(element, Function):
+        assert element.name == 'log'
+        argument, = map(evaluate_operand, element.clauses)
+        evaluated_argument = argument[mask & ~np.isnan(argument)]
+        assert np.all(evaluated_argument > 0)
+        return np.log10(argument)
+    left = evaluate_operand(element.left)
+    right = evaluate_operand(element.right)
+    if element.operator in COMPARISON_OPERATORS:
+        result = element.operator(left, right).astype(np.float64)
+        result[np.isnan(left) | np.isnan(right)] = np.nan
+        return result
+    if element.operator is operator.truediv:
+        evaluated_divisor = right[mask & ~np.isnan(right)]
+        assert np.all(evaluated_divisor != 0)
+    return element.operator(left, right)
+
+
+def evaluate_boolean_clauses(clauses: BooleanClauseList,
+                             *,
+                             columns: Dict[str, np.ndarray],
+                             mask: np.ndarray) -> np.ndarray:
+    values = np.array([evaluate(clause,
+                                columns=columns,
+                                mask=mask)
+                       for clause in clauses.clauses])
+    # false conjunct or true disjunct determines the result
+    # regardless of NULL ones
+    determinant = 0. if clauses.operator is operators.and_ else 1.
+    result = np.where(np.any(values == determinant, axis=0),
+                      determinant,
+                      1. - determinant)
+    undetermined = (np.any(np.isnan(values), axis=0)
+                    & np.all(values != determinant, axis=0))
+    result[undetermined] = np.nan
+    return result
+
+
+def evaluate_case(case: Case,
+                  *,
+                  columns: Dict[str, np.ndarray],
+                  mask: np.ndarray) -> np.ndarray:
+    result = np.full(mask.size, np.nan)
+    remaining = mask.copy()
+    for condition, value in case.whens:
+        selected = remaining & (evaluate(condition,
+                                         columns=columns,
+                                         mask=remaining) == 1.)
+        result[selected] = evaluate(value,
+                                    columns=columns,
+                                    mask=selected)[selected]
+        remaining &= ~selected
+    if case.else_ is not None:
+        result[remaining] = evaluate(case.else_,
+                                     columns=columns,
+                                     mask=remaining)[remaining]
+    return result
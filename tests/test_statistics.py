@@ -0,0 +1,47 @@
+from functools import reduce
+from typing import List
+
+import numpy as np
+import pandas as pd
+from hypothesis import given
+
+from alcor.services.statistics import (accumulated,
+                                       spectral_types_counts)
+from tests import strategies
+
+
+@given(strategies.spectral_types_chunks,
+       strategies.filtration_methods)
+def test_accumulated_spectral_types_counts(
+        spectral_types_chunks: List[np.ndarray],
+        filtration_method: str) -> None:
+    chunks_statistics = [
+        {filtration_method: dict(spectral_types_counts=spectral_types_counts(
+                pd.DataFrame(dict(spectral_type=spectral_types))))}
+        for spectral_types in spectral_types_chunks]
+
+    result = reduce(accumulated, chunks_statistics, {})
+
+    assert np.array_equal(
+            result[filtration_method]['spectral_types_counts'],
+            np.bincount(np.concatenate(spectral_types_chunks)))
+
+
+@given(strategies.counts_arrays_lists,
+       strategies.filtration_methods)
+def test_accumulated_ragged_counts(counts_arrays: List[np.ndarray],
+                                   filtration_method: str) -> None:
+    chunks_statistics = [{filtration_method: dict(counts=counts)}
+                         for counts in counts_arrays]
+
+    result = reduce(accumulated, chunks_statistics, {})
+
+    # counts which are missing in chunk are zeros
+    expected = np.zeros(np.max([counts.shape
+                                for counts in counts_arrays],
+                               axis=0),
+                        dtype=np.int64)
+    for counts in counts_arrays:
+        rows_count, columns_count = counts.shape
+        expected[:rows_count, :columns_count] += counts
+    assert np.array_equal(result[filtration_method]['counts'], expected)
@@ -1,6 +1,19 @@
+import io
 import math
+import uuid
+from itertools import chain
+from typing import (List,
+                    Tuple)
 
-from alcor.utils import str_to_float
+from alcor.models import (GalacticDiskType,
+                          Group)
+from hypothesis import given
+
+from alcor.utils import (chunks,
+                         parse_stars,
+                         parse_stars_columns,
+                         str_to_float)
+from tests import strategies
 
 
 def test_str_to_float(float_value: float,
@@ -14,3 +27,45 @@ def test_str_to_float(float_value: float,
     assert math.isclose(float_result,
                         float_value)
     assert non_float_result == non_float_string
+
+
+@given(strategies.integers_lists,
+       strategies.chunks_sizes)
+def test_chunks(integers_list: List[int],
+                chunk_size: int) -> None:
+    result = list(chunks(integers_list,
+                         size=chunk_size))
+
+    assert list(chain.from_iterable(result)) == integers_list
+    assert all(len(chunk) == chunk_size
+               for chunk in result[:-1])
+    assert all(0 < len(chunk) <= chunk_size
+               for chunk in result)
+
+
+@given(strategies.stars_outputs,
+       strategies.chunks_sizes)
+def test_parse_stars_columns(stars_output: Tuple[List[str], List[str]],
+                             chunk_size: int) -> None:
+    columns_names, lines = stars_output
+    stars = list(parse_stars(lines,
+                             group=Group(id=uuid.uuid4()),
+                             columns_names=columns_names))
+    columns_chunks = list(parse_stars_columns(io.StringIO(''.join(lines)),
+                                              columns_names=columns_names,
+                                              chunk_size=chunk_size))
+
+    assert all(list(columns) == columns_names
+               for columns in columns_chunks)
+    assert all(0 < len(columns[column_name]) <= chunk_size
+               for columns in columns_chunks
+               for column_name in columns_names)
+    for column_name in columns_names:
+        values = list(chain.from_iterable(columns[column_name]
+                                          for columns in columns_chunks))
+        stars_values = [getattr(star, column_name)
+                        for star in stars]
+        if column_name == 'galactic_disk_type':
+            stars_values = [GalacticDiskType[value]
+                            for value in stars_values]
+        assert values == stars_values
@@ -0,0 +1,75 @@
+from functools import partial
+from typing import (Any,
+                    Callable,
+                    Dict,
+                    List)
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from hypothesis import (given,
+                        settings)
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+
+from alcor.services import statistics
+from alcor.services.plots import (output,
+                                  velocities_vs_magnitude)
+from tests import strategies
+
+
+@settings(deadline=None,
+          max_examples=10)
+@given(strategies.stars_columns)
+def test_plot(stars_columns: Dict[str, np.ndarray]) -> None:
+    stars = pd.DataFrame(stars_columns)
+    moments_by_velocities = statistics.velocities_bins_moments(
+            stars,
+            lepine_criterion=False,
+            min_bolometric_magnitude=6.,
+            max_bolometric_magnitude=30.,
+            bin_size=0.5)
+
+    stars_figure, = saved_figures(velocities_vs_magnitude.plot,
+                                  stars)
+    moments_figure, = saved_figures(
+            velocities_vs_magnitude.plot_bins_moments,
+            moments_by_velocities)
+
+    # stars are scattered around the same binned values
+    for stars_subplot, moments_subplot, velocity in zip(
+            stars_figure.axes, moments_figure.axes,
+            ['u_velocity', 'v_velocity', 'w_velocity']):
+        scatter, = [collection
+                    for collection in stars_subplot.collections
+                    if isinstance(collection, PathCollection)]
+        assert not any(isinstance(collection, PathCollection)
+                       for collection in moments_subplot.collections)
+        np.testing.assert_array_equal(scatter.get_offsets()[:, 1],
+                                      stars[velocity])
+        assert len(stars_subplot.lines) == len(moments_subplot.lines)
+        for stars_line, moments_line in zip(stars_subplot.lines,
+                                            moments_subplot.lines):
+            np.testing.assert_array_equal(stars_line.get_xydata(),
+                                          moments_line.get_xydata())
+
+
+def saved_figures(plot: Callable[..., None],
+                  *args: Any,
+                  **kwargs: Any) -> List[Figure]:
+    result = []
+    # figures are kept instead of being saved and cleared,
+    # so their artists can be checked
+    with mock.patch.object(output, 'save',
+                           partial(record_figure,
+                                   figures=result)):
+        plot(*args, **kwargs)
+    return result
+
+
+def record_figure(figure: Figure,
+                  filename: str,
+                  *,
+                  figures: List[Figure],
+                  **_: Any) -> None:
+    figures.append(figure)
@@ -0,0 +1,162 @@
+import os
+import sys
+import tempfile
+from typing import (Dict,
+                    List,
+                    Tuple)
+
+from hypothesis import (given,
+                        settings)
+
+from alcor.services.simulations.service import (parallel_simulations,
+                                                sequential_simulations)
+from alcor.services.simulations.workers import (SEEDS_FILE_PATH,
+                                                WORKING_DIRS_PREFIX,
+                                                make_working_dir,
+                                                read_seeds,
+                                                shifted_seeds,
+                                                write_seeds)
+from tests import strategies
+from tests.utils import write_executable
+
+# writes seeds it has been run with instead of stars
+# and shifts them like simulation with 'cones' geometry does
+SIMULATION_SOURCE = '''#!{executable}
+import sys
+
+args = sys.argv[1:]
+with open({seeds_file_path!r}) as file:
+    seeds = file.read()
+with open(args[args.index('-o') + 1], 'w') as file:
+    file.write(seeds)
+if args[args.index('-geom') + 1] == 'cones':
+    first_seed, second_seed = map(int, seeds.split())
+    with open({seeds_file_path!r}, 'w') as file:
+        file.write('{{:6d}}  {{:6d}}\\n'.format(first_seed - 1,
+                                             second_seed + 1))
+'''.format(executable=sys.executable,
+           seeds_file_path=SEEDS_FILE_PATH)
+PARAMETERS_NAMES = ['DB_fraction',
+                    'thin_disk_age',
+                    'thick_disk_age',
+                    'halo_age',
+                    'halo_stars_formation_time',
+                    'thick_disk_star_formation_exponent',
+                    'initial_mass_function_exponent',
+                    'lifetime_mass_ratio',
+                    'burst_time',
+                    'mass_reduction_factor',
+                    'thick_disk_stars_fraction',
+                    'halo_stars_fraction',
+                    'radius',
+                    'longitudes',
+                    'latitudes']
+
+
+@given(strategies.seeds_pairs,
+       strategies.points_counts)
+def test_shifted_seeds(seeds: Tuple[int, int],
+                       offset: int) -> None:
+    sequentially_shifted_seeds = seeds
+    for _ in range(offset):
+        sequentially_shifted_seeds = shifted_seeds(sequentially_shifted_seeds,
+                                                   offset=1)
+
+    assert shifted_seeds(seeds, offset=0) == seeds
+    assert shifted_seeds(seeds,
+                         offset=offset) == sequentially_shifted_seeds
+
+
+@given(strategies.seeds_pairs)
+def test_make_working_dir(seeds: Tuple[int, int]) -> None:
+    with tempfile.TemporaryDirectory() as project_dir:
+        make_project(project_dir,
+                     seeds=seeds)
+        os.mkdir(os.path.join(project_dir, WORKING_DIRS_PREFIX + 'other'))
+
+        working_dir = make_working_dir(project_dir,
+                                       suffix='')
+        write_seeds(os.path.join(working_dir, SEEDS_FILE_PATH),
+                    shifted_seeds(seeds,
+                                  offset=1))
+
+        project_seeds = read_seeds(os.path.join(project_dir,
+                                                SEEDS_FILE_PATH))
+        working_dir_entries = set(os.listdir(working_dir))
+        is_simulation_linked = os.path.islink(os.path.join(working_dir,
+                                                           'main.e'))
+
+    assert project_seeds == seeds
+    assert working_dir_entries == {'input_data', 'main.e'}
+    assert is_simulation_linked
+
+
+@settings(deadline=None,
+          max_examples=10)
+@given(strategies.seeds_pairs,
+       strategies.points_counts,
+       strategies.geometries)
+def test_parallel_simulations_seeds(seeds: Tuple[int, int],
+                                    points_count: int,
+                                    geometry: str) -> None:
+    points = [(dict.fromkeys(PARAMETERS_NAMES, index), str(index))
+              for index in range(points_count)]
+
+    sequential_seeds, sequential_final_seeds = simulations_seeds(
+            points,
+            seeds=seeds,
+            geometry=geometry,
+            jobs=1)
+    parallel_seeds, parallel_final_seeds = simulations_seeds(
+            points,
+            seeds=seeds,
+            geometry=geometry,
+            jobs=2)
+
+    assert parallel_seeds == sequential_seeds
+    assert parallel_final_seeds == sequential_final_seeds
+
+
+def simulations_seeds(points: List[Tuple[Dict[str, float], str]],
+                      *,
+                      seeds: Tuple[int, int],
+                      geometry: str,
+                      jobs: int
+                      ) -> Tuple[Dict[str, Tuple[int, int]],
+                                 Tuple[int, int]]:
+    current_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as project_dir:
+        make_project(project_dir,
+                     seeds=seeds)
+        # simulations are run in current directory like from 'manage.py'
+        os.chdir(project_dir)
+        try:
+            if jobs > 1:
+                simulations = parallel_simulations(points,
+                                                   geometry=geometry,
+                                                   csv_parameters_info={},
+                                                   jobs=jobs,
+                                                   cache=None)
+            else:
+                simulations = sequential_simulations(points,
+                                                     geometry=geometry,
+                                                     csv_parameters_info={},
+                                                     cache=None,
+                                                     use_fifo=False)
+            simulated_seeds = {}
+            for simulation in simulations:
+                simulated_seeds[simulation.group.fingerprint] = read_seeds(
+                        simulation.output_file_path)
+            return simulated_seeds, read_seeds(SEEDS_FILE_PATH)
+        finally:
+            os.chdir(current_dir)
+
+
+def make_project(project_dir: str,
+                 *,
+                 seeds: Tuple[int, int]) -> None:
+    os.mkdir(os.path.join(project_dir, 'input_data'))
+    write_seeds(os.path.join(project_dir, SEEDS_FILE_PATH),
+                seeds)
+    write_executable(os.path.join(project_dir, 'main.e'),
+                     SIMULATION_SOURCE)
@@ -1,4 +1,6 @@
 import inspect
+import os
+import stat
 from typing import (Any,
                     Callable,
                     Iterable,
@@ -6,6 +8,7 @@ from typing import (Any,
                     Dict,
                     List)
 
+import numpy as np
 from hypothesis import (Verbosity,
                         find,
                         settings)
@@ -38,3 +41,19 @@ def sub_dict(dictionary: Dict[Hashable, Any],
              keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
     return {key: dictionary[key]
             for key in keys}
+
+
+def write_executable(path: str,
+                     source: str) -> None:
+    with open(path, 'w') as file:
+        file.write(source)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+
+def write_output(path: str,
+                 stars_columns: Dict[str, np.ndarray]) -> None:
+    # floats representations are parsed back to the same values
+    with open(path, 'w') as file:
+        file.write(' '.join(stars_columns) + '\n')
+        for values in zip(*stars_columns.values()):
+            file.write(' '.join(map(repr, values)) + '\n')